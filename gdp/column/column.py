@@ -22,6 +22,7 @@ References:
 
 from __future__ import division
 
+import functools
 import math
 import os
 import time
@@ -54,13 +55,15 @@ from pyomo.gdp import Disjunct, Disjunction
 from pyomo.opt import SolutionStatus, SolverResults
 from pyomo.opt import TerminationCondition as tc
 from pyomo.util.infeasible import log_infeasible_constraints
-import pandas as pd
+
+from gdp.column.initialize import get_tray_profiles
+from gdp.dsda.variable_snapshot import apply_variable_snapshot, get_variable_snapshot
 
 
 def initialize(m):
     """
     Initializes the values of the distillation model using provided data from an Excel sheet 'init.xlsx'
-    and other model-related calculations.
+    (parsed once and cached, see gdp.column.initialize.load_initialization_data) and other model-related calculations.
 
     Args:
         m (pyomo.ConcreteModel): Model object representing the distillation column.
@@ -71,9 +74,6 @@ def initialize(m):
     m.reflux_frac.set_value(value(m.reflux_ratio / (1 + m.reflux_ratio)))
     m.boilup_frac.set_value(value(m.reboil_ratio / (1 + m.reboil_ratio)))
 
-    # Import the Excel Sheet
-    _excel_sheets = pd.read_excel('init.xlsx', sheet_name=None, engine='openpyxl')
-
     def set_value_if_not_fixed(var, val):
         """
         Set variable to the value if it is not fixed.
@@ -89,135 +89,19 @@ def initialize(m):
         if not var.fixed:
             var.set_value(val)
 
-    # active_trays are the condenser, reboiler, feed, and those conditional trays whose indicator_var is 1
-    active_trays = [
-        t
-        for t in m.trays
-        if t not in m.conditional_trays
-        or math.fabs(value(m.tray[t].indicator_var - 1)) <= 1e-3
-    ]
-    num_active_trays = len(active_trays)
-
-    feed_tray = m.feed_tray
-
-    # Process 'trays' sheet with temperature from Excel
-    tray_indexed_data = _excel_sheets['trays']
-    tray_indexed_data.sort_values(by=['tray'], inplace=True)
-    tray_indexed_data.set_index('tray', inplace=True)
-
-    # Process 'comps_and_trays' sheet with flows and compositions from Excel and set multi-index
-    comp_and_tray_indexed_data = _excel_sheets['comps_and_trays']
-    comp_and_tray_indexed_data.sort_values(by=['comp', 'tray'], inplace=True)
-    comp_and_tray_indexed_data.set_index(['comp', 'tray'], inplace=True)
-    comp_slices = {
-        c: comp_and_tray_indexed_data.loc[c, :] for c in m.comps
-    }  # Create dictionary of data slices per component
-
-    num_data_trays = tray_indexed_data.index.size
-    # If there are fewer active trays than data trays, average the data.
-    if num_active_trays < num_data_trays:
-        # Number of model trays is less than number of trays in data. Need to
-        # do averaging
-        new_indices = [1] + [
-            1 + (num_data_trays - 1) / (num_active_trays - 1) * i
-            for i in range(1, num_active_trays)
-        ]
-        # Combine data from adjacent trays based on linear combination.
-        for tray in range(2, num_active_trays):
-            indx = new_indices[tray - 1]
-            lower = math.floor(indx)
-            frac_above = indx - lower
-            # Take linear combination of values
-            tray_indexed_data.loc[tray] = (
-                tray_indexed_data.loc[lower] * (1 - frac_above)
-                + tray_indexed_data.loc[lower + 1] * frac_above
-            )
-            for c in m.comps:
-                comp_slices[c].loc[tray] = (
-                    comp_slices[c].loc[lower] * (1 - frac_above)
-                    + comp_slices[c].loc[lower + 1] * frac_above
-                )
-        tray_indexed_data.loc[num_active_trays] = tray_indexed_data.loc[num_data_trays]
-        # Trim data to match the number of active trays.
-        tray_indexed_data = tray_indexed_data.head(num_active_trays)
-        for c in m.comps:
-            comp_slices[c].loc[num_active_trays] = comp_slices[c].loc[num_data_trays]
-            comp_slices[c] = comp_slices[c].head(num_active_trays)
-    # If there are more or equal active trays than data trays, interpolate the data.
-    else:
-        # Stretch the data out and do interpolation
-        tray_indexed_data.index = pd.Index(
-            [1]
-            + [
-                int(round(num_active_trays / num_data_trays * i))
-                for i in range(2, num_data_trays + 1)
-            ],
-            name='tray',
-        )
-        tray_indexed_data = tray_indexed_data.reindex(
-            [i for i in range(1, num_active_trays + 1)]
-        ).interpolate()
-        # Stretch component data, handle potential N/A values, and interpolate
-        for c in m.comps:
-            comp_slices[c].index = pd.Index(
-                [1]
-                + [
-                    int(round(num_active_trays / num_data_trays * i))
-                    for i in range(2, num_data_trays + 1)
-                ],
-                name='tray',
-            )
-            # special handling necessary for V near top of column and L
-            # near column bottom. Do not want to interpolate with one end
-            # being potentially 0. (ie. V from total condenser). Instead,
-            # use back fill and forward fill.
-            comp_slices[c] = comp_slices[c].reindex(
-                [i for i in range(1, num_active_trays + 1)]
-            )
-            tray_below_condenser = sorted(active_trays, reverse=True)[1]
-            if pd.isna(comp_slices[c]['V'][tray_below_condenser]):
-                # V of the tray below the condenser is N/A. Find a valid
-                # value lower down to use.
-                val = next(
-                    comp_slices[c]['V'][t]
-                    for t in reversed(list(m.trays))
-                    if pd.notna(comp_slices[c]['V'][t]) and not t == m.condens_tray
-                )
-                comp_slices[c]['V'][tray_below_condenser] = val
-            if pd.isna(comp_slices[c]['L'][m.reboil_tray + 1]):
-                # L of the tray above the reboiler is N/A. Find a valid
-                # value higher up to use.
-                val = next(
-                    comp_slices[c]['L'][t]
-                    for t in m.trays
-                    if pd.notna(comp_slices[c]['L'][t]) and not t == m.reboil_tray
-                )
-                comp_slices[c]['L'][m.reboil_tray + 1] = val
-            comp_slices[c] = comp_slices[c].interpolate()
-
-    # Reindex the tray data and fill any missing values using back-fill method.
-    tray_indexed_data.index = pd.Index(sorted(active_trays), name='tray')
-    tray_indexed_data = tray_indexed_data.reindex(sorted(m.trays), method='bfill')
+    # Temperature, flow and composition profiles from the (cached) Excel data, resampled to the active trays
+    profiles = get_tray_profiles(m)
 
     # Set the temperature values for trays, if not fixed.
     for t in m.trays:
-        set_value_if_not_fixed(m.T[t], tray_indexed_data['T [K]'][t])
-
-    # Reindex and fill component data. Use back-fill for 'L' and 'x', and forward-fill for 'V' and 'y'
-    for c in m.comps:
-        comp_slices[c].index = pd.Index(sorted(active_trays), name='tray')
-        comp_slices[c] = comp_slices[c].reindex(sorted(m.trays))
-        comp_slices[c][['L', 'x']] = comp_slices[c][['L', 'x']].bfill()
-        comp_slices[c][['V', 'y']] = comp_slices[c][['V', 'y']].ffill()
-
-    comp_and_tray_indexed_data = pd.concat(comp_slices)
+        set_value_if_not_fixed(m.T[t], profiles['T'][t])
 
     # Set component values for each tray if they are not fixed.
     for c, t in m.comps * m.trays:
-        set_value_if_not_fixed(m.L[c, t], comp_and_tray_indexed_data['L'][c, t])
-        set_value_if_not_fixed(m.V[c, t], comp_and_tray_indexed_data['V'][c, t])
-        set_value_if_not_fixed(m.x[c, t], comp_and_tray_indexed_data['x'][c, t])
-        set_value_if_not_fixed(m.y[c, t], comp_and_tray_indexed_data['y'][c, t])
+        set_value_if_not_fixed(m.L[c, t], profiles['L'][c, t])
+        set_value_if_not_fixed(m.V[c, t], profiles['V'][c, t])
+        set_value_if_not_fixed(m.x[c, t], profiles['x'][c, t])
+        set_value_if_not_fixed(m.y[c, t], profiles['y'][c, t])
 
     # Set enthalpy specifications for each component in the feed.
     for c in m.comps:
@@ -334,7 +218,7 @@ def build_column(
         x_input (list): List of the external variable values with the reflex position and the boilup position in the column
         nlp_solver (str): Name of the NLP solver to use
         provide_init (bool): Whether to provide initialization values
-        init (dict): Dictionary of initialization values
+        init (dict): Snapshot of initialization values (m.dsda_initialization of a previous solution, possibly with a different number of trays)
         boolean_ref (bool): Whether to use boolean reformulation
     Returns:
         m (pyomo.ConcreteModel): Pyomo model
@@ -419,480 +303,232 @@ def build_column(
         >= min_trays
     )
 
-    # If user provides initialization values, use them
-    if provide_init:
-        # Feed temperature variable [K]
-        m.T_feed = Var(
-            doc='Feed temperature [K]',
-            domain=NonNegativeReals,
-            bounds=(min_T, max_T),
-            initialize=init['T_feed'],
-        )
-
-        # Vapor fraction of feed variable
-        m.feed_vap_frac = Var(
-            doc='Vapor fraction of feed',
-            initialize=init['feed_vap_frac'],
-            bounds=(0, 1),
-        )
-
-        # Component feed flow variable [mol/s]
-        m.feed = Var(
-            m.comps, doc='Total component feed flow [mol/s]', initialize=init['feed']
-        )
-
-        # Liquid mole fraction variable
-        m.x = Var(
-            m.comps,
-            m.trays,
-            doc='Liquid mole fraction',
-            bounds=(0, 1),
-            domain=NonNegativeReals,
-            initialize=init['x'],
-        )
-
-        # Vapor mole fraction variable
-        m.y = Var(
-            m.comps,
-            m.trays,
-            doc='Vapor mole fraction',
-            bounds=(0, 1),
-            domain=NonNegativeReals,
-            initialize=init['y'],
-        )
-
-        # Component liquid flows from tray variable [mol/s]
-        m.L = Var(
-            m.comps,
-            m.trays,
-            doc='component liquid flows from tray [mol/s]',
-            domain=NonNegativeReals,
-            bounds=(0, max_flow),
-            initialize=init['L'],
-        )
-
-        # Component vapor flows from tray variable [mol/s]
-        m.V = Var(
-            m.comps,
-            m.trays,
-            doc='component vapor flows from tray [mol/s]',
-            domain=NonNegativeReals,
-            bounds=(0, max_flow),
-            initialize=init['V'],
-        )
-
-        # Liquid flows from tray variable [mol/s]
-        m.liq = Var(
-            m.trays,
-            domain=NonNegativeReals,
-            doc='liquid flows from tray [mol/s]',
-            initialize=init['liq'],
-            bounds=(0, max_flow),
-        )
-
-        # Vapor flows from tray variable [mol/s]
-        m.vap = Var(
-            m.trays,
-            domain=NonNegativeReals,
-            doc='vapor flows from tray [mol/s]',
-            initialize=init['vap'],
-            bounds=(0, max_flow),
-        )
-
-        # Bottoms component flows variable [mol/s]
-        m.B = Var(
-            m.comps,
-            domain=NonNegativeReals,
-            doc='bottoms component flows [mol/s]',
-            bounds=(0, max_flow),
-            initialize=init['B'],
-        )
-
-        # Distillate component flows variable [mol/s]
-        m.D = Var(
-            m.comps,
-            domain=NonNegativeReals,
-            doc='distillate component flows [mol/s]',
-            bounds=(0, max_flow),
-            initialize=init['D'],
-        )
-
-        # Bottoms flow variable [mol/s]
-        m.bot = Var(
-            domain=NonNegativeReals,
-            initialize=init['bot'],
-            bounds=(0, 100),
-            doc='bottoms flow [mol/s]',
-        )
-
-        # Distillate flow variable [mol/s]
-        m.dis = Var(
-            domain=NonNegativeReals,
-            initialize=init['dis'],
-            doc='distillate flow [mol/s]',
-            bounds=(0, 100),
-        )
-
-        # Reflux ratio variable
-        m.reflux_ratio = Var(
-            domain=NonNegativeReals,
-            bounds=(0.5, 4),
-            doc='reflux ratio',
-            initialize=init['reflux_ratio'],
-        )
-
-        # Reboil ratio variable
-        m.reboil_ratio = Var(
-            domain=NonNegativeReals,
-            bounds=(1.3, 4),
-            doc='reboil ratio',
-            initialize=init['reboil_ratio'],
-        )
-
-        # Reflux fractions variable
-        m.reflux_frac = Var(
-            domain=NonNegativeReals,
-            bounds=(0, 1 - 1e-6),
-            doc='reflux fractions',
-            initialize=init['reflux_frac'],
-        )
-
-        # Boilup fraction variable
-        m.boilup_frac = Var(
-            domain=NonNegativeReals,
-            bounds=(0, 1 - 1e-6),
-            doc='boilup fraction',
-            initialize=init['boilup_frac'],
-        )
-
-        # Phase equilibrium constant variable
-        m.Kc = Var(
-            m.comps,
-            m.trays,
-            doc='Phase equilibrium constant',
-            domain=NonNegativeReals,
-            initialize=init['Kc'],
-            bounds=(0, 1000),
-        )
-
-        # Temperature variable [K]
-        m.T = Var(
-            m.trays,
-            doc='Temperature [K]',
-            domain=NonNegativeReals,
-            bounds=(min_T, max_T),
-            initialize=init['T'],
-        )
-
-        # Pressure variable [bar]
-        m.P = Var(doc='Pressure [bar]', bounds=(0, 5), initialize=init['P'])
-
-        # Liquid activity coefficient variable
-        m.gamma = Var(
-            m.comps,
-            m.trays,
-            doc='liquid activity coefficent of component on tray',
-            domain=NonNegativeReals,
-            bounds=(0, 10),
-            initialize=init['gamma'],
-        )
-
-        # Pure component vapor pressure variable [bar]
-        m.Pvap = Var(
-            m.comps,
-            m.trays,
-            doc='pure component vapor pressure of component on tray [bar]',
-            domain=NonNegativeReals,
-            bounds=(1e-3, 5),
-            initialize=init['Pvap'],
-        )
-
-        # Variable related to fraction of critical temperature (1 - T/Tc)
-        m.Pvap_X = Var(
-            m.comps,
-            m.trays,
-            doc='Related to fraction of critical temperature (1 - T/Tc)',
-            bounds=(0.25, 0.5),
-            initialize=init['Pvap_X'],
-        )
-
-        # Liquid molar enthalpy variable [kJ/mol]
-        m.H_L = Var(
-            m.comps,
-            m.trays,
-            bounds=(0.1, 16),
-            doc='Liquid molar enthalpy of component in tray [kJ/mol]',
-            initialize=init['H_L'],
-        )
-
-        # Vapor molar enthalpy variable [kJ/mol]
-        m.H_V = Var(
-            m.comps,
-            m.trays,
-            bounds=(30, 16 + 40),
-            doc='Vapor molar enthalpy of component in tray [kJ/mol]',
-            initialize=init['H_V'],
-        )
-
-        # Component liquid molar enthalpy in feed variable [kJ/mol]
-        m.H_L_spec_feed = Var(
-            m.comps,
-            doc='Component liquid molar enthalpy in feed [kJ/mol]',
-            initialize=init['H_L_spec_feed'],
-            bounds=(0.1, 16),
-        )
-
-        # Component vapor molar enthalpy in feed variable [kJ/mol]
-        m.H_V_spec_feed = Var(
-            m.comps,
-            doc='Component vapor molar enthalpy in feed [kJ/mol]',
-            initialize=init['H_V_spec_feed'],
-            bounds=(30, 16 + 40),
-        )
-
-        # Reboiler duty variable [MJ/s]
-        m.Qb = Var(
-            domain=NonNegativeReals,
-            doc='reboiler duty [MJ/s]',
-            initialize=init['Qb'],
-            bounds=(0, 8),
-        )
+    # Feed temperature variable [K] within the minimum and maximum temperature
+    m.T_feed = Var(
+        doc='Feed temperature [K]',
+        domain=NonNegativeReals,
+        bounds=(min_T, max_T),
+        initialize=368,  # Inlet temperature (95 C)
+    )
 
-        # Condenser duty variable [MJ/s]
-        m.Qc = Var(
-            domain=NonNegativeReals,
-            doc='condenser duty [MJ/s]',
-            initialize=init['Qc'],
-            bounds=(0, 8),
-        )
+    # Vapor fraction of the feed, value between 0 and 1
+    m.feed_vap_frac = Var(doc='Vapor fraction of feed', initialize=0, bounds=(0, 1))
 
-    else:
-        # Feed temperature variable [K] within the minimum and maximum temperature
-        m.T_feed = Var(
-            doc='Feed temperature [K]',
-            domain=NonNegativeReals,
-            bounds=(min_T, max_T),
-            initialize=368,  # Inlet temperature (95 C)
-        )
+    # Total component feed flow [mol/s]
+    m.feed = Var(m.comps, doc='Total component feed flow [mol/s]', initialize=50)
 
-        # Vapor fraction of the feed, value between 0 and 1
-        m.feed_vap_frac = Var(doc='Vapor fraction of feed', initialize=0, bounds=(0, 1))
-
-        # Total component feed flow [mol/s]
-        m.feed = Var(m.comps, doc='Total component feed flow [mol/s]', initialize=50)
+    # Liquid mole fraction variable for each component on each tray
+    m.x = Var(
+        m.comps,
+        m.trays,
+        doc='Liquid mole fraction',
+        bounds=(0, 1),
+        domain=NonNegativeReals,
+        initialize=0.5,
+    )
 
-        # Liquid mole fraction variable for each component on each tray
-        m.x = Var(
-            m.comps,
-            m.trays,
-            doc='Liquid mole fraction',
-            bounds=(0, 1),
-            domain=NonNegativeReals,
-            initialize=0.5,
-        )
+    # Vapor mole fraction variable for each component on each tray
+    m.y = Var(
+        m.comps,
+        m.trays,
+        doc='Vapor mole fraction',
+        bounds=(0, 1),
+        domain=NonNegativeReals,
+        initialize=0.5,
+    )
 
-        # Vapor mole fraction variable for each component on each tray
-        m.y = Var(
-            m.comps,
-            m.trays,
-            doc='Vapor mole fraction',
-            bounds=(0, 1),
-            domain=NonNegativeReals,
-            initialize=0.5,
-        )
+    # Component liquid flows from tray [mol/s]
+    m.L = Var(
+        m.comps,
+        m.trays,
+        doc='component liquid flows from tray in mol/s',
+        domain=NonNegativeReals,
+        bounds=(0, max_flow),
+        initialize=50,
+    )
 
-        # Component liquid flows from tray [mol/s]
-        m.L = Var(
-            m.comps,
-            m.trays,
-            doc='component liquid flows from tray in mol/s',
-            domain=NonNegativeReals,
-            bounds=(0, max_flow),
-            initialize=50,
-        )
+    # Component vapor flows from tray [mol/s]
+    m.V = Var(
+        m.comps,
+        m.trays,
+        doc='component vapor flows from tray in mol/s',
+        domain=NonNegativeReals,
+        bounds=(0, max_flow),
+        initialize=50,
+    )
 
-        # Component vapor flows from tray [mol/s]
-        m.V = Var(
-            m.comps,
-            m.trays,
-            doc='component vapor flows from tray in mol/s',
-            domain=NonNegativeReals,
-            bounds=(0, max_flow),
-            initialize=50,
-        )
+    # Liquid flows from each tray [mol/s]
+    m.liq = Var(
+        m.trays,
+        domain=NonNegativeReals,
+        doc='liquid flows from tray [mol/s]',
+        initialize=100,
+        bounds=(0, max_flow),
+    )
 
-        # Liquid flows from each tray [mol/s]
-        m.liq = Var(
-            m.trays,
-            domain=NonNegativeReals,
-            doc='liquid flows from tray [mol/s]',
-            initialize=100,
-            bounds=(0, max_flow),
-        )
+    # Vapor flows from each tray [mol/s]
+    m.vap = Var(
+        m.trays,
+        domain=NonNegativeReals,
+        doc='vapor flows from tray [mol/s]',
+        initialize=100,
+        bounds=(0, max_flow),
+    )
 
-        # Vapor flows from each tray [mol/s]
-        m.vap = Var(
-            m.trays,
-            domain=NonNegativeReals,
-            doc='vapor flows from tray [mol/s]',
-            initialize=100,
-            bounds=(0, max_flow),
-        )
+    # Bottoms component flows [mol/s]
+    m.B = Var(
+        m.comps,
+        domain=NonNegativeReals,
+        doc='bottoms component flows [mol/s]',
+        bounds=(0, max_flow),
+        initialize=50,
+    )
 
-        # Bottoms component flows [mol/s]
-        m.B = Var(
-            m.comps,
-            domain=NonNegativeReals,
-            doc='bottoms component flows [mol/s]',
-            bounds=(0, max_flow),
-            initialize=50,
-        )
+    # Distillate component flows [mol/s]
+    m.D = Var(
+        m.comps,
+        domain=NonNegativeReals,
+        doc='distillate component flows [mol/s]',
+        bounds=(0, max_flow),
+        initialize=50,
+    )
 
-        # Distillate component flows [mol/s]
-        m.D = Var(
-            m.comps,
-            domain=NonNegativeReals,
-            doc='distillate component flows [mol/s]',
-            bounds=(0, max_flow),
-            initialize=50,
-        )
+    # Bottoms flow [mol/s]
+    m.bot = Var(
+        domain=NonNegativeReals,
+        initialize=50,
+        bounds=(0, 100),
+        doc='bottoms flow [mol/s]',
+    )
 
-        # Bottoms flow [mol/s]
-        m.bot = Var(
-            domain=NonNegativeReals,
-            initialize=50,
-            bounds=(0, 100),
-            doc='bottoms flow [mol/s]',
-        )
+    # Distillate flow [mol/s]
+    m.dis = Var(
+        domain=NonNegativeReals,
+        initialize=50,
+        doc='distillate flow [mol/s]',
+        bounds=(0, 100),
+    )
 
-        # Distillate flow [mol/s]
-        m.dis = Var(
-            domain=NonNegativeReals,
-            initialize=50,
-            doc='distillate flow [mol/s]',
-            bounds=(0, 100),
-        )
+    # Reflux ratio variable
+    m.reflux_ratio = Var(
+        domain=NonNegativeReals, bounds=(0.5, 4), doc='reflux ratio', initialize=1.4
+    )
 
-        # Reflux ratio variable
-        m.reflux_ratio = Var(
-            domain=NonNegativeReals, bounds=(0.5, 4), doc='reflux ratio', initialize=1.4
-        )
+    # Reboil ratio variable
+    m.reboil_ratio = Var(
+        domain=NonNegativeReals,
+        bounds=(1.3, 4),
+        doc='reboil ratio',
+        initialize=0.9527,
+    )
 
-        # Reboil ratio variable
-        m.reboil_ratio = Var(
-            domain=NonNegativeReals,
-            bounds=(1.3, 4),
-            doc='reboil ratio',
-            initialize=0.9527,
-        )
+    # Reflux fractions variable
+    m.reflux_frac = Var(
+        domain=NonNegativeReals, bounds=(0, 1 - 1e-6), doc='reflux fractions'
+    )
 
-        # Reflux fractions variable
-        m.reflux_frac = Var(
-            domain=NonNegativeReals, bounds=(0, 1 - 1e-6), doc='reflux fractions'
-        )
+    # Boilup fraction variable
+    m.boilup_frac = Var(
+        domain=NonNegativeReals, bounds=(0, 1 - 1e-6), doc='boilup fraction'
+    )
 
-        # Boilup fraction variable
-        m.boilup_frac = Var(
-            domain=NonNegativeReals, bounds=(0, 1 - 1e-6), doc='boilup fraction'
-        )
+    # Phase equilibrium constant variable for each component on each tray
+    m.Kc = Var(
+        m.comps,
+        m.trays,
+        doc='Phase equilibrium constant',
+        domain=NonNegativeReals,
+        initialize=1,
+        bounds=(0, 1000),
+    )
 
-        # Phase equilibrium constant variable for each component on each tray
-        m.Kc = Var(
-            m.comps,
-            m.trays,
-            doc='Phase equilibrium constant',
-            domain=NonNegativeReals,
-            initialize=1,
-            bounds=(0, 1000),
-        )
+    # Temperature variable for each tray [K]
+    m.T = Var(
+        m.trays,
+        doc='Temperature [K]',
+        domain=NonNegativeReals,
+        bounds=(min_T, max_T),
+    )
 
-        # Temperature variable for each tray [K]
-        m.T = Var(
-            m.trays,
-            doc='Temperature [K]',
-            domain=NonNegativeReals,
-            bounds=(min_T, max_T),
-        )
+    # Pressure variable [bar]
+    m.P = Var(doc='Pressure [bar]', bounds=(0, 5))
 
-        # Pressure variable [bar]
-        m.P = Var(doc='Pressure [bar]', bounds=(0, 5))
-
-        # Liquid activity coefficient of component on tray variable
-        m.gamma = Var(
-            m.comps,
-            m.trays,
-            doc='liquid activity coefficent of component on tray',
-            domain=NonNegativeReals,
-            bounds=(0, 10),
-            initialize=1,
-        )
+    # Liquid activity coefficient of component on tray variable
+    m.gamma = Var(
+        m.comps,
+        m.trays,
+        doc='liquid activity coefficent of component on tray',
+        domain=NonNegativeReals,
+        bounds=(0, 10),
+        initialize=1,
+    )
 
-        # Pure component vapor pressure of component on tray [bar] variable
-        m.Pvap = Var(
-            m.comps,
-            m.trays,
-            doc='pure component vapor pressure of component on tray [bar]',
-            domain=NonNegativeReals,
-            bounds=(1e-3, 5),
-            initialize=0.4,
-        )
+    # Pure component vapor pressure of component on tray [bar] variable
+    m.Pvap = Var(
+        m.comps,
+        m.trays,
+        doc='pure component vapor pressure of component on tray [bar]',
+        domain=NonNegativeReals,
+        bounds=(1e-3, 5),
+        initialize=0.4,
+    )
 
-        # Variable related to fraction of critical temperature (1 - T/Tc)
-        m.Pvap_X = Var(
-            m.comps,
-            m.trays,
-            doc='Related to fraction of critical temperature (1 - T/Tc)',
-            bounds=(0.25, 0.5),
-            initialize=0.4,
-        )
+    # Variable related to fraction of critical temperature (1 - T/Tc)
+    m.Pvap_X = Var(
+        m.comps,
+        m.trays,
+        doc='Related to fraction of critical temperature (1 - T/Tc)',
+        bounds=(0.25, 0.5),
+        initialize=0.4,
+    )
 
-        # Liquid molar enthalpy of component in tray variable [kJ/mol]
-        m.H_L = Var(
-            m.comps,
-            m.trays,
-            bounds=(0.1, 16),
-            doc='Liquid molar enthalpy of component in tray [kJ/mol]',
-        )
+    # Liquid molar enthalpy of component in tray variable [kJ/mol]
+    m.H_L = Var(
+        m.comps,
+        m.trays,
+        bounds=(0.1, 16),
+        doc='Liquid molar enthalpy of component in tray [kJ/mol]',
+    )
 
-        # Vapor molar enthalpy of component in tray variable [kJ/mol]
-        m.H_V = Var(
-            m.comps,
-            m.trays,
-            bounds=(30, 16 + 40),
-            doc='Vapor molar enthalpy of component in tray [kJ/mol]',
-        )
+    # Vapor molar enthalpy of component in tray variable [kJ/mol]
+    m.H_V = Var(
+        m.comps,
+        m.trays,
+        bounds=(30, 16 + 40),
+        doc='Vapor molar enthalpy of component in tray [kJ/mol]',
+    )
 
-        # Component liquid molar enthalpy in feed variable [kJ/mol]
-        m.H_L_spec_feed = Var(
-            m.comps,
-            doc='Component liquid molar enthalpy in feed [kJ/mol]',
-            initialize=0,
-            bounds=(0.1, 16),
-        )
+    # Component liquid molar enthalpy in feed variable [kJ/mol]
+    m.H_L_spec_feed = Var(
+        m.comps,
+        doc='Component liquid molar enthalpy in feed [kJ/mol]',
+        initialize=0,
+        bounds=(0.1, 16),
+    )
 
-        # Component vapor molar enthalpy in feed variable [kJ/mol]
-        m.H_V_spec_feed = Var(
-            m.comps,
-            doc='Component vapor molar enthalpy in feed [kJ/mol]',
-            initialize=0,
-            bounds=(30, 16 + 40),
-        )
+    # Component vapor molar enthalpy in feed variable [kJ/mol]
+    m.H_V_spec_feed = Var(
+        m.comps,
+        doc='Component vapor molar enthalpy in feed [kJ/mol]',
+        initialize=0,
+        bounds=(30, 16 + 40),
+    )
 
-        # Reboiler duty variable [MJ/s]
-        m.Qb = Var(
-            domain=NonNegativeReals,
-            doc='reboiler duty [MJ/s]',
-            initialize=1,
-            bounds=(0, 8),
-        )
+    # Reboiler duty variable [MJ/s]
+    m.Qb = Var(
+        domain=NonNegativeReals,
+        doc='reboiler duty [MJ/s]',
+        initialize=1,
+        bounds=(0, 8),
+    )
 
-        # Condenser duty variable [MJ/s]
-        m.Qc = Var(
-            domain=NonNegativeReals,
-            doc='condenser duty [MJ/s]',
-            initialize=1,
-            bounds=(0, 8),
-        )
+    # Condenser duty variable [MJ/s]
+    m.Qc = Var(
+        domain=NonNegativeReals,
+        doc='condenser duty [MJ/s]',
+        initialize=1,
+        bounds=(0, 8),
+    )
 
     m.partial_cond = Disjunct()  # Define a partial condenser disjunct
     m.total_cond = Disjunct()  # Define a total condenser disjunct
@@ -1223,8 +859,17 @@ def build_column(
     try:
         fbbt(m)  # Apply feasibility-based bound tightening (FBBT) to the model
 
-        # SOLVE
-        if provide_init == False:
+        if provide_init:
+            # Initialize the model from the snapshot of a previous solution, remapping the trays if its size differs
+            source_max_trays = init.get('max_trays', max_trays)
+            apply_variable_snapshot(
+                m,
+                init,
+                index_map=None
+                if source_max_trays == max_trays
+                else tray_index_map(source_max_trays, max_trays),
+            )
+        else:
             initialize(m)  # Initialize the model if no initialization is provided
 
         # SOLVE
@@ -1274,119 +919,9 @@ def build_column(
         elif m.results.solver.termination_condition == 'infeasible':
             m.dsda_status = 'Evaluated_Infeasible'  # If the solver found the problem to be infeasible, set the status to 'Evaluated_Infeasible'
 
-        # Save results (for initialization)
-        # Initialize empty dictionaries for storing the initialization values of various parameters
-        (
-            T_feed_init,
-            feed_vap_frac_init,
-            feed_init,
-            x_init,
-            y_init,
-            L_init,
-            V_init,
-            liq_init,
-            vap_init,
-            B_init,
-            D_init,
-            bot_init,
-            dis_init,
-            reflux_ratio_init,
-        ) = ({}, {}, {}, {}, {}, {}, {}, {}, {}, {}, {}, {}, {}, {})
-        (
-            reboil_ratio_init,
-            reflux_frac_init,
-            boilup_frac_init,
-            Kc_init,
-            T_init,
-            P_init,
-            gamma_init,
-        ) = ({}, {}, {}, {}, {}, {}, {})
-        (
-            Pvap_init,
-            Pvap_X_init,
-            H_L_init,
-            H_V_init,
-            H_L_spec_feed_init,
-            H_V_spec_feed_init,
-            Qb_init,
-            Qc_init,
-        ) = ({}, {}, {}, {}, {}, {}, {}, {})
-
-        # Save the current value of different parameters in the model to the respective dictionaries
-        T_feed_init = value(m.T_feed)
-        feed_vap_frac_init = value(m.feed_vap_frac)
-        bot_init = value(m.bot)
-        dis_init = value(m.dis)
-        reflux_ratio_init = value(m.reflux_ratio)
-        reboil_ratio_init = value(m.reboil_ratio)
-        reflux_frac_init = value(m.reflux_frac)
-        boilup_frac_init = value(m.boilup_frac)
-        Qb_init = value(m.Qb)
-        Qc_init = value(m.Qc)
-        P_init = value(m.P)
-
-        # Loop over the components in the model, save the current value of feed, B, D, H_L_spec_feed, and H_V_spec_feed to the respective dictionaries
-        for i in m.comps:
-            feed_init[i] = value(m.feed[i])
-            B_init[i] = value(m.B[i])
-            D_init[i] = value(m.D[i])
-            H_L_spec_feed_init[i] = value(m.H_L_spec_feed[i])
-            H_V_spec_feed_init[i] = value(m.H_V_spec_feed[i])
-
-        # Loop over the trays in the model, save the current value of liq, vap, and T to the respective dictionaries
-        for n in m.trays:
-            liq_init[n] = value(m.liq[n])
-            vap_init[n] = value(m.vap[n])
-            T_init[n] = value(m.T[n])
-
-        # Loop over the components and trays in the model
-        # Save the current value of parameters including mole fraction, liquid and vapor flow rates,
-        # equilibrium constant, activity coefficient, vapor pressure, fugacity, and enthalpy of liquid and vapor phases to respective dictionaries
-        for i in m.comps:
-            for n in m.trays:
-                x_init[i, n] = value(m.x[i, n])
-                y_init[i, n] = value(m.y[i, n])
-                L_init[i, n] = value(m.L[i, n])
-                V_init[i, n] = value(m.V[i, n])
-                Kc_init[i, n] = value(m.Kc[i, n])
-                gamma_init[i, n] = value(m.gamma[i, n])
-                Pvap_init[i, n] = value(m.Pvap[i, n])
-                Pvap_X_init[i, n] = value(m.Pvap_X[i, n])
-                H_L_init[i, n] = value(m.H_L[i, n])
-                H_V_init[i, n] = value(m.H_V[i, n])
-
-        # Save all the initialized dictionaries in the model for future initialization
-        m.dsda_initialization = {
-            'T_feed': T_feed_init,
-            'feed_vap_frac': feed_vap_frac_init,
-            'feed': feed_init,
-            'x': x_init,
-            'y': y_init,
-            'L': L_init,
-            'V': V_init,
-            'liq': liq_init,
-            'vap': vap_init,
-            'B': B_init,
-            'D': D_init,
-            'bot': bot_init,
-            'dis': dis_init,
-            'reflux_ratio': reflux_ratio_init,
-            'reboil_ratio': reboil_ratio_init,
-            'reflux_frac': reflux_frac_init,
-            'boilup_frac': boilup_frac_init,
-            'Kc': Kc_init,
-            'T': T_init,
-            'P': P_init,
-            'gamma': gamma_init,
-            'Pvap': Pvap_init,
-            'Pvap_X': Pvap_X_init,
-            'H_L': H_L_init,
-            'H_V': H_V_init,
-            'H_L_spec_feed': H_L_spec_feed_init,
-            'H_V_spec_feed': H_V_spec_feed_init,
-            'Qb': Qb_init,
-            'Qc': Qc_init,
-        }
+        # Save results (for initialization) as a snapshot of all variable values in the model
+        m.dsda_initialization = get_variable_snapshot(m)
+        m.dsda_initialization['max_trays'] = max_trays
 
         # print('timer',time.process_time()-t_start)
 
@@ -1398,6 +933,50 @@ def build_column(
     return m
 
 
+@functools.lru_cache(maxsize=None)
+def tray_index_map(source_max_trays, max_trays):
+    """
+    Builds the index map used to initialize a column of max_trays trays from the snapshot of a column with source_max_trays trays.
+    The reboiler, feed tray and condenser are mapped onto each other, and the trays in between are stretched linearly.
+
+    Args:
+        source_max_trays (int): Number of trays of the column in the snapshot
+        max_trays (int): Number of trays of the column to be initialized
+
+    Returns:
+        index_map (function): Function (variable component, index) -> index in the snapshot, cached for each pair of sizes
+    """
+    source_feed_tray = math.ceil(source_max_trays / 2)
+    feed_tray = math.ceil(max_trays / 2)
+    trays = {}
+    for t in range(1, max_trays + 1):
+        if t <= feed_tray:
+            trays[t] = 1 + round(
+                (t - 1) * (source_feed_tray - 1) / max(feed_tray - 1, 1)
+            )
+        else:
+            trays[t] = source_feed_tray + round(
+                (t - feed_tray)
+                * (source_max_trays - source_feed_tray)
+                / (max_trays - feed_tray)
+            )
+
+    def index_map(component, index):
+        if not component.is_indexed():
+            return index
+        subsets = list(component.index_set().subsets())
+        tray_sets = [s is component.model().trays for s in subsets]
+        if not any(tray_sets):
+            return index
+        if len(subsets) == 1:
+            return trays[index]
+        return tuple(
+            trays[i] if is_tray else i for i, is_tray in zip(index, tray_sets)
+        )
+
+    return index_map
+
+
 # ---------Other functions to define the model-------------------------------------------------
 # Function for creating mass balances and flow rates for each component in a distillation column
 def _build_conditional_tray_mass_balance(m, t, tray, no_tray):
@@ -15,14 +15,19 @@ References:
 - Ghouse, Jaffer H., et al. "A comparative study between GDP and NLP formulations for conceptual design of distillation columns." Computer Aided Chemical Engineering. Vol. 44. Elsevier, 2018. 865-870.
 """
 
+import functools  # Provides caching of the tray maps between column sizes.
 import math  # Provides functions for mathematical operations.
 import os  # Provides functions for interacting with the operating system.
 
+from gdp.dsda.variable_snapshot import apply_variable_snapshot, get_variable_snapshot
+
 # Imports from the Pyomo library for building and solving optimization problems.
+from pyomo.common.collections import ComponentMap
 from pyomo.common.errors import InfeasibleConstraintException
 from pyomo.contrib.fbbt.fbbt import fbbt
 from pyomo.contrib.gdpopt.data_class import MasterProblemResult
 from pyomo.core.base.misc import display
+from pyomo.core.expr.visitor import identify_variables, replace_expressions
 from pyomo.core.plugins.transform.logical_to_linear import (
     update_boolean_vars_from_binary,
 )  # Transforms logical constraints into binary constraints.
@@ -1211,6 +1216,160 @@ def _build_reboiler_energy_balance(m):
         return m.H_V[c, t] == m.vap_enthalpy_expr[t, c]
 
 
+def reduce_pass_through_trays(m):
+    """
+    Eliminates the trays that do not exist from a column subproblem with fixed disjuncts, so that the NLP solver does not carry them.
+    The pass-through equations of each bypassed tray are removed by aliasing its liquid flows, compositions and enthalpies to the
+    nearest existing tray above it, and its vapor flows, compositions and enthalpies to the nearest existing tray below it.
+    The total liquid and vapor flows of the bypassed tray are aliased in the same way and their summation equations are removed.
+
+    Args:
+        m (ConcreteModel): Column model where the tray disjuncts are already fixed (e.g. by gdp.fix_disjuncts in external_ref).
+
+    Returns:
+        aliases (ComponentMap): Map from each eliminated variable to the variable that replaces it in the reduced model.
+            The solution of the full model is recovered by setting each eliminated variable to the value of its alias.
+
+    Note:
+        The bounds of each alias are intersected with the bounds of the variables it replaces.
+        Trays whose disjuncts are not fixed (or were transformed to a MINLP) are left untouched.
+    """
+    removed = [
+        t
+        for t in m.conditional_trays
+        if m.no_tray[t].active
+        and m.no_tray[t].indicator_var.fixed
+        and value(m.no_tray[t].indicator_var) == 1
+    ]
+
+    def nearest_tray(t, step):
+        """Nearest existing tray above (step=1) or below (step=-1) tray t"""
+        while t in removed:
+            t += step
+        return t
+
+    aliases = ComponentMap()
+    for t in removed:
+        t_liq = nearest_tray(t, 1)
+        t_vap = nearest_tray(t, -1)
+        for c in m.comps:
+            aliases[m.x[c, t]] = m.x[c, t_liq]
+            aliases[m.L[c, t]] = m.L[c, t_liq]
+            aliases[m.H_L[c, t]] = m.H_L[c, t_liq]
+            aliases[m.y[c, t]] = m.y[c, t_vap]
+            aliases[m.V[c, t]] = m.V[c, t_vap]
+            aliases[m.H_V[c, t]] = m.H_V[c, t_vap]
+        aliases[m.liq[t]] = m.liq[t_liq]
+        aliases[m.vap[t]] = m.vap[t_vap]
+        for con in m.no_tray[t].component_data_objects(Constraint, active=True):
+            con.deactivate()
+        m.liquid_sum[t].deactivate()
+        m.vapor_sum[t].deactivate()
+
+    for var, alias in aliases.items():
+        if var.lb is not None and (alias.lb is None or value(var.lb) > value(alias.lb)):
+            alias.setlb(value(var.lb))
+        if var.ub is not None and (alias.ub is None or value(var.ub) < value(alias.ub)):
+            alias.setub(value(var.ub))
+
+    substitution_map = {id(var): alias for var, alias in aliases.items()}
+    for con in m.component_data_objects(Constraint, active=True, descend_into=True):
+        if any(id(var) in substitution_map for var in identify_variables(con.body)):
+            body = replace_expressions(
+                con.body, substitution_map, remove_named_expressions=True
+            )
+            if con.equality:
+                con.set_value(body == con.upper)
+            else:
+                con.set_value((con.lower, body, con.upper))
+
+    return aliases
+
+
+def _tray_shift(source_max_trays, max_trays):
+    """Number of trays the feed tray moves up from a column with source_max_trays trays to one with max_trays trays"""
+    return math.ceil(max_trays / 2) - math.ceil(source_max_trays / 2)
+
+
+@functools.lru_cache(maxsize=None)
+def _tray_continuation_map(source_max_trays, max_trays):
+    """
+    Builds the index map from a column with max_trays trays to a column with source_max_trays <= max_trays trays.
+    The reboiler and the condenser are matched and the trays in between are shifted up as much as the feed tray moves.
+    The trays added above the reboiler and below the condenser are bypassed trays: they take their liquid-side values
+    from the nearest source tray above them and their vapor-side values from the nearest source tray below them.
+
+    Args:
+        source_max_trays (int): Number of trays of the column that provides the values.
+        max_trays (int): Number of trays of the column to be initialized.
+
+    Returns:
+        index_map (function): Function (variable component, index) -> index in the source column.
+    """
+    shift = _tray_shift(source_max_trays, max_trays)
+    vapor_vars = ('y', 'V', 'H_V', 'vap')
+
+    def source_tray(name, t):
+        if t == 1:
+            return 1
+        if t == max_trays:
+            return source_max_trays
+        if t <= 1 + shift:
+            return 1 if name in vapor_vars else 2
+        if t >= source_max_trays + shift:
+            return source_max_trays - 1 if name in vapor_vars else source_max_trays
+        return t - shift
+
+    def index_map(component, index):
+        if not component.is_indexed():
+            return index
+        tray_sets = [s is component.model().trays for s in component.index_set().subsets()]
+        if not any(tray_sets):
+            return index
+        name = component.local_name
+        if len(tray_sets) == 1:
+            return source_tray(name, index)
+        return tuple(
+            source_tray(name, i) if is_tray else i for i, is_tray in zip(index, tray_sets)
+        )
+
+    return index_map
+
+
+def transfer_initialization(m, m_source):
+    """
+    Initializes a column model from the values of a (solved or initialized) column with fewer trays, so that a sweep over
+    the number of trays can warm start each size from the previous one instead of solving for a starting point.
+    The trays of the source column are shifted up as much as the feed tray moves (see _tray_continuation_map), and the
+    trays added above the reboiler and below the condenser are initialized as bypassed trays. A feasible source point
+    therefore stays feasible for the design with the reflux and boilup positions shifted by the same amount.
+
+    Args:
+        m (ConcreteModel): Column model from build_column to be initialized.
+        m_source (ConcreteModel): Column model from build_column with at most as many trays as m.
+
+    Returns:
+        m (ConcreteModel): Initialized column model.
+    """
+    shift = _tray_shift(m_source.max_trays, m.max_trays)
+    apply_variable_snapshot(
+        m,
+        get_variable_snapshot(m_source),
+        index_map=_tray_continuation_map(m_source.max_trays, m.max_trays),
+    )
+
+    # The tray disjuncts are named after their tray, so their values are shifted here
+    for t in m.conditional_trays:
+        if t - shift in m_source.conditional_trays and t < m_source.condens_tray + shift:
+            m.tray[t].indicator_var.set_value(m_source.tray[t - shift].indicator_var.value)
+            m.no_tray[t].indicator_var.set_value(m_source.no_tray[t - shift].indicator_var.value)
+        else:
+            m.tray[t].indicator_var.set_value(0)
+            m.no_tray[t].indicator_var.set_value(1)
+
+    return m
+
+
 if __name__ == "__main__":
     # Inputs
     NT = 17  # Total number of trays
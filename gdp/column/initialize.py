@@ -1,138 +1,202 @@
 """Initialization routine for distillation column"""
 from __future__ import division
 
-from math import fabs, floor
+import os
+import tempfile
+import zipfile
+from math import fabs
 
-import pandas
+import numpy as np
 from pyomo.environ import exp, value
 
+# Tray profiles parsed from the initialization workbooks, keyed by absolute path
+_profile_cache = {}
 
-def initialize(m):
-    m.reflux_frac.set_value(value(m.reflux_ratio / (1 + m.reflux_ratio)))
-    m.boilup_frac.set_value(value(m.reboil_ratio / (1 + m.reboil_ratio)))
+_default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'init.xlsx')
 
-    _excel_sheets = pandas.read_excel('init.xlsx', sheet_name=None, engine='openpyxl')
 
-    def set_value_if_not_fixed(var, val):
-        """Set variable to the value if it is not fixed."""
-        if not var.fixed:
-            var.set_value(val)
+def load_initialization_data(path=None, sidecar=True):
+    """
+    Loads the temperature, flow and composition profiles of the initialization workbook as NumPy arrays.
+    The workbook is parsed only once per process. If sidecar is True, the arrays are also stored in a .npz file next to the
+    workbook, which is read instead of the workbook as long as it is newer. The sidecar is replaced atomically, so processes
+    sharing it never read a partial file, and a sidecar that cannot be read is ignored.
 
-    active_trays = [
-        t
-        for t in m.trays
-        if t not in m.conditional_trays
-        or fabs(value(m.tray[t].indicator_var - 1)) <= 1e-3
-    ]
-    num_active_trays = len(active_trays)
+    Args:
+        path (str): Path to the initialization workbook. By default, the init.xlsx file next to this module.
+        sidecar (bool): Whether to read and write the binary .npz copy of the workbook.
+
+    Returns:
+        data (dict): 'T' array with the temperature of each data tray (from the bottom up), 'comps' list with the components
+            and, for each component, an array with columns L, V, x and y for each data tray.
+    """
+    path = os.path.abspath(_default_path if path is None else path)
+    if path in _profile_cache:
+        return _profile_cache[path]
+
+    sidecar_path = os.path.splitext(path)[0] + '.npz'
+    data = None
+    if (
+        sidecar
+        and os.path.exists(sidecar_path)
+        and os.path.getmtime(sidecar_path) >= os.path.getmtime(path)
+    ):
+        try:
+            with np.load(sidecar_path) as npz:
+                data = {key: npz[key] for key in npz.files}
+            data['comps'] = [str(c) for c in data['comps']]
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            data = None  # unreadable sidecar, e.g. from an interrupted write: parse the workbook again
+    if data is None:
+        import pandas
+
+        sheets = pandas.read_excel(path, sheet_name=None, engine='openpyxl')
+        trays = sheets['trays'].sort_values(by=['tray'])
+        comps_and_trays = sheets['comps_and_trays'].sort_values(by=['comp', 'tray'])
+        data = {'T': trays['T [K]'].to_numpy(dtype=float)}
+        data['comps'] = list(comps_and_trays['comp'].unique())
+        for c, df in comps_and_trays.groupby('comp'):
+            data[c] = df[['L', 'V', 'x', 'y']].to_numpy(dtype=float)
+        if sidecar:
+            # Write to a temporary file and move it in place, so concurrent readers never see a partial sidecar
+            try:
+                fd, tmp_path = tempfile.mkstemp(suffix='.npz', dir=os.path.dirname(sidecar_path))
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        np.savez(f, **data)
+                    os.replace(tmp_path, sidecar_path)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+            except OSError:
+                pass
 
-    feed_tray = m.feed_tray
+    _profile_cache[path] = data
+    return data
 
-    tray_indexed_data = _excel_sheets['trays']
-    tray_indexed_data.sort_values(by=['tray'], inplace=True)
-    tray_indexed_data.set_index('tray', inplace=True)
 
-    comp_and_tray_indexed_data = _excel_sheets['comps_and_trays']
-    comp_and_tray_indexed_data.sort_values(by=['comp', 'tray'], inplace=True)
-    comp_and_tray_indexed_data.set_index(['comp', 'tray'], inplace=True)
-    comp_slices = {c: comp_and_tray_indexed_data.loc[c, :] for c in m.comps}
+def interpolate_tray_data(values, num_active_trays):
+    """
+    Resamples the data of the workbook trays (rows, from the bottom up) to a given number of active trays.
+    If there are fewer active trays, each one takes a linear combination of the two closest data trays.
+    Otherwise, the data trays are spread along the active trays and the missing trays are linearly interpolated.
 
-    num_data_trays = tray_indexed_data.index.size
+    Args:
+        values (numpy.ndarray): Array with one row per data tray.
+        num_active_trays (int): Number of active trays in the model.
+
+    Returns:
+        values (numpy.ndarray): Array with one row per active tray.
+    """
+    num_data_trays = values.shape[0]
     if num_active_trays < num_data_trays:
-        # Number of model trays is less than number of trays in data. Need to
-        # do averaging
-        new_indices = [1] + [
-            1 + (num_data_trays - 1) / (num_active_trays - 1) * i
-            for i in range(1, num_active_trays)
-        ]
-        for tray in range(2, num_active_trays):
-            indx = new_indices[tray - 1]
-            lower = floor(indx)
-            frac_above = indx - lower
-            # Take linear combination of values
-            tray_indexed_data.loc[tray] = (
-                tray_indexed_data.loc[lower] * (1 - frac_above)
-                + tray_indexed_data.loc[lower + 1] * frac_above
-            )
-            for c in m.comps:
-                comp_slices[c].loc[tray] = (
-                    comp_slices[c].loc[lower] * (1 - frac_above)
-                    + comp_slices[c].loc[lower + 1] * frac_above
-                )
-        tray_indexed_data.loc[num_active_trays] = tray_indexed_data.loc[num_data_trays]
-        tray_indexed_data = tray_indexed_data.head(num_active_trays)
-        for c in m.comps:
-            comp_slices[c].loc[num_active_trays] = comp_slices[c].loc[num_data_trays]
-            comp_slices[c] = comp_slices[c].head(num_active_trays)
-    else:
-        # Stretch the data out and do interpolation
-        tray_indexed_data.index = pandas.Index(
-            [1]
-            + [
-                int(round(num_active_trays / num_data_trays * i))
-                for i in range(2, num_data_trays + 1)
-            ],
-            name='tray',
+        # Average the data of adjacent trays
+        indx = 1 + (num_data_trays - 1) / (num_active_trays - 1) * np.arange(
+            1, num_active_trays - 1
         )
-        tray_indexed_data = tray_indexed_data.reindex(
-            [i for i in range(1, num_active_trays + 1)]
-        ).interpolate()
-        for c in m.comps:
-            comp_slices[c].index = pandas.Index(
-                [1]
-                + [
-                    int(round(num_active_trays / num_data_trays * i))
-                    for i in range(2, num_data_trays + 1)
-                ],
-                name='tray',
-            )
+        lower = np.floor(indx).astype(int)
+        frac_above = (indx - lower).reshape((-1,) + (1,) * (values.ndim - 1))
+        interior = values[lower - 1] * (1 - frac_above) + values[lower] * frac_above
+        return np.concatenate([values[:1], interior, values[-1:]])
+
+    # Stretch the data out and interpolate
+    positions = [1] + [
+        int(round(num_active_trays / num_data_trays * i))
+        for i in range(2, num_data_trays + 1)
+    ]
+    stretched = np.full((num_active_trays,) + values.shape[1:], np.nan)
+    stretched[np.array(positions) - 1] = values
+    return stretched
+
+
+def _interpolate_missing(column):
+    """Linearly interpolates the missing values of a column of stretched tray data."""
+    valid = ~np.isnan(column)
+    trays = np.arange(column.size)
+    return np.interp(trays, trays[valid], column[valid])
+
+
+def get_tray_profiles(m, path=None):
+    """
+    Computes the temperature, flow and composition profiles that initialize the trays of a column model with fixed tray existence.
+    The profiles of the initialization workbook are resampled to the active trays and the bypassed trays take the values
+    of the nearest active tray (above for liquid and temperature, below for vapor).
+
+    Args:
+        m (pyomo.ConcreteModel): Column model.
+        path (str): Path to the initialization workbook (see load_initialization_data).
+
+    Returns:
+        profiles (dict): 'T' indexed by tray, and 'L', 'V', 'x' and 'y' indexed by (component, tray).
+    """
+    data = load_initialization_data(path)
+
+    # active_trays are the condenser, reboiler, feed, and those conditional trays whose indicator_var is 1
+    active_trays = np.array(
+        sorted(
+            t
+            for t in m.trays
+            if t not in m.conditional_trays
+            or fabs(value(m.tray[t].indicator_var - 1)) <= 1e-3
+        )
+    )
+    num_active_trays = len(active_trays)
+    trays = np.array(sorted(m.trays))
+
+    T = interpolate_tray_data(data['T'], num_active_trays)
+    if np.isnan(T).any():
+        T = _interpolate_missing(T)
+    comp_data = {}
+    for c in m.comps:
+        values = interpolate_tray_data(data[c], num_active_trays)
+        if np.isnan(values).any():
             # special handling necessary for V near top of column and L
             # near column bottom. Do not want to interpolate with one end
             # being potentially 0. (ie. V from total condenser). Instead,
-            # use back fill and forward fill.
-            comp_slices[c] = comp_slices[c].reindex(
-                [i for i in range(1, num_active_trays + 1)]
+            # take the closest valid value.
+            V, L = values[:, 1], values[:, 0]
+            if np.isnan(V[-2]):
+                V[-2] = V[:-1][~np.isnan(V[:-1])][-1]
+            if np.isnan(L[1]):
+                L[1] = L[1:][~np.isnan(L[1:])][0]
+            values = np.column_stack(
+                [_interpolate_missing(values[:, j]) for j in range(values.shape[1])]
             )
-            tray_below_condenser = sorted(active_trays, reverse=True)[1]
-            if pandas.isna(comp_slices[c]['V'][tray_below_condenser]):
-                # V of the tray below the condenser is N/A. Find a valid
-                # value lower down to use.
-                val = next(
-                    comp_slices[c]['V'][t]
-                    for t in reversed(list(m.trays))
-                    if pandas.notna(comp_slices[c]['V'][t]) and not t == m.condens_tray
-                )
-                comp_slices[c]['V'][tray_below_condenser] = val
-            if pandas.isna(comp_slices[c]['L'][m.reboil_tray + 1]):
-                # L of the tray above the reboiler is N/A. Find a valid
-                # value higher up to use.
-                val = next(
-                    comp_slices[c]['L'][t]
-                    for t in m.trays
-                    if pandas.notna(comp_slices[c]['L'][t]) and not t == m.reboil_tray
-                )
-                comp_slices[c]['L'][m.reboil_tray + 1] = val
-            comp_slices[c] = comp_slices[c].interpolate()
+        comp_data[c] = values
 
-    tray_indexed_data.index = pandas.Index(sorted(active_trays), name='tray')
-    tray_indexed_data = tray_indexed_data.reindex(sorted(m.trays), method='bfill')
+    # Bypassed trays take the values of the next active tray above (back fill) or below (forward fill)
+    above = np.searchsorted(active_trays, trays, side='left')
+    below = np.searchsorted(active_trays, trays, side='right') - 1
+    profiles = {'T': dict(zip(trays.tolist(), T[above].tolist()))}
+    for j, name in enumerate(['L', 'V', 'x', 'y']):
+        fill = above if name in ('L', 'x') else below
+        profiles[name] = {
+            (c, t): val
+            for c in m.comps
+            for t, val in zip(trays.tolist(), comp_data[c][fill, j].tolist())
+        }
+    return profiles
 
-    for t in m.trays:
-        set_value_if_not_fixed(m.T[t], tray_indexed_data['T [K]'][t])
 
-    for c in m.comps:
-        comp_slices[c].index = pandas.Index(sorted(active_trays), name='tray')
-        comp_slices[c] = comp_slices[c].reindex(sorted(m.trays))
-        comp_slices[c][['L', 'x']] = comp_slices[c][['L', 'x']].bfill()
-        comp_slices[c][['V', 'y']] = comp_slices[c][['V', 'y']].ffill()
+def initialize(m):
+    m.reflux_frac.set_value(value(m.reflux_ratio / (1 + m.reflux_ratio)))
+    m.boilup_frac.set_value(value(m.reboil_ratio / (1 + m.reboil_ratio)))
 
-    comp_and_tray_indexed_data = pandas.concat(comp_slices)
+    def set_value_if_not_fixed(var, val):
+        """Set variable to the value if it is not fixed."""
+        if not var.fixed:
+            var.set_value(val)
+
+    profiles = get_tray_profiles(m)
+
+    for t in m.trays:
+        set_value_if_not_fixed(m.T[t], profiles['T'][t])
 
     for c, t in m.comps * m.trays:
-        set_value_if_not_fixed(m.L[c, t], comp_and_tray_indexed_data['L'][c, t])
-        set_value_if_not_fixed(m.V[c, t], comp_and_tray_indexed_data['V'][c, t])
-        set_value_if_not_fixed(m.x[c, t], comp_and_tray_indexed_data['x'][c, t])
-        set_value_if_not_fixed(m.y[c, t], comp_and_tray_indexed_data['y'][c, t])
+        set_value_if_not_fixed(m.L[c, t], profiles['L'][c, t])
+        set_value_if_not_fixed(m.V[c, t], profiles['V'][c, t])
+        set_value_if_not_fixed(m.x[c, t], profiles['x'][c, t])
+        set_value_if_not_fixed(m.y[c, t], profiles['y'][c, t])
 
     for c in m.comps:
         m.H_L_spec_feed[c].set_value(value(m.feed_liq_enthalpy_expr[c]))
@@ -1,8 +1,7 @@
 import os
 
-import matplotlib.pyplot as plt
-import networkx as nx
 import pyomo.environ as pe
+from gdp.dsda.variable_snapshot import apply_variable_snapshot, get_variable_snapshot
 from pyomo.core.base.misc import display
 from pyomo.gdp import Disjunct, Disjunction
 from pyomo.opt.base.solvers import SolverFactory
@@ -317,3 +316,39 @@ def build_cstrs(NT: int = 5) -> pe.ConcreteModel():
     m.obj = pe.Objective(rule=obj_rule, sense=pe.minimize)
 
     return m
+
+
+def transfer_initialization(m: pe.ConcreteModel(), m_source: pe.ConcreteModel()) -> pe.ConcreteModel():
+    """
+    Function that initializes a CSTR superstructure from the values of a (solved or initialized) superstructure with fewer units,
+    so that a sweep over NT can warm start each size from the previous one instead of solving for a starting point.
+    Units are aligned by their index in m.N. The units added at the top of the superstructure (where the feed enters) are
+    initialized as bypasses that carry the fresh feed, which keeps a feasible source point feasible.
+
+    Args:
+        m: Pyomo GDP model from build_cstrs(NT) that is to be initialized
+        m_source: Pyomo GDP model from build_cstrs(NT_source), with NT_source <= NT
+    Returns:
+        m: Initialized Pyomo model
+    """
+    NT_source = len(m_source.N)
+    apply_variable_snapshot(m, get_variable_snapshot(m_source))
+
+    for n in m.N:
+        if n <= NT_source:
+            continue
+        # Bypass carrying the fresh feed, with the common reactor volume
+        m.Q[n].set_value(pe.value(m.QF0))
+        m.QFR[n].set_value(0)
+        m.V[n].set_value(m.V[1].value)
+        m.c[n].set_value(0)
+        for i in m.I:
+            m.F[i, n].set_value(pe.value(m.F0[i]))
+            m.FR[i, n].set_value(0)
+            m.rate[i, n].set_value(0)
+        m.YP_is_cstr[n].indicator_var.set_value(0)
+        m.YP_is_bypass[n].indicator_var.set_value(1)
+        m.YR_is_recycle[n].indicator_var.set_value(0)
+        m.YR_is_not_recycle[n].indicator_var.set_value(1)
+
+    return m
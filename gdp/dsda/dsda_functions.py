@@ -1,24 +1,37 @@
 import copy
 import csv
+import functools
 import itertools as it
+import multiprocessing
 import os
+import random
+import shutil
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from math import isnan
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pyomo.environ as pe
-from gdp.dsda.model_serializer import StoreSpec, from_json, to_json
+from gdp.dsda.model_serializer import (SnapshotWriter, StoreSpec, from_json,
+                                       to_json)
+from pyomo.common.collections import ComponentMap, ComponentSet
 from pyomo.common.errors import InfeasibleConstraintException
-from pyomo.contrib.fbbt.fbbt import fbbt
-from pyomo.contrib.gdpopt.data_class import MasterProblemResult
-from pyomo.core.base.misc import display
+from pyomo.contrib.fbbt.fbbt import compute_bounds_on_expr, fbbt
+from pyomo.core.expr.calculus.derivatives import Modes, differentiate
+from pyomo.core.expr.visitor import identify_variables
 from pyomo.core.plugins.transform.logical_to_linear import \
     update_boolean_vars_from_binary
-from pyomo.gdp import Disjunct, Disjunction
+from pyomo.gdp import Disjunct, Disjunction, GDP_Error
 from pyomo.opt import SolutionStatus, SolverResults
 from pyomo.opt import TerminationCondition as tc
 from pyomo.opt.base.solvers import SolverFactory
+from pyomo.repn import generate_standard_repn
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
+from pyomo.util.calc_var_value import calculate_variable_from_constraint
 
 
 def get_external_information(
@@ -351,28 +364,921 @@ def extvars_gdp_to_mip(
     return m, mip_dict_extvar
 
 
-def preprocess_problem(m, simple: bool = True):
+def get_superstructure_bounds(
+    m: pe.ConcreteModel(),
+    obbt: bool = False,
+    obbt_solver: str = 'baron',
+    obbt_solver_options: dict = {},
+    obbt_vars: list = None,
+    transformation: str = 'hull',
+    timelimit: float = 10,
+    tee: bool = False,
+) -> dict:
+    """
+    Function that tightens the variable bounds of the GDP superstructure once so that they can be reused in every fixed subproblem.
+    FBBT only goes through the global constraints of the superstructure (disjunct constraints are not visited), therefore
+    the resulting bounds are valid for every combination of the external variables.
+    Args:
+        m: GDP superstructure model, as returned by the model function (before fixing any external variable)
+        obbt: Run optimization-based bound tightening on the continuous relaxation of the GDP after FBBT
+        obbt_solver: Solver used for OBBT. The bounds are only valid if the solver reports a valid objective bound (e.g. a global solver)
+        obbt_solver_options: Solver options for OBBT
+        obbt_vars: List with names of the variables to be tightened through OBBT. If None, all the unfixed continuous variables are used
+        transformation: GDP to MINLP transformation used to build the relaxation for OBBT
+        timelimit: time limit in seconds for each OBBT solve
+        tee: Display OBBT output
+    Returns:
+        bounds: Bound snapshot (model_serializer dictionary with the lower and upper bounds of every variable). The incidence graph
+            of the superstructure (see get_incidence_graph) is stored in its metadata
+    """
+    fbbt(m)
+
+    if obbt:
+        m_relax = m.clone()
+        pe.TransformationFactory('core.logical_to_linear').apply_to(m_relax)
+        pe.TransformationFactory('gdp.' + transformation).apply_to(m_relax)
+        pe.TransformationFactory('core.relax_integer_vars').apply_to(m_relax)
+        for o in m_relax.component_data_objects(pe.Objective, active=True):
+            o.deactivate()
+
+        if obbt_vars is None:
+            obbt_vars = [v.name for v in m.component_data_objects(
+                pe.Var, descend_into=True) if not v.fixed and v.is_continuous()]
+
+        obbt_options = get_solver_options(obbt_solver_options, timelimit=timelimit)
+        opt = SolverFactory('gams', solver=obbt_solver)
+        for name in obbt_vars:
+            v = m.find_component(name)
+            v_relax = m_relax.find_component(name)
+            for sense in (pe.minimize, pe.maximize):
+                m_relax.obbt_obj = pe.Objective(expr=v_relax, sense=sense)
+                results = opt.solve(m_relax, tee=tee, **obbt_options,
+                                    skip_trivial_constraints=True)
+                m_relax.del_component(m_relax.obbt_obj)
+                if results.solver.termination_condition == 'infeasible':
+                    raise InfeasibleConstraintException(
+                        'The relaxation of the superstructure is infeasible')
+                if sense == pe.minimize:
+                    new_lb = results.problem.lower_bound
+                    if new_lb is not None and not isnan(new_lb) and abs(new_lb) != float('inf') \
+                            and (v.lb is None or new_lb > v.lb):
+                        v.setlb(new_lb)
+                        v_relax.setlb(new_lb)
+                else:
+                    new_ub = results.problem.upper_bound
+                    if new_ub is not None and not isnan(new_ub) and abs(new_ub) != float('inf') \
+                            and (v.ub is None or new_ub < v.ub):
+                        v.setub(new_ub)
+                        v_relax.setub(new_ub)
+        # Propagate the OBBT bounds through the superstructure
+        fbbt(m)
+
+    metadata = {'incidence': get_incidence_graph(m)}
+    return to_json(m, wts=StoreSpec.bound(), metadata=metadata, return_dict=True)
+
+
+def get_incidence_graph(m: pe.ConcreteModel(), n_checks: int = 10) -> dict:
     """
-    Function that applies certain tranformations to the mdoel to first verify that it is not trivially 
+    Function that computes the variable-constraint incidence graph of the GDP superstructure, including the constraints inside the disjuncts.
+    Variables and constraints are stored by position: the subproblems built by the same model function (and then reformulated by
+    external_ref) keep the superstructure variables and constraints in the same order, and the components added by the reformulation
+    are appended after them.
+    Args:
+        m: GDP superstructure model, as returned by the model function
+        n_checks: Number of constraint and variable names stored to check that a subproblem has the same structure as the superstructure
+    Returns:
+        incidence: Dictionary with the number of variables ('n_vars'), the variable positions of each constraint ('con_vars'), the
+            name of the disjunct that contains each constraint ('con_groups', None for global constraints), the positions of the
+            constraints visited by the superstructure FBBT ('fbbt_positions'), the positions of the fixed variables ('fixed_positions')
+            and a sample of positions and names of constraints ('checks') and variables ('var_checks')
+    """
+    variables = list(m.component_data_objects(
+        pe.Var, descend_into=(pe.Block, Disjunct)))
+    var_pos = {}
+    for j, v in enumerate(variables):
+        var_pos.setdefault(id(v), j)
+    cons = list(m.component_data_objects(
+        pe.Constraint, descend_into=(pe.Block, Disjunct)))
+    fbbt_ids = set(id(c) for c in m.component_data_objects(
+        pe.Constraint, active=True, descend_into=True))
+
+    def _group(c):
+        b = c.parent_block()
+        while b is not None and not isinstance(b.parent_component(), Disjunct):
+            b = b.parent_block()
+        return None if b is None else b.name
+
+    def _checks(components):
+        positions = sorted(set(np.linspace(
+            0, len(components) - 1, n_checks, dtype=int))) if components else []
+        return [[int(i), components[i].name] for i in positions]
+
+    return {
+        'n_vars': len(variables),
+        'con_vars': [[var_pos[id(v)] for v in identify_variables(c.body)] for c in cons],
+        'con_groups': [_group(c) for c in cons],
+        'fbbt_positions': [i for i, c in enumerate(cons) if id(c) in fbbt_ids],
+        'fixed_positions': [j for j, v in enumerate(variables) if v.fixed],
+        'checks': _checks(cons),
+        'var_checks': _checks(variables),
+    }
+
+
+_fbbt_caches = {}
+_max_fbbt_cache = 4
+
+
+def _get_fbbt_cache(superstructure_bounds: dict) -> dict:
+    """
+    Function that returns the incidence of the superstructure in the form used by propagate_superstructure_bounds, together with
+    the bound tightenings found for each group of disjunct constraints. It is built once for each bound snapshot.
+    """
+    key = id(superstructure_bounds)
+    cache = _fbbt_caches.get(key)
+    if cache is not None and cache['bounds'] is superstructure_bounds:
+        return cache
+
+    incidence = superstructure_bounds['__metadata__']['other']['incidence']
+    var_cons = [[] for _ in range(incidence['n_vars'])]
+    for i, c_vars in enumerate(incidence['con_vars']):
+        for j in set(c_vars):
+            var_cons[j].append(i)
+    cache = {
+        'bounds': superstructure_bounds,  # keeps the id of the snapshot in use
+        'var_cons': var_cons,
+        'fbbt': set(incidence['fbbt_positions']),
+        'fixed': set(incidence['fixed_positions']),
+        'static_key': None,
+        'tightenings': {},
+    }
+    while len(_fbbt_caches) >= _max_fbbt_cache:
+        _fbbt_caches.pop(next(iter(_fbbt_caches)))
+    _fbbt_caches[key] = cache
+    return cache
+
+
+def _propagate_positions(seeds, cons, con_vars, neighbors, variables, lbs, ubs,
+                         n_cons: int, improvement_tol: float = 1e-4, max_iter: int = 10):
+    """
+    Function that performs FBBT starting only from a list of constraint positions. FBBT is repeated on the constraints of the variables
+    whose bounds improve, in the same way as pyomo.contrib.fbbt does for a complete block.
+    Args:
+        seeds: Positions of the constraints from which the bound propagation starts
+        cons: List with the constraints of the model
+        con_vars: Function that returns the variable positions of a constraint position
+        neighbors: Function that returns the positions of the active constraints of a variable position
+        variables: List with the variables of the model
+        lbs, ubs: Lists with the bounds of the variables before the propagation (-inf and inf if unbounded), updated in place
+        n_cons: Number of active constraints, FBBT is performed at most max_iter times this number
+        improvement_tol: Minimum bound improvement for a variable to propagate FBBT to its constraints
+        max_iter: FBBT is performed at most max_iter times the number of constraints
+    Returns:
+        n_fbbt: Number of constraints on which FBBT was performed
+        visited: Set with the positions of the variables of the constraints on which FBBT was performed
+    Raises:
+        InfeasibleConstraintException: If FBBT detects an infeasible constraint
+    """
+    queue = deque(seeds)
+    queued = set(queue)
+    visited = set()
+    n_fbbt = 0
+    while queue:
+        if n_fbbt >= max_iter * max(n_cons, len(seeds)):
+            break
+        i = queue.popleft()
+        queued.discard(i)
+        fbbt(cons[i])
+        n_fbbt += 1
+        for j in con_vars(i):
+            visited.add(j)
+            v = variables[j]
+            improved = False
+            if v.lb is not None and pe.value(v.lb) > lbs[j] + improvement_tol:
+                lbs[j] = pe.value(v.lb)
+                improved = True
+            if v.ub is not None and pe.value(v.ub) < ubs[j] - improvement_tol:
+                ubs[j] = pe.value(v.ub)
+                improved = True
+            if improved:
+                for k in neighbors(j):
+                    if k != i and k not in queued:
+                        queue.append(k)
+                        queued.add(k)
+    return n_fbbt, visited
+
+
+def propagate_superstructure_bounds(
+    m: pe.ConcreteModel(),
+    superstructure_bounds: dict,
+    improvement_tol: float = 1e-4,
+    max_iter: int = 10,
+):
+    """
+    Function that tightens the bounds of a fixed subproblem, once the superstructure bounds are loaded, using only the changes with respect
+    to the subproblems already propagated with the same bound snapshot. The constraints of each active disjunct (or of its big-M
+    reformulation) form a group whose tightenings are propagated once on their own, together with the global constraints, and cached.
+    The bounds of a subproblem start from the intersection of the cached tightenings of its active groups, and FBBT only starts from
+        - the group constraints with a variable whose bounds are tighter than the ones the group reached on its own,
+        - the global constraints with a variable tighter than in the superstructure or with a variable fixed by the external variables,
+        - the constraints without a group (e.g. the hull reformulation and the logic constraints).
+    The incidence graph stored with the superstructure bounds is used, so the constraint expressions are only walked for the constraints
+    without a superstructure counterpart.
+    Args:
+        m: Fixed subproblem model, with the superstructure bounds loaded
+        superstructure_bounds: Bound snapshot from get_superstructure_bounds
+        improvement_tol: Minimum bound improvement for a variable to propagate FBBT to its constraints
+        max_iter: FBBT is performed at most max_iter times the number of active constraints
+    Returns:
+        n_fbbt: Number of constraints on which FBBT was performed, None if the subproblem does not have the structure of the
+            superstructure (its bounds are not changed)
+    Raises:
+        InfeasibleConstraintException: If FBBT detects an infeasible constraint
+    """
+    incidence = superstructure_bounds['__metadata__']['other'].get('incidence')
+    if incidence is None or 'n_vars' not in incidence:
+        return None
+    cons = list(m.component_data_objects(
+        pe.Constraint, descend_into=(pe.Block, Disjunct)))
+    variables = list(m.component_data_objects(
+        pe.Var, descend_into=(pe.Block, Disjunct)))
+    n_super, n_vars = len(incidence['con_vars']), incidence['n_vars']
+    if len(cons) < n_super or len(variables) < n_vars or any(
+            cons[i].name != name for i, name in incidence['checks']) or any(
+            variables[j].name != name for j, name in incidence['var_checks']):
+        return None
+
+    cache = _get_fbbt_cache(superstructure_bounds)
+    con_vars, con_groups, var_cons = incidence['con_vars'], incidence['con_groups'], cache['var_cons']
+    con_pos = {id(c): i for i, c in enumerate(cons)}
+    var_pos = {}
+    for j, v in enumerate(variables):
+        var_pos.setdefault(id(v), j)
+    active = [False] * len(cons)
+    for c in m.component_data_objects(pe.Constraint, active=True, descend_into=True):
+        active[con_pos[id(c)]] = True
+
+    inf = float('inf')
+    lbs, ubs = [], []
+    for v in variables:
+        if v.fixed and v.value is not None:
+            v.setlb(v.value)
+            v.setub(v.value)
+        lbs.append(-inf if v.lb is None else pe.value(v.lb))
+        ubs.append(inf if v.ub is None else pe.value(v.ub))
+
+    # Global constraints are static if they have no variable fixed by the external variables
+    newly_fixed = [j for j in range(n_vars) if variables[j].fixed and j not in cache['fixed']]
+    dynamic = set(i for j in newly_fixed for i in var_cons[j] if i in cache['fbbt'])
+    static = [False] * len(cons)
+    for i in cache['fbbt']:
+        static[i] = active[i] and i not in dynamic
+    static_key = (tuple(newly_fixed), tuple(i for i in sorted(cache['fbbt']) if not active[i]))
+    if cache['static_key'] != static_key:
+        cache['static_key'] = static_key
+        cache['tightenings'] = {}
+
+    # Group the active constraints and find the variables of the appended ones
+    bigm = pe.TransformationFactory('gdp.bigm')
+    groups = {}
+    ungrouped = []
+    extra_vars = {}
+    extra_cons = {}
+    for i in range(len(cons)):
+        if not active[i] or static[i] or i in dynamic:
+            continue
+        group = None
+        if i < n_super:
+            group = None if con_groups[i] is None else (con_groups[i],)
+        else:
+            c = cons[i]
+            try:  # Big-M constraints have the variables of their source constraint and the indicator variable
+                src = bigm.get_src_constraint(c)
+                disjunct = bigm.get_src_disjunct(c.parent_block())
+                big_m = bigm.get_M_value(src)
+                src_pos = con_pos.get(id(src), n_super)
+            except (GDP_Error, AttributeError, KeyError):  # not a big-M constraint, e.g. hull or logic constraints
+                src_pos = n_super
+            if src_pos < n_super:
+                indicator = getattr(disjunct, 'binary_indicator_var', disjunct.indicator_var)
+                extra_vars[i] = con_vars[src_pos] + [var_pos[id(indicator)]]
+                group = (disjunct.name, big_m)
+            else:
+                extra_vars[i] = []
+                for v in identify_variables(c.body):
+                    if id(v) not in var_pos:
+                        var_pos[id(v)] = len(variables)
+                        variables.append(v)
+                        lbs.append(-inf if v.lb is None else pe.value(v.lb))
+                        ubs.append(inf if v.ub is None else pe.value(v.ub))
+                    extra_vars[i].append(var_pos[id(v)])
+            for j in set(extra_vars[i]):
+                extra_cons.setdefault(j, []).append(i)
+        if group is None:
+            ungrouped.append(i)
+        else:
+            groups.setdefault(group, []).append(i)
+
+    def _con_vars(i):
+        return con_vars[i] if i < n_super else extra_vars[i]
+
+    def _neighbors(flags):
+        def neighbors(j):
+            return [i for i in (var_cons[j] if j < n_vars else []) + extra_cons.get(j, []) if flags[i]]
+        return neighbors
+
+    # The tightenings of a group are only valid for the same values of the fixed variables in its constraints
+    group_keys = {}
+    for group, positions in groups.items():
+        fixed = sorted(set(j for i in positions for j in _con_vars(i) if variables[j].fixed))
+        group_keys[group] = group + tuple((j, variables[j].value) for j in fixed)
+
+    tightenings = cache['tightenings']
+    for group, positions in groups.items():
+        key = group_keys[group]
+        if key in tightenings:
+            continue
+        flags = list(static)
+        for i in positions:
+            flags[i] = True
+        iso_lbs, iso_ubs = list(lbs), list(ubs)
+        _, visited = _propagate_positions(positions, cons, _con_vars, _neighbors(flags), variables, iso_lbs, iso_ubs,
+                                          n_cons=sum(flags), improvement_tol=improvement_tol, max_iter=max_iter)
+        tightening = {}
+        for j in visited:
+            v = variables[j]
+            lb = -inf if v.lb is None else pe.value(v.lb)
+            ub = inf if v.ub is None else pe.value(v.ub)
+            if lb != lbs[j] or ub != ubs[j]:
+                tightening[j] = (lb, ub)
+                v.setlb(None if lbs[j] == -inf else lbs[j])
+                v.setub(None if ubs[j] == inf else ubs[j])
+        tightenings[key] = tightening
+
+    # Start from the intersection of the group tightenings
+    tight = {}
+    for group in groups:
+        for j, (lb, ub) in tightenings[group_keys[group]].items():
+            old_lb, old_ub = tight.get(j, (-inf, inf))
+            tight[j] = (max(lb, old_lb), min(ub, old_ub))
+    for j, (lb, ub) in tight.items():
+        if lb > ub + 1e-8:
+            raise InfeasibleConstraintException(
+                'The disjunct constraints give crossing bounds for %s' % variables[j].name)
+        v = variables[j]
+        if lb > lbs[j]:
+            v.setlb(lb)
+        if ub < ubs[j]:
+            v.setub(ub)
+
+    def _tighter(j, lb, ub):
+        return tight[j][0] > lb + improvement_tol or tight[j][1] < ub - improvement_tol
+
+    seeds = set(ungrouped)
+    seeds.update(i for i in dynamic if active[i])
+    for group, positions in groups.items():
+        tightening = tightenings[group_keys[group]]
+        seeds.update(i for i in positions if any(
+            j in tight and _tighter(j, *tightening.get(j, (lbs[j], ubs[j]))) for j in _con_vars(i)))
+    for j in tight:
+        if _tighter(j, lbs[j], ubs[j]):
+            seeds.update(i for i in var_cons[j] if static[i])
+    for j, (lb, ub) in tight.items():
+        lbs[j] = max(lb, lbs[j])
+        ubs[j] = min(ub, ubs[j])
+
+    n_fbbt, _ = _propagate_positions(sorted(seeds), cons, _con_vars, _neighbors(active), variables, lbs, ubs,
+                                     n_cons=sum(active), improvement_tol=improvement_tol, max_iter=max_iter)
+    return n_fbbt
+
+
+def preprocess_problem(m, simple: bool = True, superstructure_bounds: dict = None):
+    """
+    Function that applies certain tranformations to the mdoel to first verify that it is not trivially
     infeasible (via FBBT) and second, remove extra constraints to help NLP solvers
     Args:
         m: MI(N)LP model that is going to be preprocessed
-        simple: Boolean variable to carry on a simple preprocessing (only FBBT) or a more complete one, prone to fail
+        simple: Boolean variable to carry on a simple preprocessing (only FBBT) or a more complete one (FBBT and presolve_problem)
+        superstructure_bounds: Bound snapshot from get_superstructure_bounds. If given, the snapshot is loaded and FBBT is only
+            propagated from the changes with respect to the subproblems already preprocessed (see propagate_superstructure_bounds)
     Returns:
-
+        presolve_record: Changes made by presolve_problem (None if simple), to be undone with restore_presolve
     """
+    if superstructure_bounds is None:
+        fbbt(m)
+    else:
+        from_json(m, sd=superstructure_bounds, wts=StoreSpec.bound())
+        if propagate_superstructure_bounds(m, superstructure_bounds) is None:
+            fbbt(m)  # Another structure, propagate from every constraint
+
     if not simple:
-        pe.TransformationFactory('contrib.detect_fixed_vars').apply_to(m)
-        pe.TransformationFactory('contrib.propagate_fixed_vars').apply_to(m)
-        pe.TransformationFactory('contrib.remove_zero_terms').apply_to(m)
-        pe.TransformationFactory('contrib.propagate_zero_sum').apply_to(m)
-        pe.TransformationFactory(
-            'contrib.constraints_to_var_bounds').apply_to(m)
-        pe.TransformationFactory('contrib.detect_fixed_vars').apply_to(m)
-        pe.TransformationFactory('contrib.propagate_zero_sum').apply_to(m)
-        pe.TransformationFactory('contrib.deactivate_trivial_constraints').apply_to(
-            m, tmp=False, ignore_infeasible=True)
-    fbbt(m)
+        return presolve_problem(m)
+
+
+def presolve_problem(m: pe.ConcreteModel(), tol: float = 1e-8) -> dict:
+    """
+    Function that reduces a fixed subproblem before sending it to the solver. Until no more changes are possible, it
+        - fixes the continuous variables whose lower and upper bounds are equal,
+        - fixes the continuous variable of linear equality constraints with a single unfixed variable,
+        - turns linear inequality constraints with a single unfixed continuous variable into variable bounds,
+        - deactivates the constraints without unfixed variables after checking that they are satisfied.
+    Every change is recorded so that restore_presolve can recover the original model once the reduced one is solved. If the
+    subproblem is found infeasible, the changes made up to that point are undone before raising the exception.
+    Args:
+        m: Fixed subproblem model
+        tol: Feasibility tolerance for the checks of fixed values and trivial constraints
+    Returns:
+        record: Dictionary with the fixed variables ('fixed'), the original bounds of the variables whose bounds were changed
+            ('bounds'), the deactivated constraints ('deactivated') and the number of unfixed variables and active constraints
+            before and after presolve ('n_vars', 'n_cons')
+    Raises:
+        InfeasibleConstraintException: If a constraint is found to be infeasible
+    """
+    record = {'fixed': [], 'bounds': ComponentMap(), 'deactivated': []}
+
+    var_to_con = ComponentMap()
+    cons = list(m.component_data_objects(
+        pe.Constraint, active=True, descend_into=True))
+    for c in cons:
+        for v in identify_variables(c.body, include_fixed=False):
+            var_to_con.setdefault(v, []).append(c)
+    n_vars = len(var_to_con)
+
+    def _fix(v, val):
+        lb, ub = pe.value(v.lb), pe.value(v.ub)
+        if (lb is not None and val < lb - tol) or (ub is not None and val > ub + tol):
+            raise InfeasibleConstraintException(
+                'Presolve fixed %s at %s, outside its bounds' % (v.name, val))
+        if lb is not None:
+            val = max(val, lb)
+        if ub is not None:
+            val = min(val, ub)
+        v.fix(val)
+        record['fixed'].append(v)
+        queue.extend(var_to_con[v])
+
+    def _set_bounds(v, lb, ub):
+        if v not in record['bounds']:
+            record['bounds'][v] = (v.lb, v.ub)
+        if lb is not None and (v.lb is None or lb > pe.value(v.lb)):
+            v.setlb(lb)
+        if ub is not None and (v.ub is None or ub < pe.value(v.ub)):
+            v.setub(ub)
+        if v.lb is not None and v.ub is not None:
+            if pe.value(v.lb) > pe.value(v.ub) + tol:
+                raise InfeasibleConstraintException(
+                    'Presolve found crossing bounds for %s' % v.name)
+            if pe.value(v.ub) - pe.value(v.lb) <= tol:
+                _fix(v, pe.value(v.lb))
+
+    queue = deque(cons)
+    try:
+        for v in var_to_con:
+            if v.is_continuous() and v.lb is not None and v.ub is not None \
+                    and pe.value(v.ub) - pe.value(v.lb) <= tol:
+                _fix(v, pe.value(v.lb))
+
+        while queue:
+            c = queue.popleft()
+            if not c.active:
+                continue
+            repn = generate_standard_repn(c.body, quadratic=False)
+            lower = None if c.lower is None else pe.value(c.lower) - repn.constant
+            upper = None if c.upper is None else pe.value(c.upper) - repn.constant
+            if repn.nonlinear_expr is not None:
+                continue
+            terms = [(v, coef) for v, coef in zip(
+                repn.linear_vars, repn.linear_coefs) if coef != 0]
+            if not terms:
+                if (lower is not None and lower > tol) or (upper is not None and upper < -tol):
+                    raise InfeasibleConstraintException(
+                        'Presolve found the trivial constraint %s infeasible' % c.name)
+            elif len(terms) == 1 and terms[0][0].is_continuous():
+                v, coef = terms[0]
+                if c.equality:
+                    _fix(v, upper / coef)
+                else:
+                    bounds = [None if b is None else b / coef for b in (lower, upper)]
+                    if coef < 0:
+                        bounds.reverse()
+                    _set_bounds(v, *bounds)
+            else:
+                continue
+            c.deactivate()
+            record['deactivated'].append(c)
+    except InfeasibleConstraintException:
+        restore_presolve(record)  # leave the model as it was
+        raise
+
+    record['n_vars'] = (n_vars, n_vars - len(record['fixed']))
+    record['n_cons'] = (len(cons), len(cons) - len(record['deactivated']))
+    return record
+
+
+def restore_presolve(record: dict):
+    """
+    Function that undoes the changes of presolve_problem, keeping the current variable values
+    Args:
+        record: Dictionary returned by presolve_problem
+    """
+    for v in record['fixed']:
+        v.unfix()
+    for v, (lb, ub) in record['bounds'].items():
+        v.setlb(lb)
+        v.setub(ub)
+    for c in record['deactivated']:
+        c.activate()
+
+
+def get_structural_singularities(m: pe.ConcreteModel()) -> dict:
+    """
+    Function that computes the Dulmage-Mendelsohn decomposition of the incidence graph between the active equality constraints and
+    the unfixed variables of a fixed subproblem. A nonempty overdetermined block means that there are more equations than variables
+    in a subsystem, so the subproblem is structurally singular and the NLP solver can not converge to a regular point.
+    The underdetermined block contains the degrees of freedom of the optimization problem.
+    Args:
+        m: Fixed subproblem model, after the trivial constraints have been deactivated
+    Returns:
+        blocks: Dictionary with the names of the constraints and variables in the 'overdetermined' and 'underdetermined' blocks.
+            The overdetermined block also records if it is 'consistent' (True, False or None if unknown)
+    """
+    import networkx as nx  # Only needed for the structural analysis
+
+    cons = [c for c in m.component_data_objects(
+        pe.Constraint, active=True, descend_into=True) if c.equality]
+    var_index = ComponentMap()
+    graph = nx.Graph()
+    graph.add_nodes_from(range(len(cons)), bipartite=0)
+    for i, c in enumerate(cons):
+        for v in identify_variables(c.body, include_fixed=False):
+            if v not in var_index:
+                var_index[v] = len(cons) + len(var_index)
+                graph.add_node(var_index[v], bipartite=1)
+            graph.add_edge(i, var_index[v])
+    variables = list(var_index.keys())
+    matching = nx.bipartite.hopcroft_karp_matching(
+        graph, top_nodes=range(len(cons)))
+
+    def _alternating_reach(start, from_cons):
+        # Constraints are left through any edge and variables only through their matched constraint (or the reverse)
+        reached = set(start)
+        stack = list(start)
+        while stack:
+            node = stack.pop()
+            if (node < len(cons)) == from_cons:
+                neighbors = graph.neighbors(node)
+            else:
+                neighbors = [matching[node]] if node in matching else []
+            for n in neighbors:
+                if n not in reached:
+                    reached.add(n)
+                    stack.append(n)
+        return reached
+
+    blocks = {}
+    for block, start, from_cons in [
+            ('overdetermined', [i for i in range(len(cons)) if i not in matching], True),
+            ('underdetermined', [j for j in range(len(cons), len(cons) + len(variables)) if j not in matching], False)]:
+        reached = sorted(_alternating_reach(start, from_cons))
+        blocks[block] = {
+            'constraints': [cons[n].name for n in reached if n < len(cons)],
+            'variables': [variables[n - len(cons)].name for n in reached if n >= len(cons)],
+        }
+        if block == 'overdetermined':
+            blocks[block]['consistent'] = _check_linear_consistency(
+                [cons[n] for n in reached if n < len(cons)],
+                [variables[n - len(cons)] for n in reached if n >= len(cons)])
+    return blocks
+
+
+def _check_linear_consistency(cons: list, variables: list, tol: float = 1e-8):
+    """
+    Function that checks if an overdetermined system of equality constraints has a solution (redundant equations) or not.
+    Args:
+        cons: List of equality constraints of the overdetermined block
+        variables: List of the unfixed variables of the overdetermined block
+        tol: Tolerance for the rank computation
+    Returns:
+        consistent: True or False if the block is linear, None if it has nonlinear constraints and the consistency is unknown
+    """
+    if not cons:
+        return True
+    var_index = ComponentMap((v, j) for j, v in enumerate(variables))
+    A = np.zeros((len(cons), len(variables)))
+    b = np.zeros(len(cons))
+    for i, c in enumerate(cons):
+        repn = generate_standard_repn(c.body, quadratic=False)
+        if not repn.is_linear():
+            return None
+        for v, coef in zip(repn.linear_vars, repn.linear_coefs):
+            A[i, var_index[v]] += coef
+        b[i] = pe.value(c.upper) - repn.constant
+    return bool(np.linalg.matrix_rank(A, tol) == np.linalg.matrix_rank(np.column_stack([A, b]), tol))
+
+
+def initialize_block_triangular(
+    m: pe.ConcreteModel(),
+    independent_vars: list = [],
+    max_block_size: int = 50,
+    tol: float = 1e-8,
+    max_iter: int = 50,
+) -> dict:
+    """
+    Function that initializes the dependent variables of a model from the equations that define them.
+    The active equality constraints are matched to the unfixed variables, the matched system is ordered in block-triangular form
+    (strongly connected components of the dependency graph, in topological order) and each block is solved in sequence:
+    single equations with calculate_variable_from_constraint and larger blocks with a damped Newton method.
+    Unmatched variables (degrees of freedom) and independent_vars keep their current values, and unmatched constraints are not enforced.
+    Args:
+        m: Pyomo model, usually a subproblem with fixed disjuncts
+        independent_vars: Variables that are kept at their current value
+        max_block_size: Blocks with more equations than this are skipped
+        tol: Tolerance on the residual of the equations of a block
+        max_iter: Maximum number of Newton iterations per block
+    Returns:
+        summary: Dictionary with the number of 'blocks', the number of 'solved' blocks, the names of the constraints
+            in 'failed' blocks and the names of the 'degrees_of_freedom'
+    """
+    import networkx as nx  # Only needed for the structural analysis
+
+    independent = ComponentMap((v, True) for v in independent_vars)
+    cons = [c for c in m.component_data_objects(
+        pe.Constraint, active=True, descend_into=True) if c.equality]
+    var_index = ComponentMap()
+    con_vars = []
+    graph = nx.Graph()
+    graph.add_nodes_from(range(len(cons)), bipartite=0)
+    for i, c in enumerate(cons):
+        con_vars.append([])
+        for v in identify_variables(c.body, include_fixed=False):
+            if v in independent:
+                continue
+            if v not in var_index:
+                var_index[v] = len(cons) + len(var_index)
+                graph.add_node(var_index[v], bipartite=1)
+            graph.add_edge(i, var_index[v])
+            con_vars[i].append(var_index[v])
+    variables = list(var_index.keys())
+    matching = nx.bipartite.hopcroft_karp_matching(
+        graph, top_nodes=range(len(cons)))
+
+    # Variables without a value get a starting point inside their bounds
+    for v in variables + list(independent.keys()):
+        if v.value is None:
+            if v.has_lb() and v.has_ub():
+                v.set_value((pe.value(v.lb) + pe.value(v.ub))/2, valid=True)
+            elif v.has_lb() or v.has_ub():
+                v.set_value(pe.value(v.lb if v.has_lb() else v.ub), valid=True)
+            else:
+                v.set_value(0, valid=True)
+
+    # Equation i depends on equation j if it contains the variable computed by j
+    dependencies = nx.DiGraph()
+    matched = [i for i in range(len(cons)) if i in matching]
+    dependencies.add_nodes_from(matched)
+    for i in matched:
+        for j in con_vars[i]:
+            if j in matching and matching[j] != i:
+                dependencies.add_edge(matching[j], i)
+    condensation = nx.condensation(dependencies)
+
+    summary = {'blocks': 0, 'solved': 0, 'failed': [], 'degrees_of_freedom': [
+        variables[j - len(cons)].name for j in range(len(cons), len(cons) + len(variables)) if j not in matching]}
+    for block in nx.topological_sort(condensation):
+        members = sorted(condensation.nodes[block]['members'])
+        block_cons = [cons[i] for i in members]
+        block_vars = [variables[matching[i] - len(cons)] for i in members]
+        summary['blocks'] += 1
+        if len(block_cons) > max_block_size:
+            summary['failed'].extend(c.name for c in block_cons)
+            continue
+        if len(block_cons) == 1:
+            start = block_vars[0].value
+            try:
+                calculate_variable_from_constraint(
+                    block_vars[0], block_cons[0], eps=tol)
+                solved = True
+            except (ValueError, RuntimeError, ArithmeticError):
+                block_vars[0].set_value(start, valid=True)
+                solved = False
+        else:
+            solved = _solve_block_newton(block_cons, block_vars, tol, max_iter)
+        if solved:
+            summary['solved'] += 1
+        else:
+            summary['failed'].extend(c.name for c in block_cons)
+    return summary
+
+
+def _solve_block_newton(cons: list, variables: list, tol: float = 1e-8, max_iter: int = 50) -> bool:
+    """
+    Function that solves a square block of equality constraints with a damped Newton method.
+    The bounds of the variables are not enforced, since they often stop the iterations far from the solution of the block.
+    If the block is not solved the variables are restored to their starting values.
+    Args:
+        cons: List of equality constraints of the block
+        variables: List of the variables of the block, one per constraint
+        tol: Tolerance on the residual of the equations
+        max_iter: Maximum number of Newton iterations
+    Returns:
+        solved: True if the residual of every equation is below tol
+    """
+    def residual(x):
+        for v, val in zip(variables, x):
+            v.set_value(val, valid=True)
+        try:
+            r = np.array([pe.value(c.body) - pe.value(c.upper) for c in cons], dtype=float)
+        except (ValueError, ArithmeticError):
+            return None
+        return r if np.all(np.isfinite(r)) else None
+
+    x0 = np.array([v.value for v in variables], dtype=float)
+    x = x0
+    r = residual(x)
+    if r is None:
+        residual(x0)
+        return False
+    for _ in range(max_iter):
+        if np.max(np.abs(r)) <= tol:
+            break
+        try:
+            J = np.array([differentiate(c.body, wrt_list=variables, mode=Modes.reverse_numeric)
+                          for c in cons], dtype=float)
+        except (ValueError, ArithmeticError):
+            break
+        step = np.linalg.lstsq(J, -r, rcond=None)[0]
+        alpha = 1
+        while alpha > 1e-6:
+            r_new = residual(x + alpha*step)
+            if r_new is not None and np.linalg.norm(r_new) < np.linalg.norm(r):
+                break
+            alpha /= 2
+        else:
+            break
+        x, r = x + alpha*step, r_new
+    solved = bool(np.max(np.abs(r)) <= tol)
+    residual(x if solved else x0)
+    return solved
+
+
+class _FrozenOptions(tuple):
+    """
+    Sorted (option, value) pairs of a frozen dictionary of solver options (see solver_profile)
+    """
+    __slots__ = ()
+
+
+def _freeze_option(value):
+    if isinstance(value, _FrozenOptions):
+        return value
+    if isinstance(value, dict):
+        return _FrozenOptions(sorted((k, _freeze_option(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_option(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _thaw_option(value):
+    if isinstance(value, _FrozenOptions):
+        return {k: _thaw_option(v) for k, v in value}
+    if isinstance(value, tuple):
+        return [_thaw_option(v) for v in value]
+    return value
+
+
+def solver_profile(options: dict = None, **changes) -> _FrozenOptions:
+    """
+    Function that returns an immutable and hashable solver profile, which can be used instead of a dictionary of solver options.
+    Profiles compose: the options of the base are updated with the changes, except 'add_options' that are appended to the base ones
+    Args:
+        options: Base dictionary of solver options or solver profile
+        changes: Options to change or add
+    Returns:
+        profile: Solver profile
+    """
+    profile = dict(_freeze_option(options or {}))
+    for key, value in changes.items():
+        value = _freeze_option(value)
+        if key == 'add_options':
+            value = profile.get(key, ()) + value
+        profile[key] = value
+    return _FrozenOptions(sorted(profile.items()))
+
+
+# Number of threads of the GAMS solvers in this process, None keeps the solver defaults (see set_solver_threads)
+_solver_threads = None
+
+
+def set_solver_threads(threads: int = None):
+    """
+    Function that caps the number of threads of every GAMS solve statement in this process (GAMS option threads)
+    Args:
+        threads: Number of threads, None to keep the solver defaults
+    """
+    global _solver_threads
+    _solver_threads = threads
+
+
+@functools.lru_cache(maxsize=256)
+def _render_solver_profile(profile: _FrozenOptions, timelimit: float = None, rel_tol: float = None,
+                           threads: int = None) -> _FrozenOptions:
+    """
+    Function that adds the GAMS time limit, relative optimality tolerance and threads of a solve statement to a solver profile
+    """
+    add_options = []
+    if timelimit is not None:
+        add_options.append('option reslim=%s;' % timelimit)
+    if rel_tol is not None:
+        add_options.append('option optcr=%s;' % rel_tol)
+    if threads is not None:
+        add_options.append('option threads=%s;' % threads)
+    return solver_profile(profile, add_options=add_options)
+
+
+def get_solver_options(options: dict = None, timelimit: float = None, rel_tol: float = None) -> dict:
+    """
+    Function that returns the options of a solve statement without changing the given options. The rendered options of each
+    solver profile, time limit and tolerance are cached
+    Args:
+        options: Dictionary of solver options or solver profile
+        timelimit: time limit in seconds for the solve statement, added as GAMS option reslim
+        rel_tol: Relative optimality tolerance, added as GAMS option optcr
+    Returns:
+        options: New dictionary with the options, with the GAMS option threads if capped with set_solver_threads
+    """
+    if not isinstance(options, _FrozenOptions):
+        options = solver_profile(options)
+    return _thaw_option(_render_solver_profile(options, timelimit, rel_tol, _solver_threads))
+
+
+def get_solver_session(subproblem_solver: str = 'knitro', interface: str = 'gams') -> dict:
+    """
+    Function that returns a solver session for the repeated solves of subproblems with the same structure, e.g. the neighbors of D-SDA
+    or the points of an enumeration. The session keeps one model for each structure (model function and arguments), transformed once
+    with the MIP transformation. The subproblem of every point is this model with only the fixings of the external variables and
+    disjuncts, the active disjunct constraints, the variable bounds and the initial values changed (see _session_neighbor), and it is
+    solved by the solver instance of the session. With a Pyomo persistent interface (e.g. 'gurobi_persistent') the model is loaded
+    into the solver once, and afterwards only the variables and the activated or deactivated constraints are updated. With 'gams' the
+    solver instance is reused, but GAMS still runs in a new process for every solve
+    Args:
+        subproblem_solver: MINLP or NLP solver algorithm. The session only solves the subproblems of this solver, the others (e.g.
+            screening solves with another solver) get their own solver instance
+        interface: Pyomo solver interface, 'gams' or a persistent interface
+    Returns:
+        session: Dictionary with the solver instance ('solver'), whether it is 'persistent', the models of each structure ('models'),
+            the model loaded in the solver ('loaded') and the number of models built ('builds'), loaded into the solver ('loads') and
+            updated in the solver ('updates')
+    """
+    if interface == 'gams':
+        opt = SolverFactory(interface, solver=subproblem_solver)
+    else:
+        opt = SolverFactory(interface)
+    return {'subproblem_solver': subproblem_solver, 'solver': opt, 'persistent': isinstance(opt, PersistentSolver),
+            'models': {}, 'loaded': None, 'active': None, 'builds': 0, 'loads': 0, 'updates': 0}
+
+
+def _solve_in_session(session: dict, m: pe.ConcreteModel(), tee: bool, output_options: dict, solver_options: dict) -> SolverResults:
+    """
+    Function that solves a subproblem with the solver instance of a session (see get_solver_session)
+    Args:
+        session: Solver session
+        m: Subproblem model
+        tee: Display iteration output
+        output_options: Options to keep the solver files
+        solver_options: Options of the solve statement, for persistent interfaces only 'options' is used
+    Returns:
+        results: Solver results
+    """
+    opt = session['solver']
+    if not session['persistent']:
+        return opt.solve(m, tee=tee, **output_options, **solver_options, skip_trivial_constraints=True)
+
+    active = ComponentSet(m.component_data_objects(pe.Constraint, active=True, descend_into=True))
+    if session['loaded'] is m:
+        try:
+            for c in session['active']:
+                if c not in active:
+                    opt.remove_constraint(c)
+            for c in active:
+                if c not in session['active']:
+                    opt.add_constraint(c)
+            for v in m.component_data_objects(pe.Var, active=True, descend_into=True):
+                opt.update_var(v)
+            session['updates'] += 1
+        except Exception:  # e.g. a constraint with a variable that is not loaded, load the model again
+            session['loaded'] = None
+    if session['loaded'] is not m:
+        opt.set_instance(m, symbolic_solver_labels=output_options.get('symbolic_solver_labels', False))
+        session['loaded'] = m
+        session['loads'] += 1
+    session['active'] = active
+
+    start = time.perf_counter()
+    results = opt.solve(tee=tee, options=solver_options.get('options', {}), load_solutions=True)
+    if not isinstance(results.solver.user_time, (int, float)):
+        results.solver.user_time = time.perf_counter() - start
+    return results
 
 
 def solve_subproblem(
@@ -383,6 +1289,13 @@ def solve_subproblem(
     gams_output: bool = False,
     tee: bool = False,
     rel_tol: float = 1e-3,
+    superstructure_bounds: dict = None,
+    structural_check: bool = False,
+    reduce_function=None,
+    presolve: bool = True,
+    cutoff: float = None,
+    bound_function=None,
+    solver_session: dict = None,
 ) -> pe.ConcreteModel():
     """
     Function that checks feasibility and subproblem model.
@@ -390,54 +1303,209 @@ def solve_subproblem(
     Args:
         m: Fixed subproblem model that is to be solved
         subproblem_solver: MINLP or NLP solver algorithm
+        subproblem_solver_options: MINLP or NLP solver algorithm options, dictionary or solver_profile. They are not changed
         timelimit: time limit in seconds for the solve statement
         gams_output: Determine keeping or not GAMS files
         tee: Display iteration output
         rel_tol: Relative optimality tolerance
+        superstructure_bounds: Bound snapshot from get_superstructure_bounds to be used in the FBBT feasibility check
+        structural_check: Check that the subproblem does not have an inconsistent overdetermined block before calling the solver.
+            The overdetermined and underdetermined blocks are stored in m.dsda_structure
+        reduce_function: Function that eliminates variables from the fixed subproblem before solving it, e.g. reduce_pass_through_trays
+            for the column. It returns a ComponentMap from each eliminated variable to its alias, used to recover the full solution
+        presolve: Fix variables and remove trivial constraints with presolve_problem before solving. The changes are undone
+            after the solve and their summary is stored in m.dsda_presolve (None if presolve found the subproblem infeasible)
+        cutoff: Objective value the subproblem has to beat. If the lower bound of the objective after preprocessing (see
+            get_objective_bound) is at or above it, the subproblem is not solved and gets the 'Pruned' status. The bound is stored in m.dsda_bound
+        bound_function: Function that returns a lower bound of the objective of the preprocessed subproblem (see get_objective_bound)
+        solver_session: Solver session from get_solver_session whose solver instance is used instead of a new one
     Returns:
         m: Solved subproblem model
     """
+    aliases = _prepare_subproblem(m, superstructure_bounds=superstructure_bounds, structural_check=structural_check,
+                                  reduce_function=reduce_function, presolve=presolve, cutoff=cutoff,
+                                  bound_function=bound_function)
+    if aliases is None:
+        return m
+
+    solver_options = get_solver_options(
+        subproblem_solver_options, timelimit=timelimit, rel_tol=rel_tol)
+
+    # Solve
+    m.results = _solve_prepared(m, subproblem_solver=subproblem_solver, solver_options=solver_options,
+                                gams_output=gams_output, tee=tee, solver_session=solver_session)
+    _finish_subproblem(m, aliases, presolve=presolve)
+    return m
+
+
+def _prepare_subproblem(
+    m: pe.ConcreteModel(),
+    superstructure_bounds: dict = None,
+    structural_check: bool = False,
+    reduce_function=None,
+    presolve: bool = True,
+    cutoff: float = None,
+    bound_function=None,
+):
+    """
+    Function that applies the feasibility checks and reductions of solve_subproblem before the solve statement
+    Args:
+        m: Fixed subproblem model that is to be solved
+        superstructure_bounds: Bound snapshot from get_superstructure_bounds to be used in the FBBT feasibility check
+        structural_check: Check that the subproblem does not have an inconsistent overdetermined block
+        reduce_function: Function that eliminates variables from the fixed subproblem
+        presolve: Fix variables and remove trivial constraints with presolve_problem
+        cutoff: Objective value the subproblem has to beat, the subproblem is pruned if its lower bound is at or above it
+        bound_function: Function that returns a lower bound of the objective of the preprocessed subproblem, e.g. from a relaxation
+    Returns:
+        aliases: ComponentMap from each eliminated variable to its alias, None if the subproblem is infeasible or pruned (see m.dsda_status)
+    """
     # Initialize D-SDA status
     m.dsda_status = 'Initialized'
     m.dsda_usertime = 0
 
     try:
         # Feasibility and preprocessing checks
-        preprocess_problem(m, simple=True)
+        m.dsda_presolve = preprocess_problem(m, simple=not presolve,
+                                             superstructure_bounds=superstructure_bounds)
 
     except InfeasibleConstraintException:
+        m.dsda_presolve = None  # presolve_problem undid its changes
         m.dsda_status = 'FBBT_Infeasible'
-        return m
+        return None
+
+    if cutoff is not None:
+        m.dsda_bound = get_objective_bound(m, bound_function=bound_function)
+        if m.dsda_bound is not None and m.dsda_bound >= cutoff:
+            if presolve:
+                restore_presolve(m.dsda_presolve)
+            m.dsda_status = 'Pruned'
+            return None
+
+    aliases = ComponentMap()
+    if reduce_function is not None:
+        aliases = reduce_function(m)
+
+    if structural_check:
+        m.dsda_structure = get_structural_singularities(m)
+        if m.dsda_structure['overdetermined']['consistent'] is False:
+            for var, alias in aliases.items():
+                var.set_value(alias.value)
+            if presolve:
+                restore_presolve(m.dsda_presolve)
+            m.dsda_status = 'Structurally_Infeasible'
+            return None
+
+    return aliases
+
+
+def get_objective_bound(m: pe.ConcreteModel(), bound_function=None) -> float:
+    """
+    Function that returns a lower bound of the (minimized) objective of a fixed subproblem: the interval bound of the objective over the
+    current variable bounds (e.g. after FBBT in preprocess_problem), tightened with the bound from bound_function if given
+    Args:
+        m: Fixed subproblem model
+        bound_function: Function that returns a lower bound of the objective of m (or None), e.g. get_relaxation_bound
+    Returns:
+        bound: Lower bound of the objective, None if it is unbounded
+    """
+    obj = next(m.component_data_objects(pe.Objective, active=True, descend_into=True))
+    lb, ub = compute_bounds_on_expr(obj.expr)
+    bound = lb if obj.sense == pe.minimize else (None if ub is None else -ub)
+    if bound_function is not None:
+        relaxed = bound_function(m)
+        if relaxed is not None and (bound is None or relaxed > bound):
+            bound = relaxed
+    return bound
+
 
+def get_relaxation_bound(
+    m: pe.ConcreteModel(),
+    solver: str = 'baron',
+    timelimit: float = 1,
+    rel_tol: float = 0.1,
+    solver_options: dict = {},
+) -> float:
+    """
+    Function that returns a lower bound of the (minimized) objective of a fixed subproblem from a short solve with a global solver through
+    GAMS. The dual bound of a global solver comes from the convex relaxations (McCormick and outer approximation) of its branch and bound
+    tree, so it is valid even if the solve stops at a loose gap or at the time limit. It is meant as the bound_function of
+    get_objective_bound, e.g. bound_function=functools.partial(get_relaxation_bound, timelimit=2). The variable values of m are not changed
+    Args:
+        m: Fixed subproblem model
+        solver: Global solver that reports a valid dual bound (OBJEST in GAMS), e.g. baron, antigone or scip
+        timelimit: time limit in seconds for the bounding solve
+        rel_tol: Relative optimality tolerance of the bounding solve, a loose one stops it once the bound is close enough
+        solver_options: Other solver options, dictionary or solver_profile
+    Returns:
+        bound: Lower bound of the objective, infinity if the solver proves the subproblem infeasible and None if no bound is available
+    """
+    opt = SolverFactory('gams', solver=solver)
+    results = opt.solve(m, load_solutions=False, skip_trivial_constraints=True,
+                        **get_solver_options(solver_options, timelimit=timelimit, rel_tol=rel_tol))
+    if results.solver.termination_condition == tc.infeasible:
+        return float('inf')
+    obj = next(m.component_data_objects(pe.Objective, active=True, descend_into=True))
+    bound = results.problem.lower_bound if obj.sense == pe.minimize else results.problem.upper_bound
+    if not isinstance(bound, (int, float)) or isnan(bound) or abs(bound) >= 1e10:  # GAMS reports no bound as NA or +-1e10
+        return None
+    return bound if obj.sense == pe.minimize else -bound
+
+
+def _solve_prepared(
+    m: pe.ConcreteModel(),
+    subproblem_solver: str = 'knitro',
+    solver_options: dict = {},
+    gams_output: bool = False,
+    tee: bool = False,
+    solver_session: dict = None,
+) -> SolverResults:
+    """
+    Function that calls the solver on a subproblem prepared by _prepare_subproblem
+    Args:
+        m: Subproblem model
+        subproblem_solver: MINLP or NLP solver algorithm
+        solver_options: Options of the solve statement (see get_solver_options)
+        gams_output: Determine keeping or not GAMS files
+        tee: Display iteration output
+        solver_session: Solver session from get_solver_session, used if it is a session of subproblem_solver
+    Returns:
+        results: Solver results
+    """
     output_options = {}
 
     # Output report
     if gams_output:
-        dir_path = os.path.dirname(os.path.abspath(__file__))
-        gams_path = os.path.join(dir_path, "gamsfiles/")
-        if not(os.path.exists(gams_path)):
-            print('Directory for automatically generated files ' +
-                  gams_path + ' does not exist. We will create it')
-            os.makedirs(gams_path)
+        gams_path = get_scratch_dir('gamsfiles')
         output_options = {'keepfiles': True,
                           'tmpdir': gams_path,
                           'symbolic_solver_labels': True}
 
-    subproblem_solver_options['add_options'] = subproblem_solver_options.get(
-        'add_options', [])
-    subproblem_solver_options['add_options'].append(
-        'option reslim=%s;' % timelimit)
-    subproblem_solver_options['add_options'].append(
-        'option optcr=%s;' % rel_tol)
+    if solver_session is not None and solver_session['subproblem_solver'] == subproblem_solver:
+        return _solve_in_session(solver_session, m, tee, output_options, solver_options)
 
-    # Solve
     solvername = 'gams'
     opt = SolverFactory(solvername, solver=subproblem_solver)
-    m.results = opt.solve(m, tee=tee,
-                          **output_options,
-                          **subproblem_solver_options,
-                          skip_trivial_constraints=True,
-                          )
+    return opt.solve(m, tee=tee,
+                     **output_options,
+                     **solver_options,
+                     skip_trivial_constraints=True,
+                     )
+
+
+def _finish_subproblem(m: pe.ConcreteModel(), aliases: ComponentMap, presolve: bool = False):
+    """
+    Function that recovers the full solution of a subproblem solved after _prepare_subproblem and assigns its D-SDA status from m.results
+    Args:
+        m: Solved subproblem model
+        aliases: ComponentMap returned by _prepare_subproblem
+        presolve: Whether the subproblem was presolved
+    """
+    # Recover the eliminated variables for warm starting
+    for var, alias in aliases.items():
+        var.set_value(alias.value)
+    if presolve:
+        restore_presolve(m.dsda_presolve)
 
     m.dsda_usertime = m.results.solver.user_time
 
@@ -449,7 +1517,111 @@ def solve_subproblem(
     # if m.results.solver.termination_condition == 'locallyOptimal' or m.results.solver.termination_condition == 'optimal' or m.results.solver.termination_condition == 'globallyOptimal':
     #     m.dsda_status = 'Optimal'
 
-    return m
+
+def solve_subproblem_batch(
+    models: list,
+    subproblem_solver: str = 'knitro',
+    subproblem_solver_options: dict = {},
+    timelimit: float = 10,
+    gams_output: bool = False,
+    tee: bool = False,
+    rel_tol: float = 1e-3,
+    superstructure_bounds: dict = None,
+    structural_check: bool = False,
+    reduce_function=None,
+    presolve: bool = True,
+    cutoff: float = None,
+    bound_function=None,
+) -> list:
+    """
+    Function that solves several independent fixed subproblems with one solve statement. The subproblems that pass the checks of
+    solve_subproblem are added as blocks of a batch model whose objective is the sum of their objectives, so the solver is called once.
+    If the batch is not solved to optimality (e.g. one block is infeasible), each subproblem is solved by itself.
+    The relative tolerance of the batch solve applies to the summed objective, so the batch is solved with rel_tol divided by the number
+    of subproblems, and a subproblem is also solved by itself when the gap of the batch (from the dual bound reported by the solver) is
+    larger than rel_tol times its own objective.
+    Each model gets m.dsda_batch with the batch size and whether it fell back to its own solve, and its share of the batch solver time.
+    Args:
+        models: Fixed subproblem models that are to be solved
+        subproblem_solver: MINLP or NLP solver algorithm
+        subproblem_solver_options: MINLP or NLP solver algorithm options, dictionary or solver_profile
+        timelimit: time limit in seconds for the solve statement of the batch. A subproblem solved by itself (in the fallback, or when it
+            is the only one that passes the checks) gets its share, timelimit divided by the number of models
+        gams_output: Determine keeping or not GAMS files
+        tee: Display iteration output
+        rel_tol: Relative optimality tolerance of each subproblem
+        superstructure_bounds: Bound snapshot from get_superstructure_bounds to be used in the FBBT feasibility check
+        structural_check: Skip the subproblems that are structurally singular (see solve_subproblem)
+        reduce_function: Function that eliminates variables from each fixed subproblem (see solve_subproblem)
+        presolve: Presolve each fixed subproblem before solving it (see solve_subproblem)
+        cutoff: Objective value each subproblem has to beat, the ones that cannot are pruned (see solve_subproblem)
+        bound_function: Function that returns a lower bound of the objective of each subproblem (see get_objective_bound)
+    Returns:
+        models: The solved subproblem models, in the same order
+    """
+    prepared = []
+    for m in models:
+        aliases = _prepare_subproblem(m, superstructure_bounds=superstructure_bounds, structural_check=structural_check,
+                                      reduce_function=reduce_function, presolve=presolve, cutoff=cutoff,
+                                      bound_function=bound_function)
+        if aliases is not None:
+            prepared.append((m, aliases))
+    # The tolerance of the batch applies to the summed objective, it is shared between the blocks
+    solver_options = get_solver_options(
+        subproblem_solver_options, timelimit=timelimit, rel_tol=rel_tol/max(len(prepared), 1))
+    single_options = get_solver_options(
+        subproblem_solver_options, timelimit=timelimit/max(len(models), 1), rel_tol=rel_tol)
+
+    results = None
+    certified = [False]*len(prepared)
+    if len(prepared) > 1:
+        batch = pe.ConcreteModel()
+        names = []
+        objectives = []
+        blocks = []
+        for k, (m, _) in enumerate(prepared):
+            names.append(m.name)
+            blocks.append(list(m.component_data_objects(pe.Objective, active=True, descend_into=True)))
+            objectives.extend(blocks[-1])
+            batch.add_component('subproblem_%s' % k, m)
+        batch.obj = pe.Objective(expr=sum(o.expr if o.sense == pe.minimize else -o.expr for o in objectives))
+        for o in objectives:
+            o.deactivate()
+        try:
+            results = _solve_prepared(batch, subproblem_solver=subproblem_solver, solver_options=solver_options,
+                                      gams_output=gams_output, tee=tee)
+        finally:
+            for o in objectives:
+                o.activate()
+            for (m, _), name in zip(prepared, names):  # detach the subproblems again
+                batch.del_component(m)
+                m.name = name
+        if results.solver.termination_condition not in (tc.optimal, tc.locallyOptimal, tc.globallyOptimal):
+            results = None
+        else:
+            # The optimality gap of a block is at most the gap of the summed objective, so a block is only accepted if the
+            # batch gap is within rel_tol of its own objective. Without a dual bound (local solvers) every block is accepted
+            values = [sum(pe.value(o.expr) if o.sense == pe.minimize else -pe.value(o.expr) for o in block) for block in blocks]
+            bound = results.problem.lower_bound
+            if bound is None or isnan(bound) or abs(bound) >= 1e10:
+                certified = [True]*len(prepared)
+            else:
+                gap = max(sum(values) - bound, 0)
+                certified = [gap <= rel_tol*abs(value) for value in values]
+
+    for (m, aliases), accepted in zip(prepared, certified):
+        if accepted:
+            m.results = results
+            _finish_subproblem(m, aliases, presolve=presolve)
+            m.dsda_usertime = results.solver.user_time / len(prepared)
+        else:
+            m.results = _solve_prepared(m, subproblem_solver=subproblem_solver, solver_options=single_options,
+                                        gams_output=gams_output, tee=tee)
+            _finish_subproblem(m, aliases, presolve=presolve)
+            if results is not None:  # Solved again after the batch
+                m.dsda_usertime += results.solver.user_time / len(prepared)
+        m.dsda_batch = {'size': len(prepared), 'fallback': not accepted and len(prepared) > 1}
+    return models
 
 
 def solve_with_minlp(
@@ -469,7 +1641,7 @@ def solve_with_minlp(
         m: Pyomo GDP model that is to be solved using MINLP
         transformation: GDP to MINLP transformation to be used
         minlp: MINLP solver algorithm
-        minlp_options: MINLP solver algorithm options
+        minlp_options: MINLP solver algorithm options, dictionary or solver_profile. They are not changed
         timelimit: time limit in seconds for the solve statement
         gams_output: Determine keeping or not GAMS files
         tee: Dsiplay iterations
@@ -486,26 +1658,20 @@ def solve_with_minlp(
     # Output report
     output_options = {}
     if gams_output:
-        dir_path = os.path.dirname(os.path.abspath(__file__))
-        gams_path = os.path.join(dir_path, "gamsfiles/")
-        if not(os.path.exists(gams_path)):
-            print('Directory for automatically generated files ' +
-                  gams_path + ' does not exist. We will create it')
-            os.makedirs(gams_path)
+        gams_path = get_scratch_dir('gamsfiles')
         output_options = {'keepfiles': True,
                           'tmpdir': gams_path,
                           'symbolic_solver_labels': True}
 
-    minlp_options['add_options'] = minlp_options.get('add_options', [])
-    minlp_options['add_options'].append('option reslim=%s;' % timelimit)
-    minlp_options['add_options'].append('option optcr=%s;' % rel_tol)
+    solver_options = get_solver_options(
+        minlp_options, timelimit=timelimit, rel_tol=rel_tol)
 
     # Solve
     solvername = 'gams'
     opt = SolverFactory(solvername, solver=minlp)
     m.results = opt.solve(m, tee=tee,
                           **output_options,
-                          **minlp_options,
+                          **solver_options,
                           )
     # update_boolean_vars_from_binary(m)
     return m
@@ -532,7 +1698,11 @@ def solve_with_gdpopt(
     Args:
         m: GDP model that is to be solved
         mip: MIP solver algorithm
+        mip_options: MIP solver algorithm options, dictionary or solver_profile. They are not changed
         nlp: NLP solver algorithm
+        nlp_options: NLP solver algorithm options, dictionary or solver_profile. They are not changed
+        minlp: MINLP solver algorithm
+        minlp_options: MINLP solver algorithm options, dictionary or solver_profile. They are not changed
         timelimit: time limit in seconds for the solve statement
         strategy: GDPopt strategy
         mip_output: Determine keeping or not GAMS files of the MIP model
@@ -548,44 +1718,24 @@ def solve_with_gdpopt(
 
     # Output report
 
-    mip_options['add_options'] = mip_options.get('add_options', [])
-    mip_options['add_options'].append('option optcr=0.0;')
-
-    nlp_options['add_options'] = nlp_options.get('add_options', [])
-    nlp_options['add_options'].append('option optcr=%s;' % rel_tol)
-
-    minlp_options['add_options'] = minlp_options.get('add_options', [])
-    minlp_options['add_options'].append('option optcr=%s;' % rel_tol)
+    mip_options = get_solver_options(mip_options, rel_tol=0.0)
+    nlp_options = get_solver_options(nlp_options, rel_tol=rel_tol)
+    minlp_options = get_solver_options(minlp_options, rel_tol=rel_tol)
 
     if mip_output:
-        dir_path = os.path.dirname(os.path.abspath(__file__))
-        gams_path = os.path.join(dir_path, "gamsfiles/")
-        if not(os.path.exists(gams_path)):
-            print('Directory for automatically generated files ' +
-                  gams_path + ' does not exist. We will create it')
-            os.makedirs(gams_path)
+        gams_path = get_scratch_dir('gamsfiles')
         mip_options['keepfiles'] = True
         mip_options['tmpdir'] = gams_path
         mip_options['symbolic_solver_labels'] = True
 
     if nlp_output:
-        dir_path = os.path.dirname(os.path.abspath(__file__))
-        gams_path = os.path.join(dir_path, "gamsfiles/")
-        if not(os.path.exists(gams_path)):
-            print('Directory for automatically generated files ' +
-                  gams_path + ' does not exist. We will create it')
-            os.makedirs(gams_path)
+        gams_path = get_scratch_dir('gamsfiles')
         nlp_options['keepfiles'] = True
         nlp_options['tmpdir'] = gams_path
         nlp_options['symbolic_solver_labels'] = True
 
     if minlp_output:
-        dir_path = os.path.dirname(os.path.abspath(__file__))
-        gams_path = os.path.join(dir_path, "gamsfiles/")
-        if not(os.path.exists(gams_path)):
-            print('Directory for automatically generated files ' +
-                  gams_path + ' does not exist. We will create it')
-            os.makedirs(gams_path)
+        gams_path = get_scratch_dir('gamsfiles')
         minlp_options['keepfiles'] = True
         minlp_options['tmpdir'] = gams_path
         minlp_options['symbolic_solver_labels'] = True
@@ -660,6 +1810,222 @@ def neighborhood_k_eq_inf(dimension: int = 2) -> dict:
     return temp
 
 
+def neighborhood_radius(dimension: int = 2, radius: int = 1) -> dict:
+    """
+    Function creates the neighborhood of all the points within an L-infinity radius of the given dimension (radius=1 gives the k=Infinity directions)
+    Args:
+        dimension: Dimension of the neighborhood
+        radius: L-infinity radius of the neighborhood
+    Returns:
+        directions: Dictionary contaning in each item a list with a direction within the neighborhood
+    """
+
+    neighbors = [list(i) for i in it.product(range(-radius, radius+1), repeat=dimension) if any(i)]
+    # Closest directions first, so that the nearest points are evaluated first
+    neighbors.sort(key=lambda direct: max(abs(j) for j in direct))
+    directions = {}
+    for i in range(len(neighbors)):
+        directions[i+1] = neighbors[i]
+    return directions
+
+
+# Scratch directory of the run in the current thread (see scratch_space)
+_scratch = threading.local()
+
+
+@contextmanager
+def scratch_space(
+    use_shm: bool = False,
+    max_size: float = None,
+    keep: bool = False,
+    root: str = None,
+):
+    """
+    Context manager that gives the runs in the current thread their own directory for the automatically generated
+    files (GAMS files and initialization json files), so that concurrent runs don't overwrite each other's files.
+    Worker processes forked inside the context get their own subdirectory. Without it, files are written next to this module.
+    Args:
+        use_shm: Create the directory in /dev/shm to keep the files in memory, if it is available
+        max_size: Size cap in bytes of the solver files, the oldest ones are removed when it is exceeded. Initialization files are never removed
+        keep: Keep the directory when leaving the context instead of removing it
+        root: Directory in which to create the scratch directory, by default the temporary directory of the system
+    Returns:
+        path: Path of the scratch directory
+    """
+    if root is None:
+        root = tempfile.gettempdir()
+        if use_shm and os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+            root = '/dev/shm'
+    path = tempfile.mkdtemp(prefix='dsda_%d_' % os.getpid(), dir=root)
+    previous = getattr(_scratch, 'state', None)
+    _scratch.state = {'path': path, 'pid': os.getpid(), 'max_size': max_size}
+    try:
+        yield path
+    finally:
+        _scratch.state = previous
+        if not keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def get_scratch_dir(subdir: str = '') -> str:
+    """
+    Function that returns (and creates) the directory for automatically generated files of the current run (see scratch_space)
+    Args:
+        subdir: Subdirectory, e.g. 'gamsfiles' for solver files
+    Returns:
+        path: Path of the directory
+    """
+    state = getattr(_scratch, 'state', None)
+    if state is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), subdir)
+        if not(os.path.exists(path)):
+            print('Directory for automatically generated files ' +
+                  path + ' does not exist. We will create it')
+            os.makedirs(path, exist_ok=True)
+        return path
+    if state['pid'] != os.getpid():  # forked worker, use its own subdirectory
+        state = dict(state, path=os.path.join(state['path'], 'worker_%d' % os.getpid()), pid=os.getpid())
+        _scratch.state = state
+    path = os.path.join(state['path'], subdir)
+    os.makedirs(path, exist_ok=True)
+    if subdir and state['max_size'] is not None:
+        _enforce_scratch_cap(path, state['max_size'])
+    return path
+
+
+def _enforce_scratch_cap(path: str, max_size: float):
+    """
+    Function that removes the oldest files of a scratch subdirectory until its size is below the cap
+    Args:
+        path: Scratch subdirectory
+        max_size: Size cap in bytes
+    """
+    files = []
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, name))
+            except OSError:  # removed by the solver meanwhile
+                continue
+            files.append((stat.st_mtime, stat.st_size, os.path.join(dirpath, name)))
+    size = sum(f[1] for f in files)
+    for _, file_size, name in sorted(files):
+        if size <= max_size:
+            break
+        try:
+            os.remove(name)
+        except OSError:
+            pass
+        size -= file_size
+
+
+# Environment variables that cap the threads of the numerical libraries in the sweep workers
+_thread_variables = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+
+def _init_sweep_worker(cores, threads: int = None):
+    """
+    Function that pins a sweep worker process to the next free core and caps its threads (see run_sweep)
+    """
+    if cores is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cores.get()})
+    if threads is not None:
+        for variable in _thread_variables:
+            os.environ[variable] = str(threads)
+        set_solver_threads(threads)
+
+
+def _run_sweep_case(run_case, case: dict) -> list:
+    """
+    Function that runs a sweep case and returns its results as a list of rows, with an 'Error' status row if the case fails
+    """
+    try:
+        rows = run_case(case)
+    except Exception as e:
+        rows = dict(case, Status='Error: ' + repr(e))
+    if isinstance(rows, dict):
+        rows = [rows]
+    return rows
+
+
+def run_sweep(
+    cases: list,
+    run_case,
+    csv_file: str = None,
+    csv_columns: list = None,
+    workers: int = None,
+    threads: int = 1,
+    pin: bool = True,
+    tee: bool = True,
+) -> list:
+    """
+    Function that runs independent cases (e.g. method, solver, transformation and size combinations) concurrently in worker processes,
+    each pinned to its own core with a capped number of solver threads so that their timings stay comparable, and merges the results
+    Args:
+        cases: List of dictionaries with the arguments of each case
+        run_case: Module level function that runs a case and returns its result as a dictionary (or list of dictionaries), the row of the
+            csv file. A case that raises an exception gives a row with the case and an 'Error' status
+        csv_file: Path of the csv file where the results are written in the order of the cases, after every finished case
+        csv_columns: Columns of the csv file, the other keys of the results are not written
+        workers: Number of cases solved at the same time, by default the number of available cores. With 1 the cases run in this process
+        threads: Number of threads of the solvers (GAMS option threads) and numerical libraries of each case, None keeps their defaults
+        pin: Pin each worker to a core
+        tee: Display the result of each case
+    Returns:
+        results: List of result dictionaries, in the order of the cases
+    """
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    if workers is None:
+        workers = len(cores)
+    results = [None]*len(cases)
+
+    def _write_results():
+        if csv_file is None:
+            return
+        try:
+            with open(csv_file, 'w') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=csv_columns, extrasaction='ignore')
+                writer.writeheader()
+                for rows in results:
+                    for data in rows or []:
+                        writer.writerow(data)
+        except IOError:
+            print("I/O error")
+
+    def _finish(i, rows):
+        results[i] = rows
+        if tee:
+            for data in rows:
+                print(data)
+        _write_results()
+
+    # Every worker gets its own directory for the generated files
+    with scratch_space():
+        if workers == 1:
+            previous = _solver_threads
+            if threads is not None:
+                set_solver_threads(threads)
+            try:
+                for i, case in enumerate(cases):
+                    _finish(i, _run_sweep_case(run_case, case))
+            finally:
+                set_solver_threads(previous)
+        else:
+            context = multiprocessing.get_context()
+            free_cores = None
+            if pin:
+                free_cores = context.Queue()
+                for j in range(workers):
+                    free_cores.put(cores[j % len(cores)])
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_sweep_worker,
+                                     initargs=(free_cores, threads)) as executor:
+                futures = {executor.submit(_run_sweep_case, run_case, case): i for i, case in enumerate(cases)}
+                for future in as_completed(futures):
+                    _finish(futures[future], future.result())
+
+    return [data for rows in results for data in rows]
+
+
 def initialize_model(
     m: pe.ConcreteModel(),
     json_path=None,
@@ -688,7 +2054,7 @@ def initialize_model(
                 dir_path, feasible_model+'_initialization.json')
         else:
             json_path = os.path.join(
-                dir_path, 'dsda_initialization.json')
+                get_scratch_dir(), 'dsda_initialization.json')
 
     from_json(m, fname=json_path, wts=wts)
     return m
@@ -700,6 +2066,8 @@ def generate_initialization(
     model_name: str = '',
     human_read: bool = True,
     wts=StoreSpec.value(),
+    base_path: str = None,
+    writer: SnapshotWriter = None,
 ):
     """
     Function that creates a json file for initialization based on a model m
@@ -709,6 +2077,8 @@ def generate_initialization(
         model_name: Name of the model for the initialization
         human_read: Make the json file readable by a human
         wts: What to save, initially the values, but we might want something different. Check model_serializer tests for examples
+        base_path: Path of a json file of the same model, if given only the values that differ from it are stored
+        writer: SnapshotWriter that writes the json file in the background, if None it is written before returning
     Returns:
         json_path: Path where json file is stored
     """
@@ -721,16 +2091,35 @@ def generate_initialization(
     else:
         if model_name != '':
             json_path = os.path.join(
-                dir_path, model_name + '_initialization.json')
+                get_scratch_dir(), model_name + '_initialization.json')
         else:
             json_path = os.path.join(
-                dir_path, 'dsda_initialization.json')
+                get_scratch_dir(), 'dsda_initialization.json')
 
-    to_json(m, fname=json_path, human_read=human_read, wts=wts)
+    if writer is not None:
+        writer.write(m, json_path, human_read=human_read,
+                     wts=wts, base=base_path)
+    else:
+        to_json(m, fname=json_path, human_read=human_read,
+                wts=wts, base=base_path)
 
     return json_path
 
 
+def _history_name(point: list, history_base: str = None) -> str:
+    """
+    Function that returns the initialization name of an improving point
+    Args:
+        point: External variable point
+        history_base: Path of the base json file of the history, None if no history is kept
+    Returns:
+        model_name: 'best', or 'best_' followed by the point when a history is kept
+    """
+    if history_base is None:
+        return 'best'
+    return 'best_' + '_'.join(str(x) for x in point)
+
+
 def find_actual_neighbors(
     start: list,
     neighborhood: dict,
@@ -765,6 +2154,261 @@ def find_actual_neighbors(
     return new_neighbors
 
 
+def get_sensitivities(m: pe.ConcreteModel(), names: list) -> dict:
+    """
+    Function that estimates the derivative of the objective of a solved subproblem with respect to the fixed binary variables, using
+    the constraint multipliers imported in m.dual (envelope theorem: dF/dy = -sum(dual_c*dg_c/dy))
+    Args:
+        m: Solved Pyomo model with an imported dual suffix, solved without presolve (see solve_with_dsda)
+        names: Names of the binary variables of interest
+    Returns:
+        derivatives: Dictionary with the variable names (keys) and their objective derivatives (values), None if no duals are available
+    """
+    dual = m.component('dual')
+    if not isinstance(dual, pe.Suffix) or len(dual) == 0:
+        return None
+
+    targets = ComponentMap()
+    for name in names:
+        var = m.find_component(name)
+        if var is not None:
+            targets[var] = name
+    derivatives = {name: 0 for name in targets.values()}
+
+    for c in m.component_data_objects(pe.Constraint, active=True, descend_into=True):
+        mu = dual.get(c)
+        if not mu:
+            continue
+        ys = [v for v in identify_variables(c.body, include_fixed=True) if v in targets]
+        if not ys:
+            continue
+        grad = differentiate(c.body, wrt_list=ys, mode=Modes.reverse_numeric)
+        for y, g in zip(ys, grad):
+            derivatives[targets[y]] -= mu*g
+
+    return derivatives
+
+
+def estimate_objective_change(derivatives: dict, ext_dict: dict, start: list, neighbor: list) -> float:
+    """
+    Function that estimates the first order objective change of moving from start to neighbor
+    Args:
+        derivatives: Objective derivatives at start (output of get_sensitivities)
+        ext_dict: Dictionary with Boolean variables to be reformulated (keys) and their corresponding ordered sets (values). Must contain
+            the 'Binary_vars_names' of the MIP reformulation (see extvars_gdp_to_mip)
+        start: Point where the derivatives were computed
+        neighbor: Point whose objective change is estimated
+    Returns:
+        estimate: Estimated objective change, None if there are no derivatives
+    """
+    if derivatives is None:
+        return None
+
+    def _active(x):
+        # Binary variables fixed at 1 at the point x
+        active = set()
+        position = 0
+        for i in ext_dict:
+            for _ in range(ext_dict[i]['exactly_number']):
+                active.add(ext_dict[i]['Binary_vars_names'][x[position]-1])
+                position += 1
+        return active
+
+    here, there = _active(start), _active(neighbor)
+    return sum(derivatives.get(y, 0) for y in there - here) - sum(derivatives.get(y, 0) for y in here - there)
+
+
+def get_sensitivity_accuracy(records: list) -> dict:
+    """
+    Function that summarizes how well the sensitivity estimates predicted the evaluated neighbors
+    Args:
+        records: List of dictionaries with the 'estimate' and 'actual' objective changes of each neighbor
+    Returns:
+        accuracy: Dictionary with the number of records 'n', the 'mean_abs_error' and the fraction of records where the estimate
+            predicted the sign of the actual change ('sign_agreement')
+    """
+    n = len(records)
+    if n == 0:
+        return {'n': 0, 'mean_abs_error': None, 'sign_agreement': None}
+    return {
+        'n': n,
+        'mean_abs_error': sum(abs(r['estimate'] - r['actual']) for r in records)/n,
+        'sign_agreement': sum((r['estimate'] < 0) == (r['actual'] < 0) for r in records)/n,
+    }
+
+
+def _update_sensitivity(sensitivity: dict, m: pe.ConcreteModel(), point: list, objective: float, ext_dict: dict):
+    # Move the sensitivity state to a new incumbent
+    names = [name for i in ext_dict for name in ext_dict[i].get('Binary_vars_names', [])]
+    sensitivity['point'] = list(point)
+    sensitivity['objective'] = objective
+    sensitivity['derivatives'] = get_sensitivities(m, names) if names else None
+
+
+def _plain_ext_dict(ext_dict: dict) -> dict:
+    """
+    Function that returns a copy of a dictionary of external variables (see external_ref) without the component lists of the last
+    model it was used with, which are found again by name in the next one
+    """
+    return {key: {name: value for name, value in entry.items() if name not in ('Boolean_vars', 'Binary_vars')}
+            for key, entry in ext_dict.items()}
+
+
+def _session_neighbor(
+    session: dict,
+    point: list,
+    model_function,
+    model_args: dict,
+    ext_dict: dict,
+    ext_logic,
+    init_path=None,
+    mip_transformation: bool = False,
+    transformation: str = 'bigm',
+    writer: SnapshotWriter = None,
+):
+    """
+    Function that returns the model of a solver session (see get_solver_session) fixed at a point. The model of the structure is built
+    and transformed with the MIP transformation the first time. Afterwards the fixings, deactivated constraints and variable bounds
+    (e.g. from FBBT) of the previous point are undone, the values are loaded from init_path and the external variables are fixed at
+    the point as in external_ref. Without mip_transformation the indicator variables of all the disjuncts are fixed and the constraints
+    of the disjuncts that are not selected are deactivated, as gdp.fix_disjuncts does
+    Args:
+        session: Solver session
+        point: External variable point
+        writer: SnapshotWriter that may be writing the json file of the previous point from the model
+    Returns:
+        m_fixed: Fixed subproblem model, the same model object for every point of the structure
+        ext_dict: Dictionary of the external variables of the model (see extvars_gdp_to_mip)
+    """
+    key = (model_function, repr(model_args), mip_transformation, transformation)
+    entry = session['models'].get(key)
+    if entry is None:
+        m, mip_dict = extvars_gdp_to_mip(
+            m=model_function(**model_args),
+            gdp_dict_extvar=_plain_ext_dict(ext_dict),
+            transformation=transformation,
+        )
+        binaries = {v.name: v for v in m.component_data_objects(pe.Var, descend_into=True)}
+        for i in mip_dict:
+            mip_dict[i]['Binary_vars'] = [binaries[name] for name in mip_dict[i]['Binary_vars_names']]
+        entry = {'model': m, 'ext_dict': mip_dict, 'fixed': [], 'deactivated': [],
+                 'bounds': [(v, v.lb, v.ub) for v in m.component_data_objects(pe.Var, descend_into=True)],
+                 'disjuncts': [(d, d.transformation_block()) for d in m.component_data_objects(Disjunct, descend_into=True)]}
+        session['models'][key] = entry
+        session['builds'] += 1
+    else:
+        if writer is not None:  # The json file of the previous point may be written from this model
+            writer.flush()
+        m = entry['model']
+        if hasattr(m, '_tmp_trivial_deactivated_constrs'):
+            pe.TransformationFactory('contrib.deactivate_trivial_constraints').revert(m)
+        for v in entry['fixed']:
+            v.unfix()
+        for b in entry['deactivated']:
+            b.activate()
+        for v, lb, ub in entry['bounds']:
+            v.setlb(lb)
+            v.setub(ub)
+        entry['fixed'], entry['deactivated'] = [], []
+    initialize_model(m, json_path=init_path)
+    mip_dict = entry['ext_dict']
+
+    # External variables, as external_ref with mip_ref
+    position = 0
+    for i in mip_dict:
+        selected = set(point[position:position + mip_dict[i]['exactly_number']])
+        position += mip_dict[i]['exactly_number']
+        for k, (boolean, binary) in enumerate(zip(mip_dict[i]['Boolean_vars'], mip_dict[i]['Binary_vars']), 1):
+            binary.fix(1 if k in selected else 0)
+            boolean.set_value(k in selected)
+            entry['fixed'].append(binary)
+    for expr, var in ext_logic(m):
+        value = pe.value(expr)
+        var.set_value(value)
+        if hasattr(var, 'get_associated_binary') and var.get_associated_binary() is not None:
+            var.get_associated_binary().set_value(1 if value else 0)
+
+    if not mip_transformation:
+        for d, relaxation in entry['disjuncts']:
+            if abs(pe.value(d.indicator_var) - 1) <= 1e-6:
+                d.indicator_var.fix(1)
+            elif abs(pe.value(d.indicator_var)) <= 1e-6:
+                d.indicator_var.fix(0)
+                if relaxation is not None and relaxation.active:
+                    relaxation.deactivate()
+                    entry['deactivated'].append(relaxation)
+            else:
+                raise ValueError('Non-binary indicator variable value %s for disjunct %s' % (pe.value(d.indicator_var), d.name))
+            entry['fixed'].append(d.indicator_var)
+
+    pe.TransformationFactory('contrib.deactivate_trivial_constraints').apply_to(
+        m, tmp=True, ignore_infeasible=True)
+    return m, mip_dict
+
+
+def _build_neighbor(
+    point: list,
+    model_function,
+    model_args: dict,
+    ext_dict: dict,
+    ext_logic,
+    init_path=None,
+    mip_transformation: bool = False,
+    transformation: str = 'bigm',
+    solver_session: dict = None,
+    writer: SnapshotWriter = None,
+):
+    """
+    Function that builds the fixed subproblem of a point, initialized from init_path (see evaluate_neighbors)
+    Args:
+        solver_session: Solver session from get_solver_session, whose model of the structure is fixed at the point instead of building
+            a new one (see _session_neighbor)
+        writer: SnapshotWriter that may be writing the json file of the previous point from the model of the session
+    Returns:
+        m_fixed: Fixed subproblem model
+        ext_dict: Dictionary of the external variables of the model, the MIP one with mip_transformation (see extvars_gdp_to_mip)
+    """
+    if solver_session is not None:
+        return _session_neighbor(solver_session, point, model_function, model_args, ext_dict, ext_logic, init_path=init_path,
+                                 mip_transformation=mip_transformation, transformation=transformation, writer=writer)
+    m = model_function(**model_args)
+    m_init = initialize_model(m, json_path=init_path)
+    if mip_transformation:  # If you want a MIP reformulation, go ahead and use it'
+        m_init, ext_dict = extvars_gdp_to_mip(
+            m=m,
+            gdp_dict_extvar=ext_dict,
+            transformation=transformation,
+        )
+
+    m_fixed = external_ref(
+        m=m_init,
+        x=point,
+        extra_logic_function=ext_logic,
+        dict_extvar=ext_dict,
+        mip_ref=mip_transformation,
+        tee=False,
+    )
+    return m_fixed, ext_dict
+
+
+def _solve_neighbor_case(case: dict) -> dict:
+    """
+    Function that builds and solves the subproblem of a point in a sweep worker (see evaluate_neighbors and run_sweep) and returns
+    its result, with the values of the solved model when it is optimal
+    """
+    m_solved, _ = _build_neighbor(case['point'], **case['build_args'])
+    m_solved = solve_subproblem(m=m_solved, **case['solve_args'])
+    optimal = m_solved.dsda_status == 'Optimal'
+    return {
+        'point': case['point'],
+        'status': m_solved.dsda_status,
+        'usertime': m_solved.dsda_usertime,
+        'bound': getattr(m_solved, 'dsda_bound', None),
+        'objective': pe.value(m_solved.obj) if optimal else None,
+        'state': to_json(m_solved, wts=StoreSpec.value(), return_dict=True) if optimal else None,
+    }
+
+
 def evaluate_neighbors(
     ext_vars: dict,
     fmin: float,
@@ -785,6 +2429,22 @@ def evaluate_neighbors(
     rel_tol: float = 1e-3,
     global_evaluated: list = [],
     init_path=None,
+    superstructure_bounds: dict = None,
+    structural_check: bool = False,
+    reduce_function=None,
+    presolve: bool = True,
+    history_base: str = None,
+    snapshot_writer: SnapshotWriter = None,
+    batch_size: int = 1,
+    screening: dict = None,
+    prune: bool = False,
+    bound_function=None,
+    pruned: dict = None,
+    sensitivity: dict = None,
+    sensitivity_skip: float = None,
+    evaluations: dict = None,
+    workers: int = 1,
+    solver_session: dict = None,
 ):
     """
     Function that evaluates a group of given points and returns the best
@@ -808,6 +2468,37 @@ def evaluate_neighbors(
         rel_tol: Relative optimality tolerance
         global_evaluated: list with points already evaluated
         init_path: path to initialization file
+        superstructure_bounds: Bound snapshot from get_superstructure_bounds to be used in the FBBT feasibility check
+        structural_check: Skip the subproblems that are structurally singular without calling the solver
+        reduce_function: Function that eliminates variables from each fixed subproblem before solving it (see solve_subproblem)
+        presolve: Presolve each fixed subproblem before solving it (see presolve_problem)
+        history_base: Path of a json file of the model, if given every improving point is kept as a delta snapshot of it instead of overwriting the best one
+        snapshot_writer: SnapshotWriter used to write the json file of the best point in the background
+        batch_size: Number of neighbors solved together with one solve statement (see solve_subproblem_batch). The neighbors of a batch
+            are initialized from init_path before any of them is solved
+        screening: Solve every neighbor first with a loose screening solve, and solve at full fidelity only the neighbors whose screening
+            objective is within a margin of fmin. Dictionary with the screening 'solver' (default subproblem_solver), its 'solver_options',
+            'rel_tol' (default 0.1), 'timelimit' per neighbor (default iter_timelimit/10) and the relative 'margin' (default 0.05).
+            The screening stage is stored in m.dsda_screening of each solved neighbor. The ones screened out get the 'Screened_Out' status
+            and the ones whose screening solve failed get the 'Screening_Failed' status. Neither is stored in evaluations
+        prune: Do not solve the neighbors whose objective lower bound after preprocessing cannot be accepted as the new best point (see
+            solve_subproblem). With batch_size > 1 the bound is compared with the most permissive acceptance rule
+        bound_function: Function that returns a lower bound of the objective of each fixed neighbor (see get_objective_bound)
+        pruned: Dictionary where the pruned neighbors (tuple keys) are stored with their lower bound
+        sensitivity: Sensitivity state of the incumbent (see solve_with_dsda). If its derivatives were computed at the actual point, the
+            neighbors are solved in the order of their estimated objective change (see estimate_objective_change). The estimate and actual
+            change of every optimal neighbor are appended to sensitivity['accuracy'], and the state is moved to every new best neighbor
+        sensitivity_skip: Do not solve the neighbors whose estimated objective change is larger than this value. They are appended to
+            sensitivity['skipped']
+        evaluations: Evaluation cache shared between searches, with the points (tuple keys) and their 'status', 'objective' and json
+            'path' (only kept with history_base). Cached neighbors are not solved again: they are accepted from their json file if they
+            improve the actual point, and skipped otherwise. Every solved neighbor is added to it, except the pruned and screened ones
+        workers: Number of neighbors solved at the same time in worker processes (see run_sweep), None for the number of available
+            cores. Their results are merged in this process in the order of the neighbors, and the best one is built again here from
+            the values of its solution to write its json file. The sensitivity derivatives are not computed at a neighbor solved in a
+            worker. Only used with batch_size=1 and without screening
+        solver_session: Solver session from get_solver_session used to build and solve the neighbors one at a time (see
+            _session_neighbor). Not used with batch_size > 1 or in worker processes
     Returns:
         fmin: Type int and gives the best neighbor's objective
         best_var: Type list and gives the best neighbor
@@ -840,72 +2531,227 @@ def evaluate_neighbors(
         print()
         print('Neighbor search around:', best_var)
 
-    for i in temp.keys():   # Solve all models
-        if temp[i] not in global_evaluated:
-            m = model_function(**model_args)
-            m_init = initialize_model(m, json_path=init_path)
-            if mip_transformation:  # If you want a MIP reformulation, go ahead and use it'
-                m_init, ext_dict = extvars_gdp_to_mip(
-                    m=m,
-                    gdp_dict_extvar=ext_dict,
-                    transformation=transformation,
-                )
-
-            m_fixed = external_ref(
-                m=m_init,
-                x=temp[i],
-                extra_logic_function=ext_logic,
-                dict_extvar=ext_dict,
-                mip_ref=mip_transformation,
-                tee=False,
-            )
-            t_remaining = min(iter_timelimit, timelimit -
+    if screening is not None:
+        screening = dict({'solver': subproblem_solver, 'rel_tol': 0.1, 'timelimit': iter_timelimit/10, 'margin': 0.05}, **screening)
+        screening.setdefault('solver_options', subproblem_solver_options if screening['solver'] == subproblem_solver else {})
+
+    def _distance(point):
+        return sum((x-y)**2 for x, y in zip(point, here))
+
+    def _accepts(point, act_obj):
+        # Assuming minimization problem
+        # Implements heuristic of largest move
+        if not improve:
+            # We want a minimum improvement in the first found solution
+            return (fmin - act_obj) > min_improve or (fmin - act_obj)/(abs(fmin)+epsilon) > min_improve_rel
+        # We want slightly worse solutions if the distance is larger
+        return (((act_obj - fmin) < abs_tol) or ((act_obj - fmin)/(abs(fmin)+epsilon) < rel_tol)) and _distance(point) >= best_dist
+
+    def _cutoff():
+        # Objective the next neighbors have to beat to be accepted below
+        if not prune:
+            return None
+        if improve or batch_size > 1:
+            return fmin + max(abs_tol, rel_tol*(abs(fmin)+epsilon))
+        return fmin - min(min_improve, min_improve_rel*(abs(fmin)+epsilon))
+
+    def _solve_neighbors(models, solver, solver_options, limit, **kwargs):
+        if batch_size > 1:
+            return solve_subproblem_batch(
+                models=models,
+                subproblem_solver=solver,
+                subproblem_solver_options=solver_options,
+                timelimit=limit,
+                gams_output=gams_output,
+                tee=tee,
+                superstructure_bounds=superstructure_bounds,
+                structural_check=structural_check,
+                reduce_function=reduce_function,
+                presolve=presolve,
+                cutoff=_cutoff(),
+                bound_function=bound_function,
+                **kwargs)
+        return [solve_subproblem(
+            m=m_fixed,
+            subproblem_solver=solver,
+            subproblem_solver_options=solver_options,
+            timelimit=limit,
+            gams_output=gams_output,
+            tee=tee,
+            superstructure_bounds=superstructure_bounds,
+            structural_check=structural_check,
+            reduce_function=reduce_function,
+            presolve=presolve,
+            cutoff=_cutoff(),
+            bound_function=bound_function,
+            solver_session=solver_session,
+            **kwargs) for m_fixed in models]
+
+    def _record(i, status, act_obj, bound, t_end):
+        # Stores the result of a solved neighbor and returns whether it is accepted as the new best point
+        ns_evaluated.append(temp[i])
+        if evaluations is not None and status not in ('Pruned', 'Screened_Out', 'Screening_Failed'):
+            # Pruning and screening depend on the incumbent and screening solves are loose, so only full solves are cached
+            evaluations[tuple(temp[i])] = {'status': status, 'path': None, 'objective': act_obj}
+
+        if status == 'Pruned':
+            if pruned is not None:
+                pruned[tuple(temp[i])] = bound
+            if global_tee:
+                print('Pruned:', temp[i], '   |   Objective bound:', round(bound, 5))
+
+        if status != 'Optimal':   # Check if D-SDA status is optimal
+            return False
+        if global_tee:
+            print('Evaluated:', temp[i], '   |   Objective:', round(act_obj, 5), '   |   Global Time:', round(t_end - current_time, 2))
+        if i in estimates:
+            sensitivity['accuracy'].append({'point': temp[i], 'estimate': estimates[i], 'actual': act_obj - f_here})
+        return _accepts(temp[i], act_obj)
+
+    def _move(i, act_obj, m_solved):
+        # Makes the solved neighbor the new best point
+        nonlocal fmin, best_var, best_dir, best_dist, improve, best_path
+        fmin = act_obj
+        best_var = temp[i]
+        best_dir = i
+        best_dist = _distance(temp[i])
+        improve = True
+        best_path = generate_initialization(
+            m_solved, starting_initialization=False, model_name=_history_name(temp[i], history_base), base_path=history_base, writer=snapshot_writer)
+        if evaluations is not None and history_base is not None:
+            evaluations[tuple(temp[i])]['path'] = best_path
+
+    points = [i for i in temp.keys() if temp[i] not in global_evaluated]
+    estimates = {}
+    if sensitivity is not None and sensitivity.get('derivatives') is not None and sensitivity['point'] == list(here):
+        # Most promising neighbors first according to the first order estimate
+        f_here = fmin
+        estimates = {i: estimate_objective_change(sensitivity['derivatives'], ext_dict, here, temp[i]) for i in points}
+        points.sort(key=lambda i: estimates[i])
+        if sensitivity_skip is not None:
+            for i in points:
+                if estimates[i] > sensitivity_skip:
+                    sensitivity['skipped'].append({'point': temp[i], 'estimate': estimates[i]})
+                    if global_tee:
+                        print('Skipped:', temp[i], '   |   Estimated change:', round(estimates[i], 5))
+            points = [i for i in points if estimates[i] <= sensitivity_skip]
+    if evaluations is not None:
+        for i in [i for i in points if tuple(temp[i]) in evaluations]:
+            entry = evaluations[tuple(temp[i])]
+            if entry['status'] != 'Optimal' or not _accepts(temp[i], entry['objective']):
+                points.remove(i)
+            elif entry['path'] is not None:   # Move to the cached point without solving it again
+                points.remove(i)
+                fmin = entry['objective']
+                best_var = temp[i]
+                best_dir = i
+                best_dist = _distance(temp[i])
+                improve = True
+                best_path = entry['path']
+                if sensitivity is not None:  # No solved model to differentiate
+                    sensitivity.update(point=list(temp[i]), objective=fmin, derivatives=None)
+                if global_tee:
+                    print('Cached:', temp[i], '   |   Objective:', round(fmin, 5))
+    if workers != 1 and batch_size == 1 and screening is None:
+        # Solve the neighbors in worker processes and merge their results here, so that the acceptance and the cache are the same
+        if snapshot_writer is not None:  # The workers read init_path
+            snapshot_writer.flush()
+        build_args = {
+            'model_function': model_function,
+            'model_args': model_args,
+            'ext_dict': _plain_ext_dict(ext_dict),
+            'ext_logic': ext_logic,
+            'init_path': init_path,
+            'mip_transformation': mip_transformation,
+            'transformation': transformation,
+        }
+        t_remaining = timelimit - (time.perf_counter() - current_time)
+        solve_args = {
+            'subproblem_solver': subproblem_solver,
+            'subproblem_solver_options': subproblem_solver_options,
+            'timelimit': min(iter_timelimit, t_remaining),
+            'gams_output': gams_output,
+            'tee': tee,
+            'superstructure_bounds': superstructure_bounds,
+            'structural_check': structural_check,
+            'reduce_function': reduce_function,
+            'presolve': presolve,
+            'cutoff': _cutoff(),
+            'bound_function': bound_function,
+        }
+        rows = []
+        if points and t_remaining > 0:
+            rows = run_sweep([{'point': temp[i], 'build_args': build_args, 'solve_args': solve_args} for i in points],
+                             _solve_neighbor_case, workers=workers, tee=False)
+        t_end = time.perf_counter()
+        for i, row in zip(points, rows):
+            if 'status' not in row:  # The worker raised an exception, the neighbor is not marked as evaluated
+                if global_tee:
+                    print('Failed:', temp[i], '   |   ', row['Status'])
+                continue
+            evaluation_time += row['usertime']
+            if _record(i, row['status'], row['objective'], row['bound'], t_end):
+                m_solved, ext_dict = _build_neighbor(temp[i], **dict(build_args, ext_dict=ext_dict))
+                from_json(m_solved, sd=row['state'], wts=StoreSpec.value())
+                _move(i, row['objective'], m_solved)
+                if sensitivity is not None:  # No solved model to differentiate
+                    sensitivity.update(point=list(temp[i]), objective=fmin, derivatives=None)
+        points = []  # All solved
+    for start in range(0, len(points), batch_size):   # Solve all models
+        batch = []
+        for i in points[start:start + batch_size]:
+            m_fixed, ext_dict = _build_neighbor(temp[i], model_function, model_args, ext_dict, ext_logic, init_path=init_path,
+                                                mip_transformation=mip_transformation, transformation=transformation,
+                                                solver_session=solver_session if batch_size == 1 else None,
+                                                writer=snapshot_writer)
+            if sensitivity is not None and m_fixed.component('dual') is None:
+                m_fixed.dual = pe.Suffix(direction=pe.Suffix.IMPORT)
+            batch.append((i, m_fixed))
+        t_remaining = min(iter_timelimit*len(batch), timelimit -
+                          (time.perf_counter() - current_time))
+        if t_remaining < 0:  # No time reamining for optimization
+            break
+        models = [m_fixed for _, m_fixed in batch]
+        if screening is None:
+            solved = _solve_neighbors(models, subproblem_solver, subproblem_solver_options, t_remaining)
+        else:
+            # Screen the neighbors with a loose solve and solve at full fidelity only those close to fmin
+            solved = _solve_neighbors(models, screening['solver'], screening['solver_options'],
+                                      min(screening['timelimit']*len(batch), t_remaining), rel_tol=screening['rel_tol'])
+            promoted = []
+            for (i, _), m_screened in zip(batch, solved):
+                obj = pe.value(m_screened.obj) if m_screened.dsda_status == 'Optimal' else None
+                m_screened.dsda_screening = {'solver': screening['solver'], 'status': m_screened.dsda_status,
+                                             'objective': obj, 'usertime': m_screened.dsda_usertime,
+                                             'promoted': obj is not None and obj <= fmin + screening['margin']*(abs(fmin)+epsilon)}
+                if m_screened.dsda_screening['promoted']:
+                    promoted.append(m_screened)
+                    evaluation_time += m_screened.dsda_usertime
+                elif m_screened.dsda_status == 'Optimal':
+                    m_screened.dsda_status = 'Screened_Out'
+                    if global_tee:
+                        print('Screened:', temp[i], '   |   Screening objective:', round(obj, 5))
+                elif m_screened.dsda_status == 'Evaluated_Infeasible':  # Only the loose solve failed, see dsda_screening
+                    m_screened.dsda_status = 'Screening_Failed'
+                    if global_tee:
+                        print('Screening failed:', temp[i], '   |   Screening status:', m_screened.dsda_screening['status'])
+            t_remaining = min(iter_timelimit*len(promoted), timelimit -
                               (time.perf_counter() - current_time))
             if t_remaining < 0:  # No time reamining for optimization
                 break
-            m_solved = solve_subproblem(
-                m=m_fixed,
-                subproblem_solver=subproblem_solver,
-                subproblem_solver_options=subproblem_solver_options,
-                timelimit=t_remaining,
-                gams_output=gams_output,
-                tee=tee)
-            evaluation_time += m_solved.dsda_usertime
-            ns_evaluated.append(temp[i])
-            t_end = time.perf_counter()
+            _solve_neighbors(promoted, subproblem_solver, subproblem_solver_options, t_remaining)
+        t_end = time.perf_counter()
 
-            if m_solved.dsda_status == 'Optimal':   # Check if D-SDA status is optimal
-                if global_tee:
-                    print('Evaluated:', temp[i], '   |   Objective:', round(pe.value(
-                        m_solved.obj), 5), '   |   Global Time:', round(t_end - current_time, 2))
-                dist = sum((x-y)**2 for x, y in zip(temp[i], here))
-                act_obj = pe.value(m_solved.obj)
+        for (i, _), m_solved in zip(batch, solved):
+            evaluation_time += m_solved.dsda_usertime
+            act_obj = pe.value(m_solved.obj) if m_solved.dsda_status == 'Optimal' else None
+            if _record(i, m_solved.dsda_status, act_obj, getattr(m_solved, 'dsda_bound', None), t_end):
+                _move(i, act_obj, m_solved)
+                if sensitivity is not None:
+                    _update_sensitivity(sensitivity, m_solved, temp[i], act_obj, ext_dict)
 
-                # Assuming minimization problem
-                # Implements heuristic of largest move
-                if not improve:
-                    # We want a minimum improvement in the first found solution
-                    if (fmin - act_obj) > min_improve or (fmin - act_obj)/(abs(fmin)+epsilon) > min_improve_rel:
-                        fmin = act_obj
-                        best_var = temp[i]
-                        best_dir = i
-                        best_dist = dist
-                        improve = True
-                        best_path = generate_initialization(
-                            m_solved, starting_initialization=False, model_name='best')
-                else:
-                    # We want slightly worse solutions if the distance is larger
-                    if (((act_obj - fmin) < abs_tol) or ((act_obj - fmin)/(abs(fmin)+epsilon) < rel_tol)) and dist >= best_dist:
-                        fmin = act_obj
-                        best_var = temp[i]
-                        best_dir = i
-                        best_dist = dist
-                        improve = True
-                        best_path = generate_initialization(
-                            m_solved, starting_initialization=False, model_name='best')
-
-            if time.perf_counter() - current_time > timelimit:  # current
-                break
+        if time.perf_counter() - current_time > timelimit:  # current
+            break
 
     if global_tee:
         print()
@@ -935,7 +2781,16 @@ def do_line_search(
     global_tee: bool = False,
     rel_tol: float = 1e-3,
     global_evaluated: list = [],
-    init_path=None
+    init_path=None,
+    superstructure_bounds: dict = None,
+    structural_check: bool = False,
+    reduce_function=None,
+    presolve: bool = True,
+    history_base: str = None,
+    snapshot_writer: SnapshotWriter = None,
+    sensitivity: dict = None,
+    evaluations: dict = None,
+    solver_session: dict = None,
 ):
     """
     Function that moves in a given "best direction" and evaluates the new moved point
@@ -961,6 +2816,15 @@ def do_line_search(
         rel_tol: Relative optimality tolerance
         global_evaluated: list with points already evaluated
         init_path: path to initialization file
+        superstructure_bounds: Bound snapshot from get_superstructure_bounds to be used in the FBBT feasibility check
+        structural_check: Skip the subproblems that are structurally singular without calling the solver
+        reduce_function: Function that eliminates variables from each fixed subproblem before solving it (see solve_subproblem)
+        presolve: Presolve each fixed subproblem before solving it (see presolve_problem)
+        history_base: Path of a json file of the model, if given every improving point is kept as a delta snapshot of it instead of overwriting the best one
+        snapshot_writer: SnapshotWriter used to write the json file of the best point in the background
+        sensitivity: Sensitivity state of the incumbent (see solve_with_dsda), moved to the new point if the line search improves
+        evaluations: Evaluation cache shared between searches (see evaluate_neighbors)
+        solver_session: Solver session from get_solver_session used to build and solve the moved point (see _session_neighbor)
     Returns:
         fmin: Type int and gives the moved point objective
         best_var: Type list and gives the moved point
@@ -981,6 +2845,9 @@ def do_line_search(
     moved = False
     new_path = init_path
 
+    def _improves(act_obj):
+        return (fmin - act_obj) > min_improve or (fmin - act_obj)/(abs(fmin)+epsilon) > min_improve_rel
+
     # Line search in given direction
     moved_point = list(map(sum, zip(list(start), list(direction))))
     checked = 0
@@ -988,24 +2855,28 @@ def do_line_search(
         if moved_point[j] >= min_allowed[j+1] and moved_point[j] <= max_allowed[j+1]:
             checked += 1
 
-    if checked == len(moved_point):     # Solve model
+    entry = evaluations.get(tuple(moved_point)) if evaluations is not None else None
+    if entry is not None and entry['status'] == 'Optimal' and entry['path'] is None and _improves(entry['objective']):
+        entry = None    # Its json file was not kept, solve it again
+    if checked == len(moved_point) and entry is not None:
+        # Cached point, only moved to if it improves
+        if entry['status'] == 'Optimal' and _improves(entry['objective']):
+            fmin = entry['objective']
+            best_var = moved_point
+            moved = True
+            new_path = entry['path']
+            if sensitivity is not None:  # No solved model to differentiate
+                sensitivity.update(point=list(moved_point), objective=fmin, derivatives=None)
+            if global_tee:
+                print('Cached:', moved_point, '   |   Objective:', round(fmin, 5))
+
+    elif checked == len(moved_point):     # Solve model
         if moved_point not in global_evaluated:
-            m = model_function(**model_args)
-            m_init = initialize_model(m, json_path=init_path)
-            if mip_transformation:  # If you want a MIP reformulation, go ahead and use it'
-                m_init, ext_dict = extvars_gdp_to_mip(
-                    m=m,
-                    gdp_dict_extvar=ext_dict,
-                    transformation=transformation,
-                )
-            m_fixed = external_ref(
-                m=m_init,
-                x=moved_point,
-                extra_logic_function=ext_logic,
-                dict_extvar=ext_dict,
-                mip_ref=mip_transformation,
-                tee=False,
-            )
+            m_fixed, ext_dict = _build_neighbor(moved_point, model_function, model_args, ext_dict, ext_logic, init_path=init_path,
+                                                mip_transformation=mip_transformation, transformation=transformation,
+                                                solver_session=solver_session, writer=snapshot_writer)
+            if sensitivity is not None and m_fixed.component('dual') is None:
+                m_fixed.dual = pe.Suffix(direction=pe.Suffix.IMPORT)
 
             t_remaining = min(iter_timelimit, timelimit -
                               (time.perf_counter() - current_time))
@@ -1018,9 +2889,17 @@ def do_line_search(
                 timelimit=t_remaining,
                 gams_output=gams_output,
                 tee=tee,
+                superstructure_bounds=superstructure_bounds,
+                structural_check=structural_check,
+                reduce_function=reduce_function,
+                presolve=presolve,
+                solver_session=solver_session,
             )
             ls_time += m_solved.dsda_usertime
             ls_evaluated.append(moved_point)
+            if evaluations is not None:
+                evaluations[tuple(moved_point)] = {'status': m_solved.dsda_status, 'path': None,
+                                                   'objective': pe.value(m_solved.obj) if m_solved.dsda_status == 'Optimal' else None}
 
             if m_solved.dsda_status == 'Optimal':   # Check status
                 if global_tee:
@@ -1028,12 +2907,16 @@ def do_line_search(
                         m_solved.obj), 5), '   |   Global Time:', round(time.perf_counter() - current_time, 2))
                 act_obj = pe.value(m_solved.obj)
                 # Return moved point
-                if (fmin - act_obj) > min_improve or (fmin - act_obj)/(abs(fmin)+epsilon) > min_improve_rel:
+                if _improves(act_obj):
                     fmin = act_obj
                     best_var = moved_point
                     moved = True
                     new_path = generate_initialization(
-                        m_solved, starting_initialization=False, model_name='best')
+                        m_solved, starting_initialization=False, model_name=_history_name(moved_point, history_base), base_path=history_base, writer=snapshot_writer)
+                    if evaluations is not None and history_base is not None:
+                        evaluations[tuple(moved_point)]['path'] = new_path
+                    if sensitivity is not None:
+                        _update_sensitivity(sensitivity, m_solved, moved_point, act_obj, ext_dict)
 
     return fmin, best_var, moved, ls_time, ls_evaluated, new_path
 
@@ -1057,6 +2940,25 @@ def solve_with_dsda(
     tee: bool = False,
     global_tee: bool = True,
     rel_tol: float = 1e-3,
+    cache_bounds: bool = False,
+    obbt: bool = False,
+    obbt_solver: str = 'baron',
+    structural_check: bool = False,
+    reduce_function=None,
+    presolve: bool = True,
+    keep_history: bool = False,
+    async_snapshots: bool = False,
+    batch_size: int = 1,
+    screening: dict = None,
+    prune: bool = False,
+    bound_function=None,
+    sensitivity: bool = False,
+    sensitivity_skip: float = None,
+    radius: int = 1,
+    radius_workers: int = None,
+    init_path: str = None,
+    evaluations: dict = None,
+    solver_session: dict = None,
 ):
     """
     Function that computes Discrete-Steepest Descend Algorithm
@@ -1078,12 +2980,51 @@ def solve_with_dsda(
         tee: Display iteration output
         global_tee: Display D-SDA output
         rel_tol: Relative optimality tolerance
+        cache_bounds: Tighten the superstructure bounds once and reuse them in the FBBT check of every subproblem
+        obbt: Use OBBT on the relaxation of the superstructure when caching the bounds
+        obbt_solver: Solver used for OBBT
+        structural_check: Skip the subproblems that are structurally singular without calling the solver
+        reduce_function: Function that eliminates variables from each fixed subproblem before solving it (see solve_subproblem)
+        presolve: Presolve each fixed subproblem before solving it (see presolve_problem)
+        keep_history: Keep the solution of every point in the route as a json file, stored as a delta snapshot of the starting point
+        async_snapshots: Write the json files of the best points from a background thread while the search goes on
+        batch_size: Number of neighbors solved together with one solve statement in the neighbor search (see evaluate_neighbors and
+            solve_subproblem_batch). The number of evaluated points is stored in m2_solved.dsda_evaluated, to compare the cost per point
+        screening: Screen the neighbors with a loose solve before solving them at full fidelity (see evaluate_neighbors)
+        prune: Do not solve the neighbors whose objective lower bound shows they cannot improve the incumbent. The pruned points and their
+            bounds are stored in m2_solved.dsda_pruned. Without bound_function only the interval bound of the objective is used, which
+            is often too weak to prune anything (e.g. 0 for the CSTR)
+        bound_function: Function that returns a lower bound of the objective of each fixed neighbor, e.g. get_relaxation_bound (see
+            get_objective_bound)
+        sensitivity: Import the duals of every subproblem and use them to order the neighbors by their estimated objective change
+            (see get_sensitivities). Requires mip_transformation. The estimate-versus-actual records are stored in m2_solved.dsda_sensitivity.
+            It turns presolve off, since the constraints that presolve turns into variable bounds have no duals, and solves the neighbors
+            one at a time (batch_size=1), since batch solves only import the duals of the batch model
+        sensitivity_skip: Do not solve the neighbors whose estimated objective change is larger than this value (see evaluate_neighbors)
+        radius: When the steepest descent stalls, evaluate all the points within this L-infinity radius of the incumbent (see
+            neighborhood_radius) and restart the descent from the best one if it improves. Points already evaluated are not solved again,
+            and the others are solved in parallel (see radius_workers). If no better point is found the radius is stored in m2_solved.dsda_radius
+        radius_workers: Number of points of the radius enumeration solved at the same time in worker processes, merged in this process
+            with the evaluation cache (see evaluate_neighbors). By default the number of available cores, so a D-SDA run pinned to a core
+            by run_sweep solves them one after another. Ignored with batch_size > 1 or screening
+        init_path: Path of a json file used instead of feasible_model to initialize the starting point
+        evaluations: Evaluation cache shared with other searches, e.g. earlier descents (see evaluate_neighbors). Use it with keep_history,
+            so that the cached points keep their json files
+        solver_session: Solver session from get_solver_session used to build and solve the neighbors and the line search points, so
+            that the model of the structure is built once and only its fixings are updated between points (see _session_neighbor).
+            The points of the radius enumeration solved in worker processes do not use it
     Returns:
         m2_solved: Solved Pyomo Model
         route: List containing points evaluated in throughout iteration
         obj_route: List containing objectives evaluated in throughout iteration
+    Raises:
+        ValueError: If sensitivity is used without mip_transformation, or solver_session with reduce_function
 
     """
+    if sensitivity and not mip_transformation:
+        raise ValueError('sensitivity needs mip_transformation, the duals of the GDP subproblems are not imported')
+    if solver_session is not None and reduce_function is not None:
+        raise ValueError('solver_session cannot be used with reduce_function, the eliminated variables are not restored')
 
     if global_tee:
         print('\nStarting D-SDA with k =', k)
@@ -1093,7 +3034,11 @@ def solve_with_dsda(
     route = []
     obj_route = []
     global_evaluated = []
+    pruned = {}
     ext_var = starting_point
+    if sensitivity:  # The estimates need the duals of every constraint of each subproblem
+        presolve = False
+        batch_size = 1
 
     # Check if  feasible initialization is provided
     m = model_function(**model_args)
@@ -1104,9 +3049,18 @@ def solve_with_dsda(
 
     t_start = time.perf_counter()
     dsda_usertime = 0
+    superstructure_bounds = None
+    if cache_bounds:
+        superstructure_bounds = get_superstructure_bounds(
+            model_function(**model_args),
+            obbt=obbt,
+            obbt_solver=obbt_solver,
+            timelimit=iter_timelimit,
+        )
+
     if provide_starting_initialization:
         m_init = initialize_model(
-            m, from_feasible=True, feasible_model=feasible_model, json_path=None)
+            m, from_feasible=True, feasible_model=feasible_model, json_path=init_path)
     else:
         m_init = m
 
@@ -1125,6 +3079,8 @@ def solve_with_dsda(
         mip_ref=mip_transformation,
         tee=False
     )
+    if sensitivity:
+        m_fixed.dual = pe.Suffix(direction=pe.Suffix.IMPORT)
 
     # Solve for initialization
     m_solved = solve_subproblem(
@@ -1134,6 +3090,10 @@ def solve_with_dsda(
         timelimit=iter_timelimit,
         gams_output=gams_output,
         tee=tee,
+        superstructure_bounds=superstructure_bounds,
+        structural_check=structural_check,
+        reduce_function=reduce_function,
+        presolve=presolve,
     )
     dsda_usertime += m_solved.dsda_usertime
     fmin = pe.value(m_solved.obj)
@@ -1142,12 +3102,27 @@ def solve_with_dsda(
         print('Evaluated:', ext_var, '   |   Objective:', round(fmin, 5),
               '   |   Global Time:', round(time.perf_counter() - t_start, 2))
 
+    sensitivity_state = None
+    if sensitivity:
+        sensitivity_state = {'accuracy': [], 'skipped': []}
+        _update_sensitivity(sensitivity_state, m_solved, ext_var, fmin, dict_extvar)
+
     # m_solved.pprint()
-    best_path = generate_initialization(m_solved)
+    snapshot_writer = SnapshotWriter() if async_snapshots else None
+    if keep_history:
+        best_path = generate_initialization(
+            m_solved, model_name='start_' + '_'.join(str(x) for x in ext_var), writer=snapshot_writer)
+        history_base = best_path
+    else:
+        best_path = generate_initialization(m_solved, writer=snapshot_writer)
+        history_base = None
 
     route.append(ext_var)
     obj_route.append(fmin)
     global_evaluated.append(ext_var)
+    if evaluations is not None:
+        evaluations[tuple(ext_var)] = {'status': m_solved.dsda_status, 'path': best_path if keep_history else None,
+                                       'objective': fmin if m_solved.dsda_status == 'Optimal' else None}
 
     # Define neighborhood
     if k == '2':
@@ -1155,8 +3130,14 @@ def solve_with_dsda(
     elif k == 'Infinity':
         neighborhood = neighborhood_k_eq_inf(len(ext_var))
     else:
+        if snapshot_writer is not None:
+            snapshot_writer.close()
         return "Enter a valid neighborhood ('Infinity' or '2')"
 
+    searched = neighborhood
+    if radius > 1:
+        radius_neighborhood = neighborhood_radius(len(ext_var), radius)
+    certified_radius = None
     looking_in_neighbors = True
 
     # Look in neighbors (outer cycle)
@@ -1166,7 +3147,7 @@ def solve_with_dsda(
             break
 
         # Find neighbors of the actual point
-        neighbors = find_actual_neighbors(ext_var, neighborhood,
+        neighbors = find_actual_neighbors(ext_var, searched,
                                           min_allowed=min_allowed, max_allowed=max_allowed)
 
         if time.perf_counter() - t_start > timelimit:
@@ -1192,13 +3173,39 @@ def solve_with_dsda(
             rel_tol=rel_tol,
             global_evaluated=global_evaluated,
             init_path=best_path,
+            superstructure_bounds=superstructure_bounds,
+            structural_check=structural_check,
+            reduce_function=reduce_function,
+            presolve=presolve,
+            history_base=history_base,
+            snapshot_writer=snapshot_writer,
+            batch_size=batch_size,
+            screening=screening,
+            prune=prune,
+            bound_function=bound_function,
+            pruned=pruned,
+            sensitivity=sensitivity_state,
+            sensitivity_skip=sensitivity_skip,
+            evaluations=evaluations,
+            workers=1 if searched is neighborhood else radius_workers,
+            solver_session=solver_session,
         )
 
         dsda_usertime += eval_time
         global_evaluated = global_evaluated + ns_evaluated
 
         # Stopping condition in case there is no improvement amongst neighbors
-        if improve:
+        if improve and searched is not neighborhood:
+            # Better point within the radius, restart the steepest descent from it
+            ext_var = best_var
+            searched = neighborhood
+            route.append(best_var)
+            obj_route.append(fmin)
+            if global_tee:
+                print()
+                print('New best point:', best_var)
+
+        elif improve:
             line_searching = True
             route.append(best_var)
             obj_route.append(fmin)
@@ -1234,6 +3241,15 @@ def solve_with_dsda(
                     rel_tol=rel_tol,
                     global_evaluated=global_evaluated,
                     init_path=best_path,
+                    superstructure_bounds=superstructure_bounds,
+                    structural_check=structural_check,
+                    reduce_function=reduce_function,
+                    presolve=presolve,
+                    history_base=history_base,
+                    snapshot_writer=snapshot_writer,
+                    sensitivity=sensitivity_state,
+                    evaluations=evaluations,
+                    solver_session=solver_session,
                 )
                 global_evaluated = global_evaluated + ls_evaluated
                 dsda_usertime += ls_time
@@ -1252,16 +3268,31 @@ def solve_with_dsda(
                         print()
                         print('New best point:', best_var)
 
+        elif radius > 1 and searched is neighborhood:
+            # Steepest descent stalled, enumerate the points within the radius of the incumbent (see radius_workers)
+            searched = radius_neighborhood
+            if global_tee:
+                print()
+                print('Radius', radius, 'enumeration around:', ext_var)
+
         else:
+            if radius > 1 and time.perf_counter() - t_start <= timelimit:
+                certified_radius = radius
             looking_in_neighbors = False
 
     t_end = round(time.perf_counter() - t_start, 2)
+    if snapshot_writer is not None:  # all json files written before returning
+        snapshot_writer.close()
 
     # Generate final solved model
     m2 = model_function(**model_args)
     m2_solved = initialize_model(m2, json_path=best_path)
     m2_solved.dsda_time = t_end
     m2_solved.dsda_usertime = dsda_usertime
+    m2_solved.dsda_pruned = pruned
+    m2_solved.dsda_sensitivity = sensitivity_state
+    m2_solved.dsda_radius = certified_radius
+    m2_solved.dsda_evaluated = len(global_evaluated)
     if t_end > timelimit:
         m2_solved.dsda_status = 'maxTimeLimit'
     else:
@@ -1274,6 +3305,212 @@ def solve_with_dsda(
         print('External variables:', route[-1])
         print('Execution time [s]:', t_end)
         print('User time [s]:', round(dsda_usertime, 5))
+        if sensitivity:
+            accuracy = get_sensitivity_accuracy(sensitivity_state['accuracy'])
+            print('Sensitivity estimates:', accuracy['n'], '   |   Mean abs. error:', accuracy['mean_abs_error'],
+                  '   |   Sign agreement:', accuracy['sign_agreement'], '   |   Skipped:', len(sensitivity_state['skipped']))
+
+    return m2_solved, route, obj_route
+
+
+def get_perturbation(
+    point: list,
+    step: int,
+    min_allowed: dict,
+    max_allowed: dict,
+    excluded=None,
+    perturbation: str = 'random',
+    rng: random.Random = None,
+    attempt: int = 0,
+) -> list:
+    """
+    Function that perturbs a point to a new one at an L-infinity distance step from it
+    Args:
+        point: Point to be perturbed
+        step: L-infinity distance of the perturbation
+        min_allowed: In keys contains external variables and in items their respective lower bounds
+        max_allowed: In keys contains external variables and in items their respective upper bounds
+        excluded: Function that returns True for the points that cannot be used (e.g. tabu points)
+        perturbation: 'random' moves every external variable randomly with at least one of them moved by step, 'structured' moves one
+            external variable by +step or -step, going through the variables and signs in order starting from attempt
+        rng: Random number generator of the random perturbations
+        attempt: Number of perturbations already tried from this point, for the structured perturbations
+    Returns:
+        new_point: Perturbed point, None if no valid point is found
+    """
+    rng = rng or random.Random()
+    dimension = len(point)
+    if perturbation == 'structured':
+        moves = [(j, sign) for j in range(dimension) for sign in (1, -1)]
+        candidates = []
+        for n in range(len(moves)):
+            j, sign = moves[(attempt + n) % len(moves)]
+            new_point = list(point)
+            new_point[j] += sign*step
+            candidates.append(new_point)
+    else:
+        candidates = []
+        for _ in range(100):
+            direction = [rng.randint(-step, step) for _ in range(dimension)]
+            direction[rng.randrange(dimension)] = rng.choice([-step, step])
+            candidates.append(list(map(sum, zip(point, direction))))
+
+    for new_point in candidates:
+        if all(min_allowed[j+1] <= new_point[j] <= max_allowed[j+1] for j in range(dimension)) and \
+                not (excluded is not None and excluded(new_point)):
+            return new_point
+    return None
+
+
+def solve_with_tabu_dsda(
+    model_function,
+    model_args: dict,
+    starting_point: list,
+    ext_dict,
+    ext_logic,
+    dsda_args: dict = {},
+    restarts: int = 10,
+    tabu_tenure: int = 10,
+    perturbation: str = 'random',
+    strength: int = 2,
+    pool_size: int = 5,
+    seed: int = None,
+    timelimit: float = 3600,
+    global_tee: bool = True,
+):
+    """
+    Function that escapes from the local optima of D-SDA with a tabu search over restarts: every descent (solve_with_dsda) ends in a
+    local optimum, which is perturbed to start the next descent away from the tabu points. All the descents share one evaluation
+    cache, so that no point is solved twice
+    Args:
+        model_function: function that returns GDP model to be solved
+        model_args: Contains the argument values needed for model_function
+        starting_point: Feasible external variable initial point
+        ext_dict: Dictionary with Boolean variables to be reformulated (keys) and their corresponding ordered sets (values). Both keys and values are pyomo objects.
+        ext_logic: Function that returns a list of lists of the form [a,b], where a is an expressions of the reformulated Boolean variables and b is an equivalent Boolean or indicator variable (b<->a).
+        dsda_args: Contains the other argument values of solve_with_dsda used in every descent
+        restarts: Maximum number of descents after the first one
+        tabu_tenure: Number of recent local optima and starting points kept in the tabu list. A perturbed point cannot be within an
+            L-infinity distance 1 of a tabu point, nor a point evaluated before
+        perturbation: Perturbation of the best point found to start each descent, 'random' or 'structured' (see get_perturbation)
+        strength: L-infinity distance of the first perturbation. It grows by one after every descent that does not improve the best point,
+            and goes back to strength after an improvement
+        pool_size: Number of best distinct points kept in the solution pool
+        seed: Seed of the random perturbations
+        timelimit: time limit in seconds for the algorithm. A new descent is only started if the remaining time is at least the mean
+            time of the previous descents
+        global_tee: Display D-SDA output
+    Returns:
+        m2_solved: Solved Pyomo Model of the best point, with the solution pool (list of dictionaries with the 'point', 'objective' and
+            json 'path') in m2_solved.dsda_pool and the evaluation cache in m2_solved.dsda_evaluations
+        route: List containing points evaluated in throughout iteration
+        obj_route: List containing objectives evaluated in throughout iteration
+
+    """
+    # Global Tolerance parameters
+    epsilon = 1e-10
+    min_improve = 1e-5
+    min_improve_rel = 1e-3
+
+    # Initialize
+    t_start = time.perf_counter()
+    rng = random.Random(seed)
+    evaluations = {}
+    tabu = deque(maxlen=tabu_tenure)
+    route = []
+    obj_route = []
+    descent_times = []
+    dsda_usertime = 0
+    best = None
+    step = strength
+    attempt = 0
+    start = list(starting_point)
+    init_path = None
+
+    m = model_function(**model_args)
+    _, _, min_allowed, max_allowed = get_external_information(m, ext_dict)
+    max_step = max(max_allowed[j] - min_allowed[j] for j in min_allowed)
+
+    def _excluded(point):
+        return tuple(point) in evaluations or any(max(abs(x-y) for x, y in zip(point, t)) <= 1 for t in tabu)
+
+    for descent in range(restarts + 1):
+        t_descent = time.perf_counter()
+        if global_tee:
+            print('\nTabu D-SDA descent', descent, 'from', start)
+        args = dict(dsda_args, timelimit=timelimit - (t_descent - t_start), global_tee=global_tee,
+                    keep_history=True, init_path=init_path, evaluations=evaluations)
+        m_solved, descent_route, descent_obj_route = solve_with_dsda(
+            model_function=model_function,
+            model_args=model_args,
+            starting_point=start,
+            ext_dict=ext_dict,
+            ext_logic=ext_logic,
+            **args,
+        )
+        descent_times.append(time.perf_counter() - t_descent)
+        dsda_usertime += m_solved.dsda_usertime
+        route = route + descent_route
+        obj_route = obj_route + descent_obj_route
+        tabu.append(tuple(start))
+        tabu.append(tuple(descent_route[-1]))
+
+        # Best point with a json file, from any descent
+        kept = [(e['objective'], x) for x, e in evaluations.items() if e['status'] == 'Optimal' and e['path'] is not None]
+        if kept:
+            f_kept, x_kept = min(kept)
+            if best is None or (best[0] - f_kept) > min_improve or (best[0] - f_kept)/(abs(best[0])+epsilon) > min_improve_rel:
+                best = (f_kept, x_kept)
+                step = strength
+                attempt = 0
+            else:
+                step = min(step + 1, max_step)
+                attempt += 1
+        if best is None:  # Not even the starting point was solved
+            break
+
+        # Restart policy
+        t_remaining = timelimit - (time.perf_counter() - t_start)
+        if descent == restarts or t_remaining < sum(descent_times)/len(descent_times):
+            break
+        start = None
+        while start is None and step <= max_step:
+            start = get_perturbation(list(best[1]), step, min_allowed, max_allowed, excluded=_excluded,
+                                     perturbation=perturbation, rng=rng, attempt=attempt)
+            if start is None:
+                step += 1
+        if start is None:  # Every perturbation is tabu or evaluated
+            break
+        init_path = evaluations[best[1]]['path']
+
+    t_end = round(time.perf_counter() - t_start, 2)
+    if best is None:
+        return m_solved, route, obj_route
+
+    pool = sorted((e['objective'], x) for x, e in evaluations.items() if e['status'] == 'Optimal')[:pool_size]
+
+    # Generate final solved model
+    m2 = model_function(**model_args)
+    m2_solved = initialize_model(m2, json_path=evaluations[best[1]]['path'])
+    m2_solved.dsda_time = t_end
+    m2_solved.dsda_usertime = dsda_usertime
+    m2_solved.dsda_pool = [{'point': list(x), 'objective': f, 'path': evaluations[x]['path']} for f, x in pool]
+    m2_solved.dsda_evaluations = evaluations
+    if t_end > timelimit:
+        m2_solved.dsda_status = 'maxTimeLimit'
+    else:
+        m2_solved.dsda_status = 'optimal'
+
+    # Print results
+    if global_tee:
+        print('--------------------------------------------------------------------------')
+        print('Tabu D-SDA descents:', len(descent_times))
+        print('Objective:', round(best[0], 5))
+        print('External variables:', list(best[1]))
+        print('Solution pool:', [(entry['point'], round(entry['objective'], 5)) for entry in m2_solved.dsda_pool])
+        print('Evaluated points:', len(evaluations))
+        print('Execution time [s]:', t_end)
+        print('User time [s]:', round(dsda_usertime, 5))
 
     return m2_solved, route, obj_route
 
@@ -1301,6 +3538,7 @@ def visualize_dsda(
     Returns:
 
     """
+    import matplotlib.pyplot as plt  # The plotting stack is only loaded when plotting
 
     X1, X2 = feas_x, feas_y
     cm = plt.cm.get_cmap('viridis_r')
@@ -1338,7 +3576,12 @@ def solve_complete_external_enumeration(
     gams_output: bool = False,
     tee: bool = False,
     global_tee: bool = True,
-    export_csv: bool = False
+    export_csv: bool = False,
+    cache_bounds: bool = False,
+    structural_check: bool = False,
+    reduce_function=None,
+    presolve: bool = True,
+    solver_session: dict = None,
 ):
     """
     Function that computes complete enumeration using the external variable reformulation
@@ -1359,10 +3602,21 @@ def solve_complete_external_enumeration(
         tee: Display iteration output
         global_tee: Display D-SDA output
         export_csv: Export answer to a csv file
+        cache_bounds: Tighten the superstructure bounds once and reuse them in the FBBT check of every subproblem
+        structural_check: Skip the subproblems that are structurally singular without calling the solver
+        reduce_function: Function that eliminates variables from each fixed subproblem before solving it (see solve_subproblem)
+        presolve: Presolve each fixed subproblem before solving it (see presolve_problem)
+        solver_session: Solver session from get_solver_session used to build and solve the points, so that the model of the structure
+            is built once and only its fixings are updated between points (see _session_neighbor)
     Returns:
         m2_solved: Solved Pyomo Model
+    Raises:
+        ValueError: If solver_session is used with reduce_function
 
     """
+    if solver_session is not None and reduce_function is not None:
+        raise ValueError('solver_session cannot be used with reduce_function, the eliminated variables are not restored')
+
     results = {}
     feasibles = {}
     t_start = time.perf_counter()
@@ -1376,6 +3630,11 @@ def solve_complete_external_enumeration(
     dict_extvar, num_ext_var, min_allowed, max_allowed = get_external_information(
         m, ext_dict, tee=global_tee)
 
+    superstructure_bounds = None
+    if cache_bounds:
+        superstructure_bounds = get_superstructure_bounds(
+            model_function(**model_args))
+
     bounds = []
     for i in range(1, num_ext_var+1):
         bounds.append(list(range(min_allowed[i], max_allowed[i]+1)))
@@ -1390,31 +3649,16 @@ def solve_complete_external_enumeration(
         print('\nStarting Complete Enumeration of External Variables')
         print('----------------------------------------------------------------------------------------------')
 
+    feasible_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), feasible_model + '_initialization.json')
+    if mip_transformation:
+        csv_file = 'compl_enum_'+str(feasible_model) + \
+            '_'+str(subproblem_solver)+'_' + transformation + '.csv'
+
     for i in points:
         new_result = {}
-        m = model_function(**model_args)
-        m_init = initialize_model(
-            m=m,
-            from_feasible=True,
-            feasible_model=feasible_model,
-            json_path=None,
-        )
-        if mip_transformation:  # If you want a MIP reformulation, go ahead and use it
-            csv_file = 'compl_enum_'+str(feasible_model) + \
-                '_'+str(subproblem_solver)+'_' + transformation + '.csv'
-            m_init, dict_extvar = extvars_gdp_to_mip(
-                m=m,
-                gdp_dict_extvar=dict_extvar,
-                transformation=transformation,
-            )
-        m_fixed = external_ref(
-            m=m_init,
-            x=list(i),
-            extra_logic_function=ext_logic,
-            dict_extvar=dict_extvar,
-            mip_ref=mip_transformation,
-            tee=False,
-        )
+        m_fixed, dict_extvar = _build_neighbor(list(i), model_function, model_args, dict_extvar, ext_logic, init_path=feasible_path,
+                                               mip_transformation=mip_transformation, transformation=transformation,
+                                               solver_session=solver_session)
         t_remaining = min(iter_timelimit, timelimit -
                           (time.perf_counter() - t_start))
         if t_remaining < 0:  # No time remaining for optimization
@@ -1426,6 +3670,11 @@ def solve_complete_external_enumeration(
             timelimit=t_remaining,
             gams_output=gams_output,
             tee=tee,
+            superstructure_bounds=superstructure_bounds,
+            structural_check=structural_check,
+            reduce_function=reduce_function,
+            presolve=presolve,
+            solver_session=solver_session,
         )
 
         results[i] = (m_solved.dsda_status, pe.value(m_solved.obj))
@@ -1440,7 +3689,7 @@ def solve_complete_external_enumeration(
         if export_csv:
             dir_path = os.path.dirname(os.path.abspath(__file__))
             csv_file = os.path.join(dir_path, "../../results", csv_file)
-            if m_solved.dsda_status != 'FBBT_Infeasible':
+            if m_solved.dsda_status not in ['FBBT_Infeasible', 'Structurally_Infeasible']:
                 new_result = {'Point': list(i), 'x': i[0], 'y': i[1], 'Objective': pe.value(
                     m_solved.obj), 'Status': m_solved.dsda_status, 'Time': m_solved.results.solver.user_time, 'Global_Time': time.perf_counter()-t_start}
                 dict_data.append(new_result)
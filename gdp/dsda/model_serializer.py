@@ -16,7 +16,13 @@ Functions for saving and loading Pyomo objects to json
 
 import datetime
 import gzip
+import hashlib
 import json
+import operator
+import os
+import queue
+import re
+import threading
 import time
 
 from pyomo.core.base.component import ComponentData
@@ -556,8 +562,695 @@ def component_data_to_dict(o, wts):
     return edict
 
 
+class _PlanMismatch(Exception):
+    """
+    Raised when a model no longer matches the access plan compiled for it.
+    """
+    pass
+
+
+class _PlanEntry(object):
+    """
+    Location and attribute accessors of one component in an access plan.
+    """
+    __slots__ = ("parent", "position", "name", "path", "attrs", "ff",
+                 "data", "data_ff", "expand")
+
+    def __init__(self, parent, position, name, path, ff):
+        self.parent = parent  # index of the entry of the parent component
+        self.position = position  # position of the parent block data
+        self.name = name  # local name of the component
+        self.path = path  # keys leading to the component dict in the state
+        self.attrs = []  # (attribute, slot, getter, setter) of the component
+        self.ff = ff  # component load filter function
+        self.data = []  # (position, key repr, attrs) of data with attributes
+        self.data_ff = None  # data load filter function
+        self.expand = False  # True if the component data must be collected
+
+
+class _AccessPlan(object):
+    """
+    An access plan is a flat list of the components of a model that a
+    StoreSpec reads or writes, with the attribute getters and setters of their
+    data and the json text around each stored value.  It is compiled once for
+    each model structure and StoreSpec, so later to_json and from_json calls
+    on models with the same structure replace the recursive walk through the
+    model by a loop over the plan.
+    """
+
+    def __init__(self):
+        self.entries = []  # components in the order they are written
+        self.n_slots = 0  # number of attribute values stored
+        self.n_components = 0  # number of components and component data
+        self.skeleton = {}  # state dict with value placeholders in the slots
+        self.templates = {}  # json text chunks for each dump format
+        self.etime_walk_write = None  # reference timings of the walk
+        self.etime_walk_read = None
+
+
+# Compiled access plans keyed by structural fingerprint and StoreSpec
+_access_plans = {}
+_max_access_plans = 32
+_cache_lock = threading.Lock()  # snapshots can be written from other threads
+# Placeholder for attribute values in the plan skeleton, slot -1 is metadata
+_slot_format = "\x00{}\x00"
+_slot_pattern = re.compile(r'"\\u0000(-?\d+)\\u0000"')
+
+
+def _structure_fingerprint(o):
+    """
+    Get a hashable fingerprint of the structure of a Pyomo component: name,
+    type, size and index of every component in the order they are stored.
+    The index keys are part of the fingerprint because the access plans and
+    structures store them, so components of the same size over other keys
+    (e.g. Var([1,2,3]) and Var([4,5,6])) get different fingerprints.
+    Args:
+        o: Pyomo component
+    Returns:
+        A tuple that is equal for components with the same structure
+    """
+    def size(c):
+        try:
+            if not c.is_indexed():
+                return None
+        except AttributeError:
+            return None
+        return len(c), hash(tuple(c.keys()))
+    fp = [(o.getname(fully_qualified=False), type(o), size(o))]
+    if isinstance(o, Block):
+        blocks = list(o.values())
+    elif _may_have_subcomponents(o):
+        blocks = [o]
+    else:
+        blocks = []
+    for b in blocks:
+        for c in b.component_objects(descend_into=False):
+            fp.append((c.local_name, type(c), size(c)))
+            if isinstance(c, Block):
+                blocks.extend(c.values())
+        fp.append(None)  # end of block
+    return tuple(fp)
+
+
+def _spec_signature(wts):
+    """
+    Get a hashable signature of the settings of a StoreSpec, so StoreSpec
+    objects created with the same settings share access plans.
+    """
+    def freeze(x):
+        return None if x is None else tuple(x)
+    return (
+        tuple(wts.classes), tuple(map(freeze, wts.class_attrs)),
+        tuple(wts.class_filter), tuple(wts.data_classes),
+        tuple(map(freeze, wts.data_class_attrs)), tuple(wts.data_class_filter),
+        wts.ignore_missing, wts.include_suffix, freeze(wts.suffix_filter),
+        tuple(sorted(wts.write_cbs.items())),
+        tuple(sorted(wts.read_cbs.items())))
+
+
+def _plan_getter(wts, a, default):
+    """
+    Get the function used to write attribute a, same as _write_component when
+    default is True and _write_component_data otherwise.
+    """
+    cb = wts.write_cbs.get(a)
+    if cb is not None:
+        return cb
+    if default:
+        return lambda x: getattr(x, a, None)
+    return operator.attrgetter(a)
+
+
+def _plan_setter(wts, a):
+    """
+    Get the function used to read attribute a, or None if it is not read.
+    """
+    if a in wts.read_cbs:
+        return wts.read_cbs[a]
+    return lambda x, v: setattr(x, a, v)
+
+
+def _compile_component(plan, sd, o, wts, parent=None, position=None, path=()):
+    """
+    Add a component to an access plan and its state to the plan skeleton,
+    following _write_component.
+    Args:
+        plan: _AccessPlan to add the component to
+        sd: skeleton dictionary to add the component state into
+        o: component to add
+        wts: StoreSpec object indicating what object attributes to store
+        parent: index of the plan entry of the component parent
+        position: position of the parent block data within its component
+        path: keys leading to sd from the top of the state dictionary
+    Returns:
+        None
+    """
+    alist, ff = wts.get_class_attr_list(o)
+    if alist is None:
+        return
+    oname = o.getname(fully_qualified=False)
+    entry = _PlanEntry(parent, position, oname, path + (oname,), ff)
+    index = len(plan.entries)
+    plan.entries.append(entry)
+    odict = sd[oname] = {"__type__": str(type(o))}
+    plan.n_components += 1
+    for a in alist:
+        odict[a] = _slot_format.format(plan.n_slots)
+        entry.attrs.append(
+            (a, plan.n_slots, _plan_getter(wts, a, True), _plan_setter(wts, a)))
+        plan.n_slots += 1
+    odict["data"] = {}
+    if isinstance(o, Suffix):
+        return  # suffixes are only stored with include_suffix
+    try:
+        item_keys = o.keys()
+    except AttributeError:
+        item_keys = [None]
+    for p, key in enumerate(item_keys):
+        if key is None and isinstance(o, ComponentData) \
+                and not isinstance(o, Component):
+            el = o
+        else:
+            el = o[key]
+        if p == 0:
+            dlist, entry.data_ff = wts.get_data_class_attr_list(el)
+            if dlist is None:
+                return
+        edict = odict["data"][repr(key)] = {"__type__": str(type(el))}
+        plan.n_components += 1
+        attrs = []
+        for a in dlist:
+            edict[a] = _slot_format.format(plan.n_slots)
+            attrs.append((a, plan.n_slots, _plan_getter(wts, a, False),
+                          _plan_setter(wts, a)))
+            plan.n_slots += 1
+        if attrs or entry.data_ff is not None:
+            entry.data.append((p, repr(key), attrs))
+            entry.expand = True
+        if _may_have_subcomponents(el):
+            for o2 in el.component_objects(descend_into=False):
+                if "__pyomo_components__" not in edict:
+                    edict["__pyomo_components__"] = {}
+                    entry.expand = True
+                _compile_component(
+                    plan, edict["__pyomo_components__"], o2, wts, parent=index,
+                    position=p, path=entry.path + (
+                        "data", repr(key), "__pyomo_components__"))
+
+
+def _get_access_plan(o, wts, compile=True):
+    """
+    Look up the access plan for a component and StoreSpec, compiling it if
+    it does not exist yet. Plans are only used for StoreSpecs that ignore
+    missing state and don't store suffixes.
+    Args:
+        o: Pyomo component
+        wts: StoreSpec object
+        compile: if False return None instead of compiling a missing plan
+    Returns:
+        The _AccessPlan object, or None if no plan can be used
+    """
+    if wts.include_suffix or not wts.ignore_missing:
+        return None
+    key = (_structure_fingerprint(o), _spec_signature(wts))
+    if key in _access_plans or not compile:
+        return _access_plans.get(key)
+    plan = _AccessPlan()
+    try:
+        _compile_component(plan, plan.skeleton, o, wts)
+    except Exception:
+        plan = None  # the walk handles this model, don't try again
+    with _cache_lock:
+        if len(_access_plans) >= _max_access_plans:
+            del _access_plans[next(iter(_access_plans))]
+        _access_plans[key] = plan
+    return plan
+
+
+def _plan_components(plan, o):
+    """
+    Locate the components of an access plan in a model.
+    Args:
+        plan: _AccessPlan object
+        o: Pyomo component with the structure the plan was compiled for
+    Yields:
+        Tuples of plan entry, component and list of component data
+    """
+    datas = [None] * len(plan.entries)
+    for i, entry in enumerate(plan.entries):
+        if entry.parent is None:
+            c = o
+        else:
+            c = datas[entry.parent][entry.position].component(entry.name)
+            if c is None:
+                raise _PlanMismatch(entry.name)
+        if entry.expand:
+            try:
+                datas[i] = list(c.values())
+            except AttributeError:
+                datas[i] = [c]
+        yield entry, c, datas[i]
+
+
+def _json_value(v):
+    """
+    Encode a stored attribute value the same way json.dumps does.
+    """
+    if v.__class__ is float:
+        if v != v:
+            return "NaN"
+        elif v == float("inf"):
+            return "Infinity"
+        elif v == -float("inf"):
+            return "-Infinity"
+        return float.__repr__(v)
+    elif v is None:
+        return "null"
+    return json.dumps(v)
+
+
+def _plan_write(plan, o, metadata, dump_kw):
+    """
+    Write the state of a model to json text with an access plan.
+    Args:
+        plan: _AccessPlan object
+        o: Pyomo component with the structure the plan was compiled for
+        metadata: the "__metadata__" dictionary, called after the component
+            state is collected so it can include timings
+        dump_kw: json.dumps keyword arguments
+    Returns:
+        json text
+    """
+    values = [None] * plan.n_slots
+    for entry, c, datas in _plan_components(plan, o):
+        for a, slot, getter, setter in entry.attrs:
+            values[slot] = getter(c)
+        for p, key, attrs in entry.data:
+            el = datas[p]
+            for a, slot, getter, setter in attrs:
+                values[slot] = getter(el)
+    fmt = tuple(sorted(dump_kw.items()))
+    if fmt not in plan.templates:
+        skeleton = {"__metadata__": _slot_format.format(-1)}
+        skeleton.update(plan.skeleton)
+        chunks = _slot_pattern.split(json.dumps(skeleton, **dump_kw))
+        plan.templates[fmt] = (chunks[0::2], [int(i) for i in chunks[1::2]])
+    text, slots = plan.templates[fmt]
+    values = [_json_value(v) for v in values]
+    values.append(None)  # slot -1
+    values[-1] = json.dumps(metadata(), **dump_kw)
+    if dump_kw.get("indent"):
+        values[-1] = values[-1].replace("\n", "\n" + " " * dump_kw["indent"])
+    out = [None] * (len(text) + len(slots))
+    out[0::2] = text
+    out[1::2] = [values[i] for i in slots]
+    return "".join(out)
+
+
+def _plan_read(plan, sd, o, wts):
+    """
+    Read a state dictionary into a model with an access plan, like
+    _read_component does.  Raises KeyError if the state is missing anything
+    in the plan, so it can be read with _read_component instead.
+    Args:
+        plan: _AccessPlan object
+        sd: state dictionary
+        o: Pyomo component with the structure the plan was compiled for
+        wts: StoreSpec object
+    Returns:
+        None
+    """
+    for entry, c, datas in _plan_components(plan, o):
+        odict = sd
+        for k in entry.path:
+            odict = odict[k]
+        if entry.ff is None:
+            for a, slot, getter, setter in entry.attrs:
+                if setter is not None:
+                    setter(c, odict[a])
+        else:
+            for a in entry.ff(c, odict):
+                setter = _plan_setter(wts, a)
+                if setter is not None:
+                    setter(c, odict[a])
+        if not entry.data:
+            continue
+        ddict = odict["data"]
+        for p, key, attrs in entry.data:
+            edict = ddict[key]
+            el = datas[p]
+            if entry.data_ff is None:
+                for a, slot, getter, setter in attrs:
+                    if setter is not None:
+                        setter(el, edict[a])
+            else:
+                for a in entry.data_ff(c, edict):
+                    setter = _plan_setter(wts, a)
+                    if setter is not None:
+                        setter(el, edict[a])
+
+
+# Structure of components keyed by structural fingerprint
+_structures = {}
+# Start of a json file written by to_json, up to the metadata dict
+_metadata_pattern = re.compile(r'\s*\{\s*"__metadata__"\s*:\s*')
+
+
+def _set_digest(s, cache):
+    """
+    Get a digest of the members of a Pyomo set, or of its subsets for a set
+    product.
+    Args:
+        s: Pyomo set
+        cache: dictionary of digests already computed, keyed by set id
+    Returns:
+        Digest string
+    """
+    if id(s) not in cache:
+        try:
+            subsets = list(s.subsets())
+        except AttributeError:
+            subsets = [s]
+        if len(subsets) > 1:
+            text = repr([_set_digest(i, cache) for i in subsets])
+        elif not s.isfinite():
+            # e.g. NonNegativeIntegers for the transformation blocks, only
+            # named; the keys of components indexed by it are in their digest
+            text = repr(s.name)
+        else:
+            text = repr(list(s))
+        cache[id(s)] = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+    return cache[id(s)]
+
+
+def _index_digest(c, cache):
+    """
+    Get a digest of the index members of an indexed component, the digest of
+    its index set when the component has data for every member of a finite
+    index set, or a digest of its keys otherwise (sparse components, or
+    indexed by an infinite set).
+    Args:
+        c: indexed Pyomo component
+        cache: dictionary of set digests already computed, keyed by set id
+    Returns:
+        Digest string
+    """
+    s = c.index_set()
+    if s.isfinite() and len(c) == len(s):
+        return _set_digest(s, cache)
+    text = repr(list(c.keys()))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _component_digests(o):
+    """
+    Get a digest of every component in o from its type, size and index
+    members. Components are named relative to o, with the key repr of
+    block data like the state dictionary.
+    Args:
+        o: Pyomo component
+    Returns:
+        List of (name, digest, component) tuples in the order they are stored
+    """
+    set_cache = {}
+    digests = {}
+    out = []
+
+    def add(name, c):
+        if isinstance(c, Suffix):
+            # suffix contents change from solve to solve, not the structure
+            d = (type(c).__name__, None, None)
+        elif isinstance(c, Set) and not c.is_indexed():
+            d = (type(c).__name__, None, _set_digest(c, set_cache))
+        elif c.is_indexed():
+            d = (type(c).__name__, len(c), _index_digest(c, set_cache))
+        else:
+            d = (type(c).__name__, None, None)
+        if d not in digests:
+            digests[d] = hashlib.sha1(repr(d).encode("utf-8")).hexdigest()[:16]
+        out.append((name, digests[d], c))
+
+    if isinstance(o, Component):
+        add(o.getname(fully_qualified=False), o)
+    if isinstance(o, Block):
+        blocks = [("", b) if k is None else ("[%r]." % (k,), b)
+                  for k, b in o.items()]
+    elif _may_have_subcomponents(o):
+        blocks = [("", o)]
+    else:
+        blocks = []
+    for prefix, b in blocks:
+        for c in b.component_objects(descend_into=False):
+            name = prefix + c.local_name
+            add(name, c)
+            if isinstance(c, Block):
+                if c.is_indexed():
+                    blocks.extend(
+                        ("%s[%r]." % (name, k), bd) for k, bd in c.items())
+                else:
+                    blocks.append((name + ".", c))
+    return out
+
+
+def get_structure(o):
+    """
+    Get the structure of a Pyomo component, stored by to_json in the metadata
+    so from_json can check that a state applies to a model before reading it.
+    Results are cached by structural fingerprint.
+    Args:
+        o: Pyomo component
+    Returns:
+        Dictionary with the "hash" of the whole component tree and a digest
+        of each of its "components" (type, size and index members), keyed
+        by component name relative to o
+    """
+    key = _structure_fingerprint(o)
+    structure = _structures.get(key)
+    if structure is None:
+        components = {n: d for n, d, c in _component_digests(o)}
+        structure = {
+            "hash": hashlib.sha1(repr(sorted(components.items())).encode(
+                "utf-8")).hexdigest(),
+            "components": components}
+        with _cache_lock:
+            if len(_structures) >= _max_access_plans:
+                del _structures[next(iter(_structures))]
+            _structures[key] = structure
+    return structure
+
+
+def _reads_state(c, wts):
+    """
+    Check if reading a component with a StoreSpec sets any attribute of the
+    component or of its data.
+    """
+    alist, ff = wts.get_class_attr_list(c)
+    if alist is None:
+        return False
+    elif alist or ff is not None:
+        return True
+    elif isinstance(c, Suffix):
+        return wts.include_suffix
+    try:
+        el = next(iter(c.values()))
+    except (AttributeError, StopIteration):
+        return False
+    alist, ff = wts.get_data_class_attr_list(el)
+    return bool(alist) or ff is not None
+
+
+def _check_structure(o, stored, wts):
+    """
+    Decide whether a stored state applies to a component, from the structure
+    stored in its metadata.
+    Args:
+        o: Pyomo component
+        stored: structure dictionary from the state metadata, or None
+        wts: StoreSpec object specifying what to read
+    Returns:
+        Tuple of status and set of ids of components to skip. Status is
+        "full" if the structures match, "partial" if only some components
+        match (the others are skipped), "none" if no component that wts
+        reads matches and "unknown" if the state has no structure information
+    """
+    if not stored:
+        return "unknown", set()
+    structure = get_structure(o)
+    if structure["hash"] == stored["hash"]:
+        return "full", set()
+    stored = stored["components"]
+    skip = set()
+    matched = False
+    for name, digest, c in _component_digests(o):
+        if name not in stored:
+            continue  # missing from the state, already ignored when reading
+        elif stored[name] == digest:
+            matched = matched or _reads_state(c, wts)
+        else:
+            skip.add(id(c))
+    return ("partial" if matched else "none"), skip
+
+
+def read_json_metadata(fname, gz=None, chunk_size=65536):
+    """
+    Read the metadata of a json file written by to_json without parsing the
+    model state, which comes after it.
+    Args:
+        fname: json file name
+        gz: If True assume the file is gzipped. The default is True if fname
+            ends with '.gz' otherwise False.
+        chunk_size: number of characters read at a time
+    Returns:
+        Metadata dictionary, or None if the file doesn't start with metadata
+    """
+    if gz is None:
+        gz = fname.endswith(".gz")
+    decoder = json.JSONDecoder()
+    text = ""
+    with (gzip.open(fname, "rt") if gz else open(fname, "r")) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            text += chunk
+            match = _metadata_pattern.match(text)
+            if match is not None:
+                try:
+                    return decoder.raw_decode(text, match.end())[0]
+                except ValueError:
+                    pass  # metadata continues in the next chunk
+            elif len(text.lstrip()) > len('{"__metadata__":'):
+                return None
+            if not chunk:
+                return None
+
+
+# Parsed base snapshots of delta snapshots keyed by absolute file name
+_base_states = {}
+_max_base_states = 8
+
+
+def _state_delta(sd, base):
+    """
+    Get the entries of a state dictionary that differ from a base state.
+    Args:
+        sd: state dictionary
+        base: base state dictionary
+    Returns:
+        Dictionary with the entries of sd that are not in base or have a
+        different value, nested dictionaries only keep the entries that differ
+    """
+    delta = {}
+    for k, v in sd.items():
+        b = base.get(k, delta)  # delta is a placeholder for missing entries
+        if isinstance(v, dict) and isinstance(b, dict):
+            d = _state_delta(v, b)
+            if d:
+                delta[k] = d
+        elif v != b or type(v) is not type(b):
+            delta[k] = v
+    return delta
+
+
+def _merge_state(base, delta):
+    """
+    Rebuild a state dictionary from a base state and a delta from
+    _state_delta. Entries that are not in the delta are shared with base.
+    """
+    merged = dict(base)
+    for k, v in delta.items():
+        b = base.get(k)
+        if isinstance(v, dict) and isinstance(b, dict):
+            merged[k] = _merge_state(b, v)
+        else:
+            merged[k] = v
+    return merged
+
+
+def _base_fname(ref, fname=None):
+    """
+    Get the path of the base snapshot of a delta snapshot. Relative paths are
+    relative to the directory of the delta snapshot file fname.
+    """
+    if os.path.isabs(ref["fname"]) or fname is None:
+        return ref["fname"]
+    return os.path.join(os.path.dirname(os.path.abspath(fname)), ref["fname"])
+
+
+def _load_base(fname):
+    """
+    Load a base snapshot and its content hash. Base snapshots are cached until
+    the file changes and, if they are delta snapshots themselves, merged with
+    their own base.
+    Args:
+        fname: json file name
+    Returns:
+        Tuple of content hash (sha1 of the file) and full state dictionary
+    """
+    path = os.path.abspath(fname)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _base_states.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if path.endswith(".gz"):
+            raw = gzip.decompress(raw)
+        state = _resolve_delta(json.loads(raw.decode("utf-8")), path)
+        cached = (key, digest, state)
+        with _cache_lock:
+            if len(_base_states) >= _max_base_states:
+                del _base_states[next(iter(_base_states))]
+            _base_states[path] = cached
+    return cached[1:]
+
+
+def _base_structure(metadata, fname=None):
+    """
+    Get the structure with component digests of a delta snapshot, which is
+    stored in the metadata of its base snapshot.
+    Args:
+        metadata: metadata of the delta snapshot
+        fname: json file of the delta snapshot, base paths are relative to it
+    Returns:
+        Structure dictionary, or None if it is not found
+    """
+    structure = metadata.get("structure")
+    while structure and "components" not in structure:
+        if not metadata.get("base"):
+            return None
+        fname = _base_fname(metadata["base"], fname)
+        metadata = read_json_metadata(fname) or {}
+        structure = metadata.get("structure")
+    return structure
+
+
+def _resolve_delta(sd, fname=None):
+    """
+    Get the full state of a state dictionary, merging it with its base
+    snapshot if it is a delta snapshot.
+    Args:
+        sd: state dictionary
+        fname: json file sd was read from, base paths are relative to it
+    Returns:
+        Full state dictionary
+    """
+    ref = sd.get("__metadata__", {}).get("base")
+    if not ref:
+        return sd
+    digest, base = _load_base(_base_fname(ref, fname))
+    if digest != ref["hash"]:
+        raise ValueError(
+            "Base snapshot {} has changed since the delta snapshot was "
+            "written".format(ref["fname"]))
+    delta = {k: v for k, v in sd.items() if k != "__metadata__"}
+    merged = {"__metadata__": sd["__metadata__"]}
+    merged.update(_merge_state(
+        {k: v for k, v in base.items() if k != "__metadata__"}, delta))
+    return merged
+
+
 def to_json(o, fname=None, human_read=False, wts=None, metadata={}, gz=None,
-            return_dict=False, return_json_string=False):
+            return_dict=False, return_json_string=False, base=None):
     """
     Save the state of a model to a Python dictionary, and optionally dump it
     to a json file.  To load a model state, a model with the same structure must
@@ -580,12 +1273,20 @@ def to_json(o, fname=None, human_read=False, wts=None, metadata={}, gz=None,
             date, and time.
         return_dict: default is False if true returns a dictionary representation
         return_json_string: default is False returns a json string
+        base: json file name of a base snapshot of a model with the same
+            structure, written with the same StoreSpec. If given, only the
+            entries that differ from the base are stored, with the path of the
+            base (relative to fname) and its content hash in the metadata.
+            from_json merges them back with the base. If the structure of the
+            base doesn't match, the full state is stored.
     Returns:
         If return_dict is True returns a dictionary serialization of the Pyomo
         component.  If return_dict is False and return_json_string is True
         returns a json string dump of the dict.  If fname is given the dictionary
         is also written to a json file.  If gz is True and fname is given, writes
-        a gzipped json file.
+        a gzipped json file.  The "__performance__" metadata records whether
+        the state was written with a compiled access plan and, if so, its
+        speedup over the walk through the first model with the same structure.
     """
     if gz is None:
         if isinstance(fname, str):
@@ -604,43 +1305,227 @@ def to_json(o, fname=None, human_read=False, wts=None, metadata={}, gz=None,
         "format_version": __format_version__,
         "date": datetime.date.isoformat(now.date()),
         "time": datetime.time.isoformat(now.time()),
-        "other": metadata}}
-    # first write the component
-    _write_component(sd, o, wts, count, suffixes=suffixes, lookup=lookup)
-    for s in suffixes:
-        _write_component_data(**s)
+        "other": metadata,
+        "structure": get_structure(o)}}
     pdict = {}
-    sd["__metadata__"]["__performance__"] = pdict
-    pdict["n_components"] = count.count
+    dump_kw = {'indent': 2} if human_read else {'separators': (',', ':')}
+    # If a plan was compiled for this model structure use it to make the json
+    # text directly, otherwise walk the model and compile the plan afterwards
+    plan = None if base is not None else _get_access_plan(o, wts, compile=False)
+    text = None
+    if plan is not None:
+        def plan_metadata():
+            sd["__metadata__"]["__performance__"] = pdict
+            pdict["n_components"] = plan.n_components
+            pdict["etime_make_dict"] = time.time() - start_time
+            pdict["access_plan"] = "compiled"
+            if plan.etime_walk_write is not None:
+                pdict["etime_walk"] = plan.etime_walk_write
+                pdict["speedup"] = plan.etime_walk_write / max(
+                    pdict["etime_make_dict"], 1e-9)
+            return sd["__metadata__"]
+        try:
+            text = _plan_write(plan, o, plan_metadata, dump_kw)
+        except Exception:
+            text = None  # structure changed, fall back to the walk
+            pdict.clear()
+    if text is None:
+        # first write the component
+        _write_component(sd, o, wts, count, suffixes=suffixes, lookup=lookup)
+        for s in suffixes:
+            _write_component_data(**s)
+        sd["__metadata__"]["__performance__"] = pdict
+        pdict["n_components"] = count.count
+        pdict["etime_make_dict"] = time.time() - start_time
+        pdict["access_plan"] = "walk"
+    if base is not None:
+        # Keep only the entries that differ from the base snapshot
+        digest, base_sd = _load_base(base)
+        if base_sd["__metadata__"].get("structure", {}).get("hash") == \
+                sd["__metadata__"]["structure"]["hash"]:
+            ref = os.path.abspath(base)
+            if fname is not None:
+                ref = os.path.relpath(
+                    ref, os.path.dirname(os.path.abspath(fname)))
+            sd["__metadata__"]["base"] = {"fname": ref, "hash": digest}
+            # component digests are in the base snapshot
+            sd["__metadata__"]["structure"] = {
+                "hash": sd["__metadata__"]["structure"]["hash"]}
+            delta = _state_delta(
+                {k: v for k, v in sd.items() if k != "__metadata__"},
+                base_sd)
+            sd = {"__metadata__": sd["__metadata__"]}
+            sd.update(delta)
+        pdict["etime_make_dict"] = time.time() - start_time
     dict_time = time.time()
-    pdict["etime_make_dict"] = dict_time - start_time
     # This returns the dict but if fname is specified also save to json file
-    dump_kw = {'indent': 2} if human_read else {'separators': (',', ':')}
     if fname is not None:
+        if text is None:
+            text = json.dumps(sd, **dump_kw)
         if gz:
             with gzip.open(fname, 'w') as f:
-                f.write(json.dumps(sd, **dump_kw).encode('utf-8'))
+                f.write(text.encode('utf-8'))
         else:
             with open(fname, "w") as f:
-                json.dump(sd, f, **dump_kw)
+                f.write(text)
     file_time = time.time()
     # unfortunatly I can't write how long it took to write the file in the file
     pdict["etime_write_file"] = file_time - dict_time
+    if pdict["access_plan"] == "walk":
+        plan = _get_access_plan(o, wts)
+        pdict["etime_compile_plan"] = time.time() - file_time
+        if plan is not None and fname is not None:
+            plan.etime_walk_write = file_time - start_time
+    elif return_dict:
+        sd = json.loads(text)
+        sd["__metadata__"]["__performance__"] = pdict
     if return_dict:
         # In interactive environments returning the dict can cuase it to print
         # an extreemly large amount of stuff.  So added this option to make sure
         # it's really what you want.
         return sd
     elif return_json_string:
-        return json.dumps(sd, **dump_kw)
+        if text is None:
+            text = json.dumps(sd, **dump_kw)
+        return text
     else:
         return None
 
 
-def _read_component(sd, o, wts, lookup={}, suffixes={}):
+# Number of snapshots queued by a SnapshotWriter and not written yet, keyed by
+# absolute file name, so from_json can wait for them
+_pending_writes = {}
+_pending_lock = threading.Condition()
+
+
+def _wait_pending(fname):
+    """
+    Block until no SnapshotWriter has a pending write of a file.
+    Args:
+        fname: json file name
+    Returns:
+        None
+    """
+    path = os.path.abspath(fname)
+    with _pending_lock:
+        while _pending_writes.get(path):
+            _pending_lock.wait()
+
+
+class SnapshotWriter(object):
+    """
+    Write to_json snapshots from a background thread, so the caller can go on
+    while the state is serialized and written. Snapshots are written in the
+    order they are queued and the queue is bounded, so write() blocks when
+    the writer falls behind. from_json waits for the pending writes of the
+    file it loads, for other durability points use wait() or flush(). Errors
+    raised while writing are raised again by the next write, wait, flush or
+    close call.
+    """
+
+    def __init__(self, maxsize=2):
+        """
+        Start the writer thread.
+        Args:
+            maxsize: number of snapshots that can be queued before write()
+                blocks
+        """
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                o, path, kwargs = item
+                try:
+                    to_json(o, fname=path, **kwargs)
+                except Exception as e:
+                    if self._error is None:
+                        self._error = e
+                finally:
+                    with _pending_lock:
+                        _pending_writes[path] -= 1
+                        if not _pending_writes[path]:
+                            del _pending_writes[path]
+                        _pending_lock.notify_all()
+            finally:
+                self._queue.task_done()
+
+    def _raise(self):
+        if self._error is not None:
+            e, self._error = self._error, None
+            raise e
+
+    def write(self, o, fname, **kwargs):
+        """
+        Queue a snapshot of a component. The component must not be changed
+        until the snapshot is written.
+        Args:
+            o: Pyomo component to save
+            fname: json file name
+            kwargs: other to_json arguments
+        Returns:
+            None
+        """
+        if self._closed:
+            raise RuntimeError("SnapshotWriter is closed")
+        self._raise()
+        path = os.path.abspath(fname)
+        with _pending_lock:
+            _pending_writes[path] = _pending_writes.get(path, 0) + 1
+        self._queue.put((o, path, kwargs))
+
+    def wait(self, fname):
+        """
+        Block until the queued snapshots of a file are written.
+        Args:
+            fname: json file name
+        Returns:
+            None
+        """
+        _wait_pending(fname)
+        self._raise()
+
+    def flush(self):
+        """
+        Block until all queued snapshots are written.
+        Returns:
+            None
+        """
+        self._queue.join()
+        self._raise()
+
+    def close(self):
+        """
+        Write the queued snapshots and stop the writer thread.
+        Returns:
+            None
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        self._raise()
+
+
+def _read_component(sd, o, wts, lookup={}, suffixes={}, skip=()):
     """
     Read a component dictionary into a model
     """
+    if id(o) in skip:
+        return  # structure of the component doesn't match the stored state
     alist, ff = wts.get_class_attr_list(o)
     if alist is None:
         return
@@ -676,10 +1561,10 @@ def _read_component(sd, o, wts, lookup={}, suffixes={}):
                 suffixes[odict['__id__']] = odict["data"]  # is populated
     else:  # read nonsufix component data
         _read_component_data(odict["data"], o, wts,
-                             lookup=lookup, suffixes=suffixes)
+                             lookup=lookup, suffixes=suffixes, skip=skip)
 
 
-def _read_component_data(sd, o, wts, lookup={}, suffixes={}):
+def _read_component_data(sd, o, wts, lookup={}, suffixes={}, skip=()):
     """
     Read a Pyomo component's data in from a dict.
     Args:
@@ -688,6 +1573,7 @@ def _read_component_data(sd, o, wts, lookup={}, suffixes={}):
         wts: StoreSpec object specifying what to read in
         lookup: a lookup table for id to componet for reading suffixes
         suffixes: a list of suffixes put off reading until end
+        skip: ids of sub-components not to read
     Returns:
         None
     """
@@ -702,7 +1588,10 @@ def _read_component_data(sd, o, wts, lookup={}, suffixes={}):
                 and not isinstance(o, Component):
             el = o
         else:
-            el = o[key]
+            try:
+                el = o[key]
+            except TypeError:  # e.g. an unordered set, skipped when written
+                return
         if c == 0:  # if first data item assume all itmes are same and get alist
             alist, ff = wts.get_data_class_attr_list(
                 el)  # ff is fileter function
@@ -742,7 +1631,7 @@ def _read_component_data(sd, o, wts, lookup={}, suffixes={}):
             for o2 in el.component_objects(descend_into=False):
                 # recursive read here
                 _read_component(edict["__pyomo_components__"], o2, wts,
-                                lookup=lookup, suffixes=suffixes)
+                                lookup=lookup, suffixes=suffixes, skip=skip)
 
 
 def component_data_from_dict(sd, o, wts):
@@ -795,7 +1684,282 @@ def _read_suffixes(lookup, suffixes):
             s[kc] = d[key]
 
 
-def from_json(o, sd=None, fname=None, s=None, wts=None, gz=None):
+class _JsonStream(object):
+    """
+    Incremental reader of a json file that decodes one value at a time, so
+    only the part of the file being read is kept in memory. A background
+    thread reads the next chunk of the file while the current one is decoded.
+    Args:
+        f: text file object
+        chunk_size: number of characters read at a time
+    """
+
+    def __init__(self, f, chunk_size=65536):
+        self.buf = ""  # characters read and not decoded yet
+        self.pos = 0  # position of the next character in buf
+        self.eof = False
+        self.closed = False
+        self.decoder = json.JSONDecoder()
+        self.chunks = queue.Queue(maxsize=2)
+        self.reader = threading.Thread(
+            target=self._read_chunks, args=(f, chunk_size), daemon=True)
+        self.reader.start()
+
+    def _read_chunks(self, f, chunk_size):
+        try:
+            while not self.closed:
+                chunk = f.read(chunk_size)
+                self.chunks.put(chunk)
+                if not chunk:
+                    return
+        except Exception as e:
+            self.chunks.put(e)
+
+    def close(self):
+        """
+        Stop the background reader, must be called before closing the file.
+        """
+        self.closed = True
+        while self.reader.is_alive():
+            try:
+                self.chunks.get(timeout=0.01)
+            except queue.Empty:
+                pass
+
+    def _fill(self):
+        """
+        Append the next chunk to the buffer, dropping what was already read.
+        Returns False at the end of the file.
+        """
+        if self.eof:
+            return False
+        chunk = self.chunks.get()
+        if isinstance(chunk, Exception):
+            raise chunk
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def peek(self):
+        """
+        Skip whitespace and return the next character, '' at the end.
+        """
+        while True:
+            self.pos = _whitespace.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, c):
+        """
+        Skip the next character, which must be c.
+        """
+        if self.peek() != c:
+            raise ValueError("Expected '{}' in json file".format(c))
+        self.pos += 1
+
+    def read_value(self):
+        """
+        Decode the next json value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self._fill():
+                    continue  # the value continues in the next chunk
+                raise
+            if end == len(self.buf) and self._fill():
+                continue  # a number may continue in the next chunk
+            self.pos = end
+            return value
+
+    def keys(self):
+        """
+        Iterate over the keys of the next json object. The value of each key
+        must be read or skipped with read_value before getting the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            c = self.peek()
+            self.pos += 1
+            if c == "}":
+                return
+            elif c != ",":
+                raise ValueError("Expected ',' or '}' in json file")
+
+
+_whitespace = re.compile(r"[ \t\n\r]*")
+_stream_chunk_size = 65536
+
+
+def _read_attrs(d, o, alist, wts):
+    """
+    Read a list of attributes of a component or component data from its
+    state dictionary, like _read_component and _read_component_data do.
+    Args:
+        d: state dictionary of o
+        o: component or component data
+        alist: attributes to read
+        wts: StoreSpec object
+    Returns:
+        False if an attribute is missing and ignored, otherwise True
+    """
+    for a in alist:
+        try:
+            if a in wts.read_cbs:
+                if wts.read_cbs[a] is not None:
+                    wts.read_cbs[a](o, d[a])
+            else:
+                setattr(o, a, d[a])
+        except KeyError as e:
+            if wts.ignore_missing:
+                return False
+            else:
+                raise(e)
+    return True
+
+
+def _stream_component(st, o, wts, lookup={}, suffixes={}):
+    """
+    Read a component state from a json stream positioned at its dictionary.
+    Blocks are read one sub-component at a time, other components are
+    decoded whole and read with _read_component.  The stored state must have
+    the structure of o (see get_structure) so it is in the order the model is
+    read, then this gives the same result as _read_component.
+    Args:
+        st: _JsonStream object
+        o: Pyomo component to read
+        wts: StoreSpec object specifying what to read
+        lookup: a lookup table for id to componet for reading suffixes
+        suffixes: a list of suffixes put off reading until end
+    Returns:
+        None
+    """
+    oname = o.getname(fully_qualified=False)
+    if not isinstance(o, Block):
+        _read_component({oname: st.read_value()}, o, wts,
+                        lookup=lookup, suffixes=suffixes)
+        return
+    alist, ff = wts.get_class_attr_list(o)
+    if alist is None:
+        st.read_value()
+        return
+    odict = {}
+    keys = st.keys()
+    key = None
+    for key in keys:
+        if key == "data":
+            break
+        odict[key] = st.read_value()
+    # component attributes are stored before the data
+    if ff is not None:
+        alist = ff(o, odict)
+    if wts.include_suffix:
+        lookup[odict['__id__']] = o
+    if not _read_attrs(odict, o, alist, wts):
+        if key == "data":
+            st.read_value()
+    elif key == "data":
+        _stream_component_data(st, o, wts, lookup, suffixes)
+    else:
+        raise KeyError("data")
+    for key in keys:
+        st.read_value()
+
+
+def _stream_component_data(st, o, wts, lookup, suffixes):
+    """
+    Read the data of a block-like component from a json stream positioned
+    at its data dictionary, following _read_component_data.
+    """
+    items = {}
+    for key in o.keys():
+        items[repr(key)] = o[key]
+    c = 0
+    stop = False
+    for rkey in st.keys():
+        if stop or rkey not in items:
+            st.read_value()
+            continue
+        el = items[rkey]
+        if c == 0:
+            alist, ff = wts.get_data_class_attr_list(el)
+            if alist is None:
+                stop = True
+                st.read_value()
+                continue
+        c += 1
+        edict = {}
+        read = False
+        for ekey in st.keys():
+            if ekey != "__pyomo_components__" or stop:
+                edict[ekey] = st.read_value()
+                continue
+            # data attributes are stored before the sub-components
+            stop = not _read_data_attrs(edict, el, o, alist, ff, wts, lookup)
+            read = True
+            if stop or not _may_have_subcomponents(el):
+                st.read_value()
+                continue
+            for name in st.keys():
+                o2 = el.component(name)
+                if o2 is None:
+                    st.read_value()
+                else:
+                    _stream_component(st, o2, wts, lookup, suffixes)
+        if not read and not stop:
+            stop = not _read_data_attrs(edict, el, o, alist, ff, wts, lookup)
+
+
+def _read_data_attrs(edict, el, o, alist, ff, wts, lookup):
+    """
+    Read the attributes of a component data from its state dictionary.
+    Returns False if an attribute is missing and ignored.
+    """
+    if ff is not None:
+        alist = ff(o, edict)
+    if wts.include_suffix:
+        lookup[edict['__id__']] = el
+    return _read_attrs(edict, el, alist, wts)
+
+
+def _stream_json(o, f, wts, lookup, suffixes):
+    """
+    Read the state of a component from a json file written by to_json,
+    decoding it incrementally.
+    Args:
+        o: Pyomo component to read
+        f: text file object
+        wts: StoreSpec object specifying what to read
+        lookup: a lookup table for id to componet for reading suffixes
+        suffixes: a list of suffixes put off reading until end
+    Returns:
+        None
+    """
+    st = _JsonStream(f, chunk_size=_stream_chunk_size)
+    oname = o.getname(fully_qualified=False)
+    try:
+        for key in st.keys():
+            if key == oname:
+                _stream_component(st, o, wts, lookup=lookup, suffixes=suffixes)
+            else:
+                st.read_value()
+    finally:
+        st.close()
+
+
+def from_json(o, sd=None, fname=None, s=None, wts=None, gz=None,
+              stream=False):
     """
     Load the state of a Pyomo component state from a dictionary, json file, or
     json string.  Must only specify one of sd, fname, or s as a non-None value.
@@ -806,16 +1970,30 @@ def from_json(o, sd=None, fname=None, s=None, wts=None, gz=None):
     Args:
         o: Pyomo component to for which to load state
         sd: State dictionary to load, if None, check fname and s
-        fname: JSON file to load, only used if sd is None
+        fname: JSON file to load, only used if sd is None. If a SnapshotWriter
+            has queued writes of the file, wait until they are written
         s: JSON string to load only used if both sd and fname are None
         wts: StoreSpec object specifying what to load
         gz: If True assume the file specified by fname is gzipped. The default is
             True if fname ends with '.gz' otherwise False.
+        stream: If True and the file specified by fname has the structure of o,
+            decode the file incrementally while reading it into o instead of
+            loading it whole first. This gives the same result with less memory.
+            Delta snapshots (see to_json) are always loaded whole.
     Returns:
         Dictionary with some perfomance information. The keys are
         "etime_load_file", how long in seconds it took to load the json file
         "etime_read_dict", how long in seconds it took to read models state
         "etime_read_suffixes", how long in seconds it took to read suffixes
+        "access_plan", "compiled" if the state was read with the access plan
+        of the model structure, "stream" if the file was decoded
+        incrementally, "walk" otherwise, and "speedup" of the plan
+        over the first walk through a model with the same structure
+        "structure", "full" if the stored structure matches the model,
+        "partial" if only some components match and the others were skipped,
+        "none" if nothing matches and the file was not read, or "unknown" if
+        the state has no structure information (see get_structure)
+        "etime_check_structure", how long in seconds it took to check it
     """
     if gz is None:
         if isinstance(fname, str):
@@ -826,10 +2004,50 @@ def from_json(o, sd=None, fname=None, s=None, wts=None, gz=None):
     # keeping track of elapsed time.  want to make sure I don't do anything
     # that's too slow.
     start_time = time.time()
-    # Get the model state dict from one of three sources
-    if sd is not None:  # Existing Python dict (for in-memory stuff).
-        pass
-    elif fname is not None:  # Read in from a json file
+    pdict = {}  # return some perfomance information, to make sure not too slow
+    # Check the structure stored in the metadata before reading the state, for
+    # files only the metadata at the start of the file is read for this
+    if sd is not None:
+        metadata = sd.get("__metadata__", {})
+    elif fname is not None:
+        _wait_pending(fname)  # snapshot queued by a SnapshotWriter
+        metadata = read_json_metadata(fname, gz=gz) or {}
+    elif s is not None:
+        sd = json.loads(s)  # json string
+        metadata = sd.get("__metadata__", {})
+    else:  # Didn't specify at least one source
+        raise Exception("Need to specify a data source to load from")
+    if wts is None:  # if no StoreSpec object given use the default, which should
+        wts = StoreSpec()  # be the typlical save everything important
+    structure = metadata.get("structure")
+    if structure and "components" not in structure and \
+            structure["hash"] != get_structure(o)["hash"]:
+        structure = _base_structure(metadata, fname)
+    pdict["structure"], skip = _check_structure(o, structure, wts)
+    pdict["etime_check_structure"] = time.time() - start_time
+    if pdict["structure"] == "none":  # nothing to read, don't load the file
+        pdict["access_plan"] = None
+        pdict["etime_load_file"] = 0.0
+        pdict["etime_read_dict"] = 0.0
+        pdict["etime_read_suffixes"] = 0.0
+        return pdict
+    lookup = {}  # A dict to use for a lookup tables
+    suffixes = {}  # A list of suffixes delayed to end so lookup is complete
+    if sd is None and stream and pdict["structure"] == "full" and \
+            not metadata.get("base"):
+        # Read the file while decoding it, loading and reading overlap
+        dict_time = time.time()
+        with (gzip.open(fname, "rt") if gz else open(fname, "r")) as f:
+            _stream_json(o, f, wts, lookup, suffixes)
+        read_time = time.time()
+        _read_suffixes(lookup, suffixes)
+        pdict["access_plan"] = "stream"
+        pdict["etime_load_file"] = 0.0
+        pdict["etime_read_dict"] = read_time - dict_time
+        pdict["etime_read_suffixes"] = time.time() - read_time
+        return pdict
+    # Get the model state dict from a json file if not given
+    if sd is None:
         if gz:
             with gzip.open(fname, 'r') as f:
                 fr = f.read()
@@ -837,23 +2055,37 @@ def from_json(o, sd=None, fname=None, s=None, wts=None, gz=None):
         else:
             with open(fname, "r") as f:
                 sd = json.load(f)  # json file
-    elif s is not None:  # Use a json string (not really sure if useful)
-        sd = json.loads(s)  # json string
-    else:  # Didn't specify at least one source
-        raise Exception("Need to specify a data source to load from")
+    # Merge delta snapshots with their base snapshot
+    sd = _resolve_delta(sd, fname)
     dict_time = time.time()  # To calculate how long it took to read file
-    if wts is None:  # if no StoreSpec object given use the default, which should
-        wts = StoreSpec()  # be the typlical save everything important
-    lookup = {}  # A dict to use for a lookup tables
-    suffixes = {}  # A list of suffixes delayed to end so lookup is complete
-    # Read toplevel componet (is recursive)
-    _read_component(sd, o, wts, lookup=lookup, suffixes=suffixes)
+    # Read with the compiled plan for this model structure if there is one,
+    # if the state doesn't match the plan read it with the recursive walk
+    plan = _get_access_plan(o, wts, compile=False)
+    pdict["access_plan"] = "walk"
+    if plan is not None and not skip:
+        try:
+            _plan_read(plan, sd, o, wts)
+            pdict["access_plan"] = "compiled"
+        except Exception:
+            pass
+    if pdict["access_plan"] == "walk":
+        # Read toplevel componet (is recursive)
+        _read_component(sd, o, wts, lookup=lookup, suffixes=suffixes,
+                        skip=skip)
     read_time = time.time()  # to calc time to read model state minus suffixes
     # Now read in the suffixes
     _read_suffixes(lookup, suffixes)
     suffix_time = time.time()  # to calculate time to read suffixes
-    pdict = {}  # return some perfomance information, to make sure not too slow
-    pdict["etime_load_file"] = dict_time - start_time
+    pdict["etime_load_file"] = dict_time - start_time - \
+        pdict["etime_check_structure"]
     pdict["etime_read_dict"] = read_time - dict_time
     pdict["etime_read_suffixes"] = suffix_time - read_time
+    if pdict["access_plan"] == "walk":
+        plan = _get_access_plan(o, wts)
+        if plan is not None and plan.etime_walk_read is None:
+            plan.etime_walk_read = pdict["etime_read_dict"]
+        pdict["etime_compile_plan"] = time.time() - suffix_time
+    elif plan.etime_walk_read is not None:
+        pdict["speedup"] = plan.etime_walk_read / max(
+            pdict["etime_read_dict"], 1e-9)
     return pdict
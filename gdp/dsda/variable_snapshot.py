@@ -0,0 +1,130 @@
+"""
+Variable snapshots: the values of all the variables of a Pyomo model stored in a single NumPy array, used to warm start
+models of the same or of a different size without going through json files
+"""
+
+from math import isnan
+
+import numpy as np
+import pyomo.environ as pe
+
+
+# Snapshot layouts are cached by the names and indexes of the Var components of a model, and gather
+# arrays by the pair of layouts (and index map) they translate between. The oldest entries are dropped
+# once a cache holds _max_snapshot_cache of them.
+_snapshot_layouts = {}
+_snapshot_gathers = {}
+_max_snapshot_cache = 32
+
+
+def _cache_put(cache: dict, key, value):
+    # Store a value in a snapshot cache, dropping the oldest entry if it is full
+    if len(cache) >= _max_snapshot_cache:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
+def get_snapshot_layout(m: pe.ConcreteModel(), components: list = None) -> dict:
+    """
+    Function that returns the (cached) position of every variable of a model inside a snapshot
+    Args:
+        m: Pyomo model
+        components: Var components of the model, in case they were already collected
+    Returns:
+        layout: Dictionary with the structural 'key' of the model, the number of variables 'size' and a
+            'components' dictionary with the variable name as key and (start position, list of indexes) as value
+    """
+    if components is None:
+        components = list(m.component_objects(pe.Var, descend_into=True))
+    key = tuple((v.name, len(v), hash(tuple(v.keys())))
+                for v in components)
+    layout = _snapshot_layouts.get(key)
+    if layout is None:
+        positions = {}
+        size = 0
+        for v in components:
+            positions[v.name] = (size, list(v.keys()))
+            size += len(v)
+        layout = {'key': key, 'size': size, 'components': positions}
+        _cache_put(_snapshot_layouts, key, layout)
+    return layout
+
+
+def get_variable_snapshot(m: pe.ConcreteModel()) -> dict:
+    """
+    Function that stores the values of all the variables of a model in a single array
+    Args:
+        m: Pyomo model
+    Returns:
+        snapshot: Dictionary with the model 'layout' (see get_snapshot_layout) and the array of 'values' (NaN for variables without value)
+    """
+    components = list(m.component_objects(pe.Var, descend_into=True))
+    layout = get_snapshot_layout(m, components)
+    values = np.array(
+        [v.value for c in components for v in c.values()], dtype=float)
+    return {'layout': layout, 'values': values}
+
+
+def _get_snapshot_gather(source: dict, target: dict, m: pe.ConcreteModel(), index_map=None):
+    """
+    Function that returns, for every variable of the target layout, its position in the source layout (-1 if missing)
+    Args:
+        source: Layout of the snapshot
+        target: Layout of the model to be initialized
+        m: Model to be initialized
+        index_map: Function (variable component, target index) -> source index
+    Returns:
+        positions: Array with the source positions
+    """
+    gather_key = (source['key'], target['key'], index_map)
+    positions = _snapshot_gathers.get(gather_key)
+    if positions is None:
+        positions = np.full(target['size'], -1, dtype=int)
+        for name, (start, indexes) in target['components'].items():
+            if name not in source['components']:
+                continue
+            source_start, source_indexes = source['components'][name]
+            source_positions = {
+                index: source_start + i for i, index in enumerate(source_indexes)}
+            component = m.find_component(name)
+            for i, index in enumerate(indexes):
+                if index_map is not None:
+                    index = index_map(component, index)
+                positions[start + i] = source_positions.get(index, -1)
+        _cache_put(_snapshot_gathers, gather_key, positions)
+    return positions
+
+
+def apply_variable_snapshot(
+    m: pe.ConcreteModel(),
+    snapshot: dict,
+    index_map=None,
+    skip_fixed: bool = True,
+) -> pe.ConcreteModel():
+    """
+    Function that initializes a model with the values stored in a snapshot
+    Args:
+        m: Pyomo model that is to be initialized
+        snapshot: Snapshot from get_variable_snapshot, possibly of a model with a different size
+        index_map: Function (variable component, index in m) -> index in the snapshot model, used when the models have different sizes.
+            Must be the same object between calls for the translation to be reused.
+        skip_fixed: Leave the values of fixed variables untouched
+    Returns:
+        m: Initialized Pyomo model
+    """
+    components = list(m.component_objects(pe.Var, descend_into=True))
+    layout = get_snapshot_layout(m, components)
+    source = snapshot['layout']
+    if index_map is None and source['key'] == layout['key']:
+        values = snapshot['values']
+    else:
+        positions = _get_snapshot_gather(source, layout, m, index_map)
+        values = np.where(
+            positions >= 0, snapshot['values'][positions], np.nan)
+
+    variables = (v for c in components for v in c.values())
+    for v, val in zip(variables, values.tolist()):
+        if isnan(val) or (skip_fixed and v.fixed):
+            continue
+        v.set_value(val, valid=True)
+    return m
@@ -78,7 +78,7 @@ from pyomo.gdp import Disjunct, Disjunction
 from pyomo.util.infeasible import log_infeasible_constraints
 
 # Importing build_column function from gdp.column.gdp_column
-from gdp.column.gdp_column import build_column
+from gdp.column.gdp_column import build_column, transfer_initialization
 
 # Importing various functions from gdp.dsda.dsda_functions module
 # These functions help in initializing models, solving subproblems, generating initializations, visualizing data etc.
@@ -86,7 +86,9 @@ from gdp.dsda.dsda_functions import (
     external_ref,
     generate_initialization,
     get_external_information,
+    initialize_block_triangular,
     initialize_model,
+    run_sweep,
     solve_complete_external_enumeration,
     solve_subproblem,
     solve_with_dsda,
@@ -162,6 +164,91 @@ def problem_logic_column(m):
     return logic_expr
 
 
+def solve_column_case(case):
+    """
+    This function solves one case of the sweep (see run_sweep) with the MINLP, GDPopt or D-SDA method.
+
+    Args:
+        case (dict) : The case, with its 'Method', 'Approach' and 'Solver' and the arguments of the method.
+
+    Returns:
+        dict : The row of the results for the case.
+    """
+    if case['Method'] == 'MINLP':
+        m_init = initialize_model(build_column(**case['model_args']), json_path=case['init_path'])
+        m_solved = solve_with_minlp(
+            m_init,
+            transformation=case['Approach'],
+            minlp=case['Solver'],
+            minlp_options=case['options'],
+            timelimit=case['timelimit'],
+            gams_output=False,
+            tee=case['tee'],
+        )
+        return {
+            'Method': case['Method'],
+            'Approach': case['Approach'],
+            'Solver': case['Solver'],
+            'Objective': pe.value(m_solved.obj),
+            'Time': m_solved.results.solver.user_time,
+            'Status': m_solved.results.solver.termination_condition,
+            'User_time': 'NA',
+        }
+
+    if case['Method'] == 'GDPopt':
+        m_init = initialize_model(build_column(**case['model_args']), json_path=case['init_path'])
+        m_solved = solve_with_gdpopt(
+            m_init,
+            mip='cplex',
+            nlp=case['Solver'],
+            nlp_options=case['options'],
+            timelimit=case['timelimit'],
+            strategy=case['Approach'],
+            tee=case['tee'],
+        )
+        return {
+            'Method': case['Method'],
+            'Approach': case['Approach'],
+            'Solver': case['Solver'],
+            'Objective': pe.value(m_solved.obj),
+            'Time': m_solved.results.solver.user_time,
+            'Status': m_solved.results.solver.termination_condition,
+            'User_time': 'NA',
+        }
+
+    # D-SDA MINLP
+    m = build_column(**case['model_args'])
+    ext_ref = {m.YB: m.intTrays, m.YR: m.intTrays}
+    m_solved, _, _ = solve_with_dsda(
+        model_function=build_column,
+        model_args=case['model_args'],
+        starting_point=case['starting_point'],
+        ext_dict=ext_ref,
+        mip_transformation=True,
+        transformation=case['transformation'],
+        ext_logic=problem_logic_column,
+        k=case['k'],
+        provide_starting_initialization=True,
+        feasible_model='column_' + str(case['model_args']['max_trays']),
+        subproblem_solver=case['Solver'],
+        subproblem_solver_options=case['options'],
+        iter_timelimit=case['timelimit'],
+        timelimit=case['timelimit'],
+        gams_output=False,
+        tee=False,
+        global_tee=case['tee'],
+    )
+    return {
+        'Method': case['Method'],
+        'Approach': case['Approach'],
+        'Solver': case['Solver'],
+        'Objective': pe.value(m_solved.obj),
+        'Time': m_solved.dsda_time,
+        'Status': m_solved.dsda_status,
+        'User_time': m_solved.dsda_usertime,
+    }
+
+
 if __name__ == "__main__":
     # This part of the script initializes the variables that are going to be used throughout the script.
     # NT: Number of trays in the distillation column
@@ -176,6 +263,8 @@ if __name__ == "__main__":
     model_args = {'min_trays': 8, 'max_trays': NT, 'xD': 0.95, 'xB': 0.95}
     starting_point = [NT - 2, 1]
     globaltee = True
+    # workers: Number of cases solved at the same time, each pinned to its own core with single-threaded solvers so that timings stay comparable.
+    workers = 4
     logging.basicConfig(level=logging.ERROR)
 
     # Here the script is setting up the CSV file where the results will be saved.
@@ -278,10 +367,31 @@ if __name__ == "__main__":
         dir_path, 'gdp/dsda/', 'column_' + str(NT) + '_initialization.json'
     )
 
+    # Smaller columns that already have an initialization file, which can be transferred to this size instead of solving.
+    smaller_sizes = [
+        n
+        for n in range(NT - 1, 2, -1)
+        if os.path.exists(
+            os.path.join(dir_path, 'gdp/dsda/', 'column_' + str(n) + '_initialization.json')
+        )
+    ]
+
     # Checks if the JSON file already exists.
     if os.path.exists(json_file):
         # If the file exists, its path is stored in 'init_path', which will be used later to load the initialization values.
         init_path = json_file
+    elif smaller_sizes:
+        # Warm start from the largest smaller column, adding the new trays as bypassed trays.
+        source_args = dict(model_args, max_trays=smaller_sizes[0])
+        m_source = initialize_model(
+            build_column(**source_args),
+            from_feasible=True,
+            feasible_model='column_' + str(smaller_sizes[0]),
+        )
+        m_transferred = transfer_initialization(build_column(**model_args), m_source)
+        init_path = generate_initialization(
+            m=m_transferred, starting_initialization=True, model_name='column_' + str(NT)
+        )
     else:
         # If the file doesn't exist, a new model 'm' is built using the arguments stored in 'model_args'.
         m = build_column(**model_args)
@@ -309,6 +419,9 @@ if __name__ == "__main__":
             tee=globaltee,
         )
 
+        # The dependent variables are computed from their equations to give the solver a consistent starting point.
+        initialize_block_triangular(m_fixed)
+
         # The fixed model 'm_fixed' is solved with a subproblem solver (in this case, 'baron').
         m_solved = solve_subproblem(
             m=m_fixed, subproblem_solver='baron', timelimit=100, tee=globaltee  # [s]
@@ -320,113 +433,68 @@ if __name__ == "__main__":
             m=m_solved, starting_initialization=True, model_name='column_' + str(NT)
         )
 
+    # The cases of every method are collected and solved concurrently (see run_sweep).
+    # The solver output is only displayed when the cases are solved one after another.
+    cases = []
+    tee = globaltee and workers == 1
+
     # MINLP
     for solver in minlps:
         for transformation in transformations:
-            new_result = {}
-            m = build_column(**model_args)
-            m_init = initialize_model(m, json_path=init_path)
-            m_solved = solve_with_minlp(
-                m_init,
-                transformation=transformation,
-                minlp=solver,
-                minlp_options=minlps_opts[solver],
-                timelimit=timelimit,
-                gams_output=False,
-                tee=globaltee,
+            cases.append(
+                {
+                    'Method': 'MINLP',
+                    'Approach': transformation,
+                    'Solver': solver,
+                    'options': minlps_opts[solver],
+                    'model_args': model_args,
+                    'init_path': init_path,
+                    'timelimit': timelimit,
+                    'tee': tee,
+                }
             )
-            new_result = {
-                'Method': 'MINLP',
-                'Approach': transformation,
-                'Solver': solver,
-                'Objective': pe.value(m_solved.obj),
-                'Time': m_solved.results.solver.user_time,
-                'Status': m_solved.results.solver.termination_condition,
-                'User_time': 'NA',
-            }
-            dict_data.append(new_result)
-            print(new_result)
 
     # GDPopt
     for solver in nlps:
         for strategy in strategies:
-            new_result = {}
-            m = build_column(**model_args)
-            m_init = initialize_model(m, json_path=init_path)
-            m_solved = solve_with_gdpopt(
-                m_init,
-                mip='cplex',
-                nlp=solver,
-                nlp_options=nlp_opts[solver],
-                timelimit=timelimit,
-                strategy=strategy,
-                tee=globaltee,
+            cases.append(
+                {
+                    'Method': 'GDPopt',
+                    'Approach': strategy,
+                    'Solver': solver,
+                    'options': nlp_opts[solver],
+                    'model_args': model_args,
+                    'init_path': init_path,
+                    'timelimit': timelimit,
+                    'tee': tee,
+                }
             )
-            new_result = {
-                'Method': 'GDPopt',
-                'Approach': strategy,
-                'Solver': solver,
-                'Objective': pe.value(m_solved.obj),
-                'Time': m_solved.results.solver.user_time,
-                'Status': m_solved.results.solver.termination_condition,
-                'User_time': 'NA',
-            }
-            dict_data.append(new_result)
-            print(new_result)
 
     # D-SDA MINLP
-    # The model is built and external references are set.
-    m = build_column(**model_args)
-    ext_ref = {m.YB: m.intTrays, m.YR: m.intTrays}
-    get_external_information(m, ext_ref, tee=globaltee)
-
     # The model is solved using different combinations of solvers, 'k' values, and transformations.
     # The 'k' value is a parameter of the D-SDA method and the transformation refers to a reformulation strategy for the MINLP problem.
-    # The results are saved in a dictionary and appended to a list 'dict_data'.
     for solver in nlps:
         for k in ks:
             for transformation in transformations:
-                new_result = {}
-                m_solved, _, _ = solve_with_dsda(
-                    model_function=build_column,
-                    model_args=model_args,
-                    starting_point=starting_point,
-                    ext_dict=ext_ref,
-                    mip_transformation=True,
-                    transformation=transformation,
-                    ext_logic=problem_logic_column,
-                    k=k,
-                    provide_starting_initialization=True,
-                    feasible_model='column_' + str(NT),
-                    subproblem_solver=solver,
-                    subproblem_solver_options=nlp_opts[solver],
-                    iter_timelimit=timelimit,
-                    timelimit=timelimit,
-                    gams_output=False,
-                    tee=False,
-                    global_tee=globaltee,
+                cases.append(
+                    {
+                        'Method': str('D-SDA_MIP_' + transformation),
+                        'Approach': str('k=' + k),
+                        'Solver': solver,
+                        'transformation': transformation,
+                        'k': k,
+                        'options': nlp_opts[solver],
+                        'model_args': model_args,
+                        'starting_point': starting_point,
+                        'timelimit': timelimit,
+                        'tee': tee,
+                    }
                 )
-                new_result = {
-                    'Method': str('D-SDA_MIP_' + transformation),
-                    'Approach': str('k=' + k),
-                    'Solver': solver,
-                    'Objective': pe.value(m_solved.obj),
-                    'Time': m_solved.dsda_time,
-                    'Status': m_solved.dsda_status,
-                    'User_time': m_solved.dsda_usertime,
-                }
-                dict_data.append(new_result)
-                print(new_result)
-
-    # The results are written to a CSV file.
-    try:
-        with open(csv_file, 'w') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=csv_columns)
-            writer.writeheader()
-            for data in dict_data:
-                writer.writerow(data)
-    except IOError:
-        print("I/O error")
+
+    # The cases are solved and their results are merged into the CSV file, in the order of the cases.
+    dict_data = run_sweep(
+        cases, solve_column_case, csv_file=csv_file, csv_columns=csv_columns, workers=workers
+    )
 
     # The model is built again and the external information is fetched once more.
     # This seems to be done in preparation for subsequent steps in the larger program.
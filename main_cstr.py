@@ -5,20 +5,19 @@ import json
 import os
 from math import ceil, fabs
 
-import matplotlib.pyplot as plt
-import networkx as nx
 import pyomo.environ as pe
 import logging
 from pyomo.environ import SolverFactory, Suffix, value
 from pyomo.gdp import Disjunct, Disjunction
 from pyomo.util.infeasible import log_infeasible_constraints
 
-from gdp.cstr.gdp_reactor import build_cstrs
+from gdp.cstr.gdp_reactor import build_cstrs, transfer_initialization
 from gdp.dsda.dsda_functions import (external_ref,
                                      extvars_gdp_to_mip,
                                      generate_initialization,
                                      get_external_information,
-                                     initialize_model,
+                                     initialize_block_triangular,
+                                     initialize_model, run_sweep,
                                      solve_complete_external_enumeration,
                                      solve_subproblem, solve_with_dsda,
                                      solve_with_gdpopt, solve_with_minlp,
@@ -26,6 +25,10 @@ from gdp.dsda.dsda_functions import (external_ref,
 
 
 def visualize_cstr_superstructure(m, NT):
+    # The plotting stack is only loaded when plotting
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
     x = list((range(1, NT+1)))
 
     # Initialize bypasses (b), reactors(r) and recycle
@@ -121,6 +124,37 @@ def problem_logic_cstr(m):
     return logic_expr
 
 
+def solve_cstr_case(case):
+    # Solve one D-SDA case of the sweep (see run_sweep) and return its row of the results
+    NT = case['NT']
+    m = build_cstrs(NT)
+    ext_ref = {m.YF: m.N, m.YR: m.N}
+    m_solved, _, _ = solve_with_dsda(
+        model_function=build_cstrs,
+        model_args={'NT': NT},
+        starting_point=case['starting_point'],
+        ext_dict=ext_ref,
+        ext_logic=problem_logic_cstr,
+        mip_transformation=True,
+        transformation=case['transformation'],
+        k=case['k'],
+        provide_starting_initialization=True,
+        feasible_model='cstr_' + str(NT),
+        subproblem_solver=case['Solver'],
+        subproblem_solver_options=case['options'],
+        iter_timelimit=case['timelimit'],
+        timelimit=case['timelimit'],
+        gams_output=False,
+        tee=False,
+        global_tee=False,
+        screening=case.get('screening'),
+        batch_size=case.get('batch_size', 1),
+    )
+    return {'Method': case['Method'], 'Approach': case['Approach'], 'Solver': case['Solver'], 'Objective': pe.value(
+        m_solved.obj), 'Time': m_solved.dsda_time, 'Status': m_solved.dsda_status, 'User_time': m_solved.dsda_usertime, 'NT': NT,
+        'Batch_size': case.get('batch_size', 1), 'Points': m_solved.dsda_evaluated, 'Time_per_point': m_solved.dsda_usertime/max(m_solved.dsda_evaluated, 1)}
+
+
 if __name__ == "__main__":
 
     # Results
@@ -128,14 +162,15 @@ if __name__ == "__main__":
     # NTs = [5]
     timelimit = 900
     starting_point = [1, 1]
+    workers = 4  # Cases solved at the same time, each pinned to a core with single-threaded solvers
 
     globaltee = True
     # Setting logging level to ERROR to avoid printing FBBT warning of some constraints not implemented
     logging.basicConfig(level=logging.ERROR)
 
     csv_columns = ['Method', 'Approach', 'Solver',
-                   'Objective', 'Time', 'Status', 'User_time', 'NT']
-    dict_data = []
+                   'Objective', 'Time', 'Status', 'User_time', 'NT', 'Speedup', 'Batch_size', 'Points', 'Time_per_point']
+    cases = []
 
     dir_path = os.path.dirname(os.path.abspath(__file__))
     csv_file = os.path.join(
@@ -177,12 +212,18 @@ if __name__ == "__main__":
     ks = ['Infinity', '2']
     strategies = ['LOA', 'GLOA', 'LBB']
 
+    m_previous = None
     for NT in NTs:
         # Create initialization for all methods starting with a single reactor
         json_file = os.path.join(
             dir_path, 'gdp/dsda/', 'cstr_' + str(NT) + '_initialization.json')
         if os.path.exists(json_file):
             init_path = json_file
+        elif m_previous is not None:
+            # Warm start from the previous size, adding the new units as bypasses
+            m_transferred = transfer_initialization(build_cstrs(NT), m_previous)
+            init_path = generate_initialization(
+                m=m_transferred, starting_initialization=True, model_name='cstr_'+str(NT))
         else:
             m = build_cstrs(NT)
             ext_ref = {m.YF: m.N, m.YR: m.N}
@@ -195,10 +236,13 @@ if __name__ == "__main__":
                 dict_extvar=reformulation_dict,
                 tee=globaltee,
             )
+            # Compute the dependent variables from their equations before the solve
+            initialize_block_triangular(m_fixed)
             m_solved = solve_subproblem(
                 m=m_fixed, subproblem_solver='baron', timelimit=100, tee=True)
             init_path = generate_initialization(
                 m=m_solved, starting_initialization=True, model_name='cstr_'+str(NT))
+        m_previous = initialize_model(build_cstrs(NT), json_path=init_path)
 
         # # MINLP
         # for solver in minlps:
@@ -241,46 +285,47 @@ if __name__ == "__main__":
         #         print(new_result)
 
         # D-SDA
-        m = build_cstrs(NT)
-        ext_ref = {m.YF: m.N, m.YR: m.N}
-        get_external_information(m, ext_ref, tee=False)
-
         for solver in nlps:
             for k in ks:
                 for transformation in ['hull','bigm']:
-                    new_result = {}
-                    m_solved, _, _ = solve_with_dsda(
-                        model_function=build_cstrs,
-                        model_args={'NT': NT},
-                        starting_point=starting_point,
-                        ext_dict=ext_ref,
-                        ext_logic=problem_logic_cstr,
-                        mip_transformation=True,
-                        transformation=transformation,
-                        k=k,
-                        provide_starting_initialization=True,
-                        feasible_model='cstr_' + str(NT),
-                        subproblem_solver=solver,
-                        subproblem_solver_options=nlp_opts[solver],
-                        iter_timelimit=timelimit,
-                        timelimit=timelimit,
-                        gams_output=False,
-                        tee=False,
-                        global_tee=False,
-                    )
-                    new_result = {'Method': str('D-SDA_MIP_'+transformation), 'Approach': str('k='+k), 'Solver': solver, 'Objective': pe.value(
-                        m_solved.obj), 'Time': m_solved.dsda_time, 'Status': m_solved.dsda_status, 'User_time': m_solved.dsda_usertime, 'NT': NT}
-                    dict_data.append(new_result)
-                    print(new_result)
-
-        try:
-            with open(csv_file, 'w') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=csv_columns)
-                writer.writeheader()
-                for data in dict_data:
-                    writer.writerow(data)
-        except IOError:
-            print("I/O error")
+                    cases.append({'Method': str('D-SDA_MIP_'+transformation), 'Approach': str('k='+k), 'Solver': solver, 'NT': NT,
+                                  'transformation': transformation, 'k': k, 'options': nlp_opts[solver], 'timelimit': timelimit,
+                                  'starting_point': starting_point})
+
+        # D-SDA with BARON, screening the neighbors with knitro first
+        for k in ks:
+            for transformation in ['hull','bigm']:
+                cases.append({'Method': str('D-SDA_MIP_'+transformation+'_screened'), 'Approach': str('k='+k), 'Solver': 'baron', 'NT': NT,
+                              'transformation': transformation, 'k': k, 'options': nlp_opts['baron'], 'timelimit': timelimit,
+                              'starting_point': starting_point, 'screening': {'solver': 'knitro', 'solver_options': nlp_opts['knitro']}})
+
+        # D-SDA solving the neighbors in batches of subproblems, one solve statement per batch
+        for solver in nlps:
+            for k in ks:
+                for transformation in ['hull','bigm']:
+                    cases.append({'Method': str('D-SDA_MIP_'+transformation+'_batched'), 'Approach': str('k='+k), 'Solver': solver, 'NT': NT,
+                                  'transformation': transformation, 'k': k, 'options': nlp_opts[solver], 'timelimit': timelimit,
+                                  'starting_point': starting_point, 'batch_size': 8})
+
+    # Solve the cases concurrently, all the initializations are already generated
+    dict_data = run_sweep(cases, solve_cstr_case, csv_file=csv_file, csv_columns=csv_columns, workers=workers)
+
+    # Speedup of the screened runs with respect to the single-fidelity BARON runs
+    for new_result in dict_data:
+        if new_result['Method'].endswith('_screened') and isinstance(new_result.get('Time'), float):
+            single = [data for data in dict_data if data['Method'] == new_result['Method'][:-len('_screened')]
+                      and data['Approach'] == new_result['Approach'] and data['Solver'] == 'baron' and data['NT'] == new_result['NT']
+                      and isinstance(data.get('Time'), float)]
+            new_result['Speedup'] = single[0]['Time']/max(new_result['Time'], 1e-2) if single else None
+
+    try:
+        with open(csv_file, 'w') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=csv_columns, extrasaction='ignore')
+            writer.writeheader()
+            for data in dict_data:
+                writer.writerow(data)
+    except IOError:
+        print("I/O error")
 
     # # Complete enumeration
     # for transformation in ['bigm']:
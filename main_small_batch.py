@@ -10,7 +10,7 @@ from pyomo.util.infeasible import log_infeasible_constraints
 
 from gdp.dsda.dsda_functions import (external_ref, generate_initialization,
                                      get_external_information,
-                                     initialize_model,
+                                     initialize_model, run_sweep,
                                      solve_complete_external_enumeration,
                                      solve_subproblem, solve_with_dsda,
                                      solve_with_gdpopt, solve_with_minlp,
@@ -27,18 +27,49 @@ def problem_logic_batch(m):
     return logic_expr
 
 
+def solve_batch_case(case):
+    # Solve one D-SDA case of the sweep (see run_sweep) and return its row of the results
+    m = build_small_batch()
+    ext_ref = {m.Y: m.k}
+    m_solved, _, _ = solve_with_dsda(
+        model_function=build_small_batch,
+        model_args={},
+        starting_point=case['starting_point'],
+        ext_dict=ext_ref,
+        mip_transformation=True,
+        transformation=case['transformation'],
+        ext_logic=problem_logic_batch,
+        k=case['k'],
+        provide_starting_initialization=True,
+        feasible_model='small_batch',
+        subproblem_solver=case['Solver'],
+        subproblem_solver_options=case['options'],
+        iter_timelimit=case['timelimit'],
+        timelimit=case['timelimit'],
+        gams_output=False,
+        tee=case['tee'],
+        global_tee=case['tee'],
+        batch_size=case['batch_size'],
+    )
+    return {'Method': case['Method'], 'Approach': case['Approach'], 'Solver': case['Solver'], 'Objective': pe.value(
+        m_solved.obj), 'Time': m_solved.dsda_time, 'Status': m_solved.dsda_status, 'User_time': m_solved.dsda_usertime,
+        'Batch_size': case['batch_size'], 'Points': m_solved.dsda_evaluated,
+        'Time_per_point': m_solved.dsda_usertime/max(m_solved.dsda_evaluated, 1)}
+
+
 if __name__ == "__main__":
     # Inputs
     timelimit = 900
     model_args = {}
     starting_point = [3, 3, 3]
+    workers = 4  # Cases solved at the same time, each pinned to a core with single-threaded solvers
 
     globaltee = True
     # Setting logging level to ERROR to avoid printing FBBT warning of some constraints not implemented
     logging.basicConfig(level=logging.ERROR)
 
     csv_columns = ['Method', 'Approach', 'Solver',
-                   'Objective', 'Time', 'Status', 'User_time']
+                   'Objective', 'Time', 'Status', 'User_time', 'Batch_size', 'Points', 'Time_per_point']
     dict_data = []
     dir_path = os.path.dirname(os.path.abspath(__file__))
     csv_file = os.path.join(
@@ -79,6 +110,7 @@ if __name__ == "__main__":
     ]
     transformations = ['bigm', 'hull']
     ks = ['Infinity', '2']
+    batch_sizes = [1, 8]  # Neighbors solved with one solve statement, to compare the cost per point
     strategies = ['LOA', 'LBB']
 
     # # Initializations
@@ -143,42 +175,17 @@ if __name__ == "__main__":
     ext_ref = {m.Y: m.k}
     get_external_information(m, ext_ref, tee=globaltee)
 
+    cases = []
     for solver in nlps:
         for k in ks:
             for transformation in transformations:
-                new_result = {}
-                m_solved, _, _ = solve_with_dsda(
-                    model_function=build_small_batch,
-                    model_args={},
-                    starting_point=starting_point,
-                    ext_dict=ext_ref,
-                    mip_transformation=True,
-                    transformation=transformation,
-                    ext_logic=problem_logic_batch,
-                    k=k,
-                    provide_starting_initialization=True,
-                    feasible_model='small_batch',
-                    subproblem_solver=solver,
-                    subproblem_solver_options=nlp_opts[solver],
-                    iter_timelimit=timelimit,
-                    timelimit=timelimit,
-                    gams_output=False,
-                    tee=globaltee,
-                    global_tee=globaltee,
-                )
-                new_result = {'Method': str('D-SDA_MIP_'+transformation), 'Approach': str('k='+k), 'Solver': solver, 'Objective': pe.value(
-                    m_solved.obj), 'Time': m_solved.dsda_time, 'Status': m_solved.dsda_status, 'User_time': m_solved.dsda_usertime}
-                dict_data.append(new_result)
-                print(new_result)
-
-    try:
-        with open(csv_file, 'w') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=csv_columns)
-            writer.writeheader()
-            for data in dict_data:
-                writer.writerow(data)
-    except IOError:
-        print("I/O error")
+                for batch_size in batch_sizes:
+                    cases.append({'Method': str('D-SDA_MIP_'+transformation), 'Approach': str('k='+k), 'Solver': solver,
+                                  'transformation': transformation, 'k': k, 'options': nlp_opts[solver], 'timelimit': timelimit,
+                                  'starting_point': starting_point, 'batch_size': batch_size, 'tee': globaltee and workers == 1})
+
+    # Solve the cases concurrently and write the merged results
+    dict_data = run_sweep(cases, solve_batch_case, csv_file=csv_file, csv_columns=csv_columns, workers=workers)
 
     # # Complete enumeration
     # for transformation in transformations:
@@ -0,0 +1,72 @@
+"""
+Benchmark of the time that importing a module of the gdp package takes in a fresh interpreter, as paid by every
+sweep worker and every short run of the drivers. Every run is appended to results/import_time.csv to track it.
+"""
+
+import csv
+import datetime
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def measure_import_time(module: str = 'gdp.dsda.dsda_functions', repeat: int = 5, top: int = 10) -> dict:
+    """
+    Function that measures the import time of a module in fresh interpreters
+    Args:
+        module: Module to be imported
+        repeat: Number of fresh interpreters in which the import is timed
+        top: Number of slowest imported modules to report
+    Returns:
+        result: Dictionary with the 'median' and 'min' import time in seconds, and the 'slowest' modules imported with it
+            (list of the name and cumulative import time in seconds, from python -X importtime)
+    """
+    code = 'import time; t = time.perf_counter(); import %s; print(time.perf_counter() - t)' % module
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], cwd=root,
+                             stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        times.append(float(out.stdout.split()[-1]))
+
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], cwd=root,
+                         stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    imported = []
+    for line in out.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imported.append((fields[2].strip(), int(fields[1])/1e6))
+    slowest = sorted((i for i in imported if i[0] != module), key=lambda i: -i[1])[:top]
+
+    return {'median': statistics.median(times), 'min': min(times), 'slowest': slowest}
+
+
+if __name__ == "__main__":
+    modules = ['gdp.dsda.dsda_functions']
+    repeat = 5
+
+    csv_columns = ['Date', 'Module', 'Python', 'Median', 'Min', 'Repeat']
+    csv_file = os.path.join(root, "results", "import_time.csv")
+    dict_data = []
+
+    for module in modules:
+        result = measure_import_time(module, repeat=repeat)
+        print('Import of', module, '   |   Median [s]:', round(result['median'], 3), '   |   Min [s]:', round(result['min'], 3))
+        for name, seconds in result['slowest']:
+            print('    ', name, round(seconds, 3))
+        dict_data.append({'Date': datetime.datetime.now().isoformat(timespec='seconds'), 'Module': module,
+                          'Python': platform.python_version(), 'Median': result['median'], 'Min': result['min'], 'Repeat': repeat})
+
+    try:
+        new_file = not os.path.exists(csv_file)
+        with open(csv_file, 'a') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=csv_columns)
+            if new_file:
+                writer.writeheader()
+            for data in dict_data:
+                writer.writerow(data)
+    except IOError:
+        print("I/O error")
@@ -0,0 +1,448 @@
+"""
+Test for the functions that prepare and solve the fixed subproblems of D-SDA
+"""
+
+import os
+import time
+import unittest
+from unittest import mock
+
+import pyomo.environ as pe
+import pytest
+from gdp.dsda import dsda_functions as df
+from gdp.small_batch.gdp_small_batch import build_small_batch
+from pyomo.common.errors import InfeasibleConstraintException
+from pyomo.gdp import Disjunct, Disjunction, GDP_Error
+from pyomo.opt import SolverResults
+from pyomo.opt import TerminationCondition as tc
+
+
+def _state(m):
+    """
+    Bounds and fixed flags of the variables and active flags of the
+    constraints of a model, to compare a model before and after a change
+    """
+    return ([(v.name, v.lb, v.ub, v.fixed) for v in m.component_data_objects(pe.Var)],
+            [(c.name, c.active) for c in m.component_data_objects(pe.Constraint)])
+
+
+class TestPresolve(unittest.TestCase):
+
+    def setup_model(self):
+        m = pe.ConcreteModel()
+        m.x = pe.Var(bounds=(0, 10))
+        m.y = pe.Var(bounds=(0, 10))
+        m.z = pe.Var(bounds=(0, 10))
+        m.fix_x = pe.Constraint(expr=2 * m.x == 4)
+        m.bound_y = pe.Constraint(expr=m.y - m.x <= 1)
+        m.link = pe.Constraint(expr=m.y * m.z >= 1)
+        m.obj = pe.Objective(expr=m.z)
+        return m
+
+    def test_restore(self):
+        """Presolve reduces the model and restore_presolve undoes it"""
+        m = self.setup_model()
+        before = _state(m)
+        record = df.presolve_problem(m)
+        assert(m.x.fixed)
+        assert(abs(pe.value(m.x) - 2) < 1e-8)
+        assert(abs(m.y.ub - 3) < 1e-8)
+        assert(not m.fix_x.active)
+        assert(not m.bound_y.active)
+        assert(m.link.active)
+        assert(record['n_cons'] == (3, 1))
+        m.y.value = 2.5
+        df.restore_presolve(record)
+        assert(_state(m) == before)
+        assert(abs(pe.value(m.y) - 2.5) < 1e-8)  # values are kept
+
+    def test_infeasible(self):
+        """Presolve undoes its changes before reporting infeasibility"""
+        m = self.setup_model()
+        m.bound_z = pe.Constraint(expr=m.z - m.x >= 9)
+        before = _state(m)
+        with pytest.raises(InfeasibleConstraintException):
+            df.presolve_problem(m)
+        assert(_state(m) == before)
+
+    def test_prepare_infeasible(self):
+        """An infeasible presolve leaves the subproblem unchanged"""
+        m = self.setup_model()
+        m.x.setlb(3)  # 2*x == 4 is infeasible
+        before = _state(m)
+        with mock.patch.object(df, 'fbbt', lambda m: None):  # let presolve find it
+            assert(df._prepare_subproblem(m, presolve=True) is None)
+        assert(m.dsda_status == 'FBBT_Infeasible')
+        assert(m.dsda_presolve is None)
+        assert(_state(m) == before)
+
+
+class TestSeeds(unittest.TestCase):
+
+    def setup_model(self):
+        m = pe.ConcreteModel()
+        m.x = pe.Var(bounds=(0, 10))
+        m.y = pe.Var(bounds=(0, 10))
+        m.z = pe.Var(bounds=(-20, 20))
+        m.sum = pe.Constraint(expr=m.x + m.y <= 12)
+        m.diff = pe.Constraint(expr=m.z == m.x - m.y)
+        m.d = Disjunct([1, 2, 3])
+        m.d[1].c = pe.Constraint(expr=m.x <= 2)
+        m.d[2].c = pe.Constraint(expr=m.x >= 8)
+        m.d[3].c = pe.Constraint(expr=m.x**2 <= 30)
+        m.dj = Disjunction(expr=[m.d[1], m.d[2], m.d[3]])
+        m.e = Disjunct([1, 2])
+        m.e[1].c = pe.Constraint(expr=m.y >= 5)
+        m.e[2].c = pe.Constraint(expr=m.y <= 1)
+        m.ej = Disjunction(expr=[m.e[1], m.e[2]])
+        return m
+
+    def subproblem(self, bounds, k, l, transformation):
+        m = self.setup_model()
+        for i in m.d:
+            m.d[i].indicator_var.fix(int(i == k))
+        for i in m.e:
+            m.e[i].indicator_var.fix(int(i == l))
+        pe.TransformationFactory('gdp.' + transformation).apply_to(m)
+        df.from_json(m, sd=bounds, wts=df.StoreSpec.bound())
+        return m
+
+    def propagate(self, m, bounds, incremental):
+        """
+        Bounds of x, y and z after the propagation from the superstructure bounds, None if infeasible
+        """
+        try:
+            if incremental:
+                assert(df.propagate_superstructure_bounds(m, bounds) is not None)
+            else:
+                df.fbbt(m)
+        except InfeasibleConstraintException:
+            return None
+        return [(v.lb, v.ub) for v in (m.x, m.y, m.z)]
+
+    def test_incremental(self):
+        """The cached group tightenings give the bounds of the complete propagation"""
+        for transformation in ('fix_disjuncts', 'bigm'):
+            bounds = df.get_superstructure_bounds(self.setup_model())
+            for k, l in [(1, 1), (3, 1), (1, 2), (2, 1), (3, 2), (2, 2)]:
+                incremental = self.propagate(self.subproblem(bounds, k, l, transformation), bounds, True)
+                complete = self.propagate(self.subproblem(bounds, k, l, transformation), bounds, False)
+                assert((incremental is None) == (complete is None))
+                assert(incremental is None or all(
+                    abs(a - b) < 1e-3 for i, c in zip(incremental, complete) for a, b in zip(i, c)))
+            tightenings = df._get_fbbt_cache(bounds)['tightenings']
+            if transformation == 'fix_disjuncts':
+                assert(len(tightenings) == 5)  # once per disjunct
+            else:  # grouped by disjunct and big-M values
+                assert(tightenings and all(isinstance(key[1], tuple) for key in tightenings))
+
+    def test_other_structure(self):
+        """A subproblem with another structure is left to the complete propagation"""
+        bounds = df.get_superstructure_bounds(self.setup_model())
+        m = self.subproblem(bounds, 1, 1, 'fix_disjuncts')
+        m.del_component(m.sum)
+        assert(df.propagate_superstructure_bounds(m, bounds) is None)
+        df.preprocess_problem(m, superstructure_bounds=bounds)
+        assert(abs(m.z.ub + 3) < 1e-6)  # x <= 2 and y >= 5
+
+
+class TestBatch(unittest.TestCase):
+
+    def setup_model(self, a):
+        m = pe.ConcreteModel()
+        m.x = pe.Var(bounds=(0, 10), initialize=5)
+        m.obj = pe.Objective(expr=(m.x - a)**2)
+        return m
+
+    def fake_solve(self, condition):
+        """
+        Replacement of _solve_prepared that records its calls and ends the
+        batch solve with the given termination condition
+        """
+        def solve(m, solver_options={}, **kwargs):
+            batch = m.component('subproblem_0') is not None
+            self.calls.append((batch, solver_options['add_options'][0]))
+            results = SolverResults()
+            results.solver.termination_condition = condition if batch else tc.optimal
+            results.solver.user_time = 2.0
+            if batch and self.bound is not None:
+                results.problem.lower_bound = self.bound
+            return results
+        return solve
+
+    def solve_batch(self, condition, bound=None):
+        self.calls = []
+        self.bound = bound
+        models = [self.setup_model(a) for a in (1, 2, 3)]
+        with mock.patch.object(df, '_solve_prepared', self.fake_solve(condition)):
+            df.solve_subproblem_batch(models, timelimit=30)
+        return models
+
+    def test_batch(self):
+        """The batch solve time is shared between its subproblems"""
+        models = self.solve_batch(tc.optimal)
+        assert(self.calls == [(True, 'option reslim=30;')])
+        for m in models:
+            assert(m.dsda_status == 'Optimal')
+            assert(m.dsda_batch == {'size': 3, 'fallback': False})
+            assert(abs(m.dsda_usertime - 2.0/3) < 1e-8)
+            assert(m.obj.active)
+            assert(m.parent_block() is None)
+
+    def test_fallback(self):
+        """Each subproblem of a failed batch is solved with its own time limit"""
+        models = self.solve_batch(tc.infeasible)
+        assert(self.calls == [(True, 'option reslim=30;')] +
+               [(False, 'option reslim=10.0;')] * 3)
+        for m in models:
+            assert(m.dsda_status == 'Optimal')
+            assert(m.dsda_batch == {'size': 3, 'fallback': True})
+            assert(abs(m.dsda_usertime - 2.0) < 1e-8)
+            assert(m.obj.active)
+
+    def test_gap(self):
+        """The subproblems whose objective is not within rel_tol of the batch gap are solved again"""
+        models = self.solve_batch(tc.optimal, bound=28.99)  # objectives 16, 9 and 4, gap 0.01
+        assert(self.calls == [(True, 'option reslim=30;')] +
+               [(False, 'option reslim=10.0;')] * 2)
+        assert([m.dsda_batch['fallback'] for m in models] == [False, True, True])
+        assert(abs(models[0].dsda_usertime - 2.0/3) < 1e-8)
+        assert(abs(models[1].dsda_usertime - 2.0 - 2.0/3) < 1e-8)
+
+
+class TestBound(unittest.TestCase):
+
+    def setup_model(self):
+        m = pe.ConcreteModel()
+        m.x = pe.Var(bounds=(0, 4), initialize=1)
+        m.obj = pe.Objective(expr=m.x**2 - m.x)
+        return m
+
+    def relaxation_bound(self, m, lower, upper, condition=tc.optimal):
+        """
+        get_relaxation_bound with a solver that reports the given bounds
+        """
+        class Solver(object):
+            def solve(self, m, **kwargs):
+                assert(not kwargs['load_solutions'])
+                results = SolverResults()
+                results.problem.lower_bound = lower
+                results.problem.upper_bound = upper
+                results.solver.termination_condition = condition
+                return results
+        with mock.patch.object(df, 'SolverFactory', lambda *args, **kwargs: Solver()):
+            return df.get_objective_bound(m, bound_function=df.get_relaxation_bound)
+
+    def test_interval(self):
+        """Without bound_function the interval bound is used"""
+        assert(abs(df.get_objective_bound(self.setup_model()) + 4) < 1e-8)
+
+    def test_relaxation(self):
+        """The dual bound of the solver tightens the interval bound"""
+        m = self.setup_model()
+        assert(abs(self.relaxation_bound(m, 3.0, 5.0) - 3) < 1e-8)
+        assert(abs(pe.value(m.x) - 1) < 1e-8)
+        assert(abs(self.relaxation_bound(m, -1e10, 5.0) + 4) < 1e-8)
+        assert(self.relaxation_bound(m, None, None, tc.infeasible) == float('inf'))
+        m.obj.sense = pe.maximize
+        assert(abs(self.relaxation_bound(m, 3.0, 5.0) + 5) < 1e-8)
+
+
+class TestScreening(unittest.TestCase):
+
+    def fake_solve(self, m, subproblem_solver, rel_tol=1e-3, **kwargs):
+        """
+        Replacement of solve_subproblem: the 'loose' screening solver finds
+        the objective in screening (None if it fails) and the full solver the
+        one in full
+        """
+        objective = (self.screening if subproblem_solver == 'loose' else self.full)[m.point]
+        m.dsda_usertime = 1
+        if objective is None:
+            m.dsda_status = 'Evaluated_Infeasible'
+        else:
+            m.dsda_status = 'Optimal'
+            m.x.value = objective
+        return m
+
+    def setup_model(self):
+        m = pe.ConcreteModel()
+        m.x = pe.Var()
+        m.obj = pe.Objective(expr=m.x)
+        return m
+
+    def set_point(self, m, x, **kwargs):
+        m.point = x[0]
+        return m
+
+    def test_evaluations(self):
+        """Only the points solved at full fidelity are stored in the evaluation cache"""
+        self.screening = {1: 10, 2: None, 3: -1}
+        self.full = {3: -2}
+        evaluations = {}
+        with mock.patch.object(df, 'solve_subproblem', self.fake_solve), \
+                mock.patch.object(df, 'external_ref', self.set_point), \
+                mock.patch.object(df, 'initialize_model', lambda m, json_path=None: m), \
+                mock.patch.object(df, 'generate_initialization', lambda *args, **kwargs: None):
+            fmin, best_var, _, improve, _, evaluated, _ = df.evaluate_neighbors(
+                ext_vars={0: [0], 1: [1], 2: [2], 3: [3]}, fmin=0, model_function=self.setup_model,
+                model_args={}, ext_dict={}, ext_logic=None, subproblem_solver='full', global_tee=False,
+                current_time=time.perf_counter(), screening={'solver': 'loose'}, evaluations=evaluations)
+        assert(improve and best_var == [3] and abs(fmin + 2) < 1e-8)
+        assert(evaluated == [[1], [2], [3]])
+        assert(evaluations == {(3,): {'status': 'Optimal', 'path': None, 'objective': -2}})
+
+
+class TestWorkers(unittest.TestCase):
+
+    def fake_solve(self, m, **kwargs):
+        """
+        Replacement of solve_subproblem that finds the objective in full (None
+        if the subproblem is infeasible) and fails for the other points
+        """
+        objective = self.full[m.point]
+        m.dsda_usertime = 1
+        if objective is None:
+            m.dsda_status = 'Evaluated_Infeasible'
+        else:
+            m.dsda_status = 'Optimal'
+            m.x.value = objective
+        return m
+
+    def setup_model(self):
+        m = pe.ConcreteModel()
+        m.x = pe.Var()
+        m.obj = pe.Objective(expr=m.x)
+        return m
+
+    def set_point(self, m, x, **kwargs):
+        m.point = x[0]
+        return m
+
+    def test_merge(self):
+        """The results of the workers are merged in the evaluation cache and the best one is built again from its values"""
+        self.full = {1: 1, 2: -2, 3: None}
+        evaluations = {}
+        written = []
+        run_sweep = df.run_sweep
+        with mock.patch.object(df, 'solve_subproblem', self.fake_solve), \
+                mock.patch.object(df, 'external_ref', self.set_point), \
+                mock.patch.object(df, 'initialize_model', lambda m, json_path=None: m), \
+                mock.patch.object(df, 'generate_initialization', lambda m, **kwargs: written.append((m.point, m.x.value))), \
+                mock.patch.object(df, 'run_sweep', lambda cases, run_case, **kwargs: run_sweep(cases, run_case, **dict(kwargs, workers=1))):
+            fmin, best_var, _, improve, _, evaluated, _ = df.evaluate_neighbors(
+                ext_vars={0: [0], 1: [1], 2: [2], 3: [3], 4: [4]}, fmin=0, model_function=self.setup_model,
+                model_args={}, ext_dict={}, ext_logic=None, global_tee=False, current_time=time.perf_counter(),
+                evaluations=evaluations, workers=2)
+        assert(improve and best_var == [2] and abs(fmin + 2) < 1e-8)
+        assert(written == [(2, -2)])
+        assert(evaluated == [[1], [2], [3]])
+        assert(evaluations == {(1,): {'status': 'Optimal', 'path': None, 'objective': 1},
+                               (2,): {'status': 'Optimal', 'path': None, 'objective': -2},
+                               (3,): {'status': 'Evaluated_Infeasible', 'path': None, 'objective': None}})
+
+
+class TestSession(unittest.TestCase):
+
+    init_path = os.path.join(os.path.dirname(df.__file__), 'small_batch_initialization.json')
+
+    def logic(self, m):
+        logic_expr = []
+        for k in m.k:
+            for j in m.j:
+                logic_expr.append([m.Y[k, j], m.Y_exists[k, j].indicator_var])
+                logic_expr.append([~m.Y[k, j], m.Y_not_exists[k, j].indicator_var])
+        return logic_expr
+
+    def fixed_model(self, ext_dict, point, mip_transformation):
+        """
+        Subproblem of a point built from scratch with external_ref
+        """
+        m = df.initialize_model(build_small_batch(), json_path=self.init_path)
+        if mip_transformation:
+            m, ext_dict = df.extvars_gdp_to_mip(m, df._plain_ext_dict(ext_dict), 'bigm')
+        return df.external_ref(m, point, self.logic, ext_dict, mip_ref=mip_transformation)
+
+    def active(self, m):
+        """
+        Names of the active constraints, those of a big-M relaxation by their
+        disjunct constraint (equalities are split in two)
+        """
+        bigm = pe.TransformationFactory('gdp.bigm')
+        names = set()
+        for c in m.component_data_objects(pe.Constraint, active=True, descend_into=True):
+            try:
+                c = bigm.get_src_constraint(c)
+            except GDP_Error:
+                pass
+            names.add(c.name)
+        return names
+
+    def test_structure(self):
+        """The model of the session fixed at each point has the constraints of the subproblem built from scratch"""
+        m = build_small_batch()
+        ext_dict, _, _, _ = df.get_external_information(m, {m.Y: m.k}, tee=False)
+        for mip_transformation in (True, False):
+            session = df.get_solver_session()
+            models = []
+            for point in ([1, 2, 3], [2, 2, 1], [1, 2, 3]):
+                m_session, _ = df._session_neighbor(session, point, build_small_batch, {}, ext_dict, self.logic,
+                                                    init_path=self.init_path, mip_transformation=mip_transformation)
+                m_fixed = self.fixed_model(ext_dict, point, mip_transformation)
+                assert(self.active(m_session) == self.active(m_fixed))
+                if mip_transformation:
+                    assert(sorted((v.name, v.value) for v in m_session.component_data_objects(pe.Var) if v.fixed) ==
+                           sorted((v.name, v.value) for v in m_fixed.component_data_objects(pe.Var) if v.fixed))
+                models.append(m_session)
+            assert(session['builds'] == 1)
+            assert(models[0] is models[1] is models[2])
+
+    def test_persistent(self):
+        """A persistent solver gets the model once and then only the constraints that changed"""
+        calls = []
+
+        class Solver(object):
+            def set_instance(self, m, **kwargs):
+                calls.append('set_instance')
+
+            def add_constraint(self, c):
+                calls.append(('add', c.name))
+
+            def remove_constraint(self, c):
+                calls.append(('remove', c.name))
+
+            def update_var(self, v):
+                pass
+
+            def solve(self, **kwargs):
+                results = SolverResults()
+                results.solver.user_time = 1.0
+                return results
+
+        with mock.patch.object(df, 'SolverFactory', lambda *args, **kwargs: Solver()):
+            session = df.get_solver_session()
+        session['persistent'] = True
+        m = pe.ConcreteModel()
+        m.x = pe.Var(bounds=(0, 10))
+        m.c1 = pe.Constraint(expr=m.x**2 >= 1)
+        m.c2 = pe.Constraint(expr=m.x**2 <= 50)
+        m.obj = pe.Objective(expr=m.x)
+        for active in (True, False, True):
+            m.c2.activate() if active else m.c2.deactivate()
+            df.solve_subproblem(m, subproblem_solver='knitro', presolve=False, solver_session=session)
+            assert(m.dsda_status == 'Optimal')
+        assert(calls == ['set_instance', ('remove', 'c2'), ('add', 'c2')])
+        assert(session['loads'] == 1 and session['updates'] == 2)
+
+
+class TestSensitivity(unittest.TestCase):
+
+    def test_needs_mip(self):
+        """Sensitivity estimates without the MIP transformation are rejected"""
+        with pytest.raises(ValueError):
+            df.solve_with_dsda(model_function=pe.ConcreteModel, model_args={}, starting_point=[1],
+                               ext_dict={}, ext_logic=None, sensitivity=True, global_tee=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,9 +16,11 @@ Test for functions to save/load Pyomo model state to a dict or json
 
 import unittest
 import os
+import json
 
 from pyomo.environ import *
-from model_serializer import to_json, from_json, StoreSpec
+from model_serializer import (to_json, from_json, get_structure, StoreSpec,
+                              SnapshotWriter)
 import shutil
 import pytest
 import tempfile
@@ -344,5 +346,140 @@ class TestModelSerialize(unittest.TestCase):
         assert(abs(model.ipopt_zU_out[model.x[1]] - 10) < 1e-5)
         assert(abs(model.ipopt_zU_out[model.x[2]] - 10) < 1e-5)
 
+    @pytest.mark.unit
+    def test12(self):
+        """Access plans are not reused for components over other keys"""
+        wts = StoreSpec.value_isfixed_isactive(only_fixed=False)
+        for keys in ([1, 2, 3], [4, 5, 6]):
+            model = ConcreteModel()
+            model.x = Var(keys, initialize={k: k for k in keys})
+            # the second write uses the access plan compiled by the first
+            for i in range(2):
+                sd = to_json(model, wts=wts, return_dict=True)
+            data = sd["unknown"]["data"]["None"]["__pyomo_components__"]["x"]
+            assert(sorted(data["data"]) == sorted(repr(k) for k in keys))
+            for k in keys:
+                assert(abs(data["data"][repr(k)]["value"] - k) < 1e-5)
+
+    @pytest.mark.unit
+    def test13(self):
+        """States of components over other keys are not read"""
+        wts = StoreSpec.value_isfixed_isactive(only_fixed=False)
+        models = []
+        for k in (4, 1):
+            model = ConcreteModel()
+            model.x = Var([k, k + 1, k + 2], initialize=k)
+            model.y = Var(Any, dense=False)
+            model.y[k] = k
+            model.z = Var(initialize=k)
+            models.append(model)
+        to_json(models[0], fname=self.fname, wts=wts)
+        structures = [get_structure(model) for model in models]
+        assert(structures[0]["hash"] != structures[1]["hash"])
+        for name in ["x", "y"]:
+            assert(structures[0]["components"][name] !=
+                   structures[1]["components"][name])
+        assert(structures[0]["components"]["z"] ==
+               structures[1]["components"]["z"])
+        model = models[1]
+        pdict = from_json(model, fname=self.fname, wts=wts)
+        assert(pdict["structure"] == "partial")
+        assert(abs(value(model.z) - 4) < 1e-5)
+        for k in [1, 2, 3]:
+            assert(abs(value(model.x[k]) - 1) < 1e-5)
+
+    @pytest.mark.unit
+    def test14(self):
+        """Streaming a json file gives the same state as loading it whole"""
+        model = self.setup_model02()
+        model.x[1].fix(3)
+        model.b = 5
+        model.g.deactivate()
+        model.dual[model.g] = 1
+        dirname = tempfile.mkdtemp()
+        try:
+            for name in ["state.json", "state.json.gz"]:
+                fname = os.path.join(dirname, name)
+                to_json(model, fname=fname, human_read=True)
+                states = []
+                for stream in [False, True]:
+                    m = self.setup_model02()
+                    pdict = from_json(m, fname=fname, stream=stream)
+                    assert((pdict["access_plan"] == "stream") == stream)
+                    states.append(to_json(m, return_dict=True))
+                for state in states:
+                    del state["__metadata__"]
+                assert(states[0] == states[1])
+                assert(states[1]["unknown"]["data"]["None"]
+                       ["__pyomo_components__"]["x"]["data"]["1"]["fixed"])
+        finally:
+            shutil.rmtree(dirname)
+
+    @pytest.mark.unit
+    def test15(self):
+        """Delta snapshots store the changes from their base and read back whole"""
+        wts = StoreSpec.value_isfixed_isactive(only_fixed=False)
+        dirname = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(dirname, "base"))
+            base = os.path.join(dirname, "base", "state.json")
+            fname = os.path.join(dirname, "delta.json")
+            model = self.setup_model02()
+            to_json(model, fname=base, wts=wts)
+            model.x[2].value = 7
+            model.x[2].fix()
+            sd = to_json(model, fname=fname, wts=wts, base=base,
+                         return_dict=True)
+            ref = sd["__metadata__"]["base"]
+            assert(ref["fname"] == os.path.join("base", "state.json"))
+            data = sd["unknown"]["data"]["None"]["__pyomo_components__"]
+            assert(list(data) == ["x"])
+            assert(list(data["x"]["data"]) == ["2"])
+
+            m = self.setup_model02()
+            from_json(m, fname=fname, wts=wts)
+            assert(abs(value(m.x[1]) - 1.5) < 1e-5)
+            assert(abs(value(m.x[2]) - 7) < 1e-5)
+            assert(m.x[2].fixed)
+
+            # a base of another structure gives a full snapshot
+            other = self.setup_model01()
+            sd = to_json(other, fname=fname, wts=wts, base=base,
+                         return_dict=True)
+            assert("base" not in sd["__metadata__"])
+            assert("x" not in sd["unknown"]["data"]["None"][
+                "__pyomo_components__"])
+        finally:
+            shutil.rmtree(dirname)
+
+    @pytest.mark.unit
+    def test16(self):
+        """Snapshots queued in a SnapshotWriter are on disk after flush"""
+        dirname = tempfile.mkdtemp()
+        try:
+            fnames = [os.path.join(dirname, "state%d.json" % i)
+                      for i in range(4)]
+            writer = SnapshotWriter(maxsize=1)
+            for i, fname in enumerate(fnames):
+                model = self.setup_model02()
+                model.x[1].value = i
+                writer.write(model, fname)
+            writer.flush()
+            # read the files directly, from_json(fname=...) would wait anyway
+            for i, fname in enumerate(fnames):
+                m = self.setup_model02()
+                with open(fname) as f:
+                    from_json(m, sd=json.load(f))
+                assert(abs(value(m.x[1]) - i) < 1e-5)
+
+            # errors of the writer thread are raised by the next call
+            writer.write(self.setup_model02(),
+                         os.path.join(dirname, "missing", "state.json"))
+            with pytest.raises(IOError):
+                writer.flush()
+            writer.close()
+        finally:
+            shutil.rmtree(dirname)
+
 if __name__ == '__main__':
     unittest.main()
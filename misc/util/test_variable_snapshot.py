@@ -0,0 +1,51 @@
+"""
+Test for the variable snapshots used to warm start models
+"""
+
+import unittest
+
+import pyomo.environ as pe
+from gdp.dsda import variable_snapshot as vs
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setup_model(self, keys):
+        m = pe.ConcreteModel()
+        m.b = pe.Block()
+        m.b.x = pe.Var(keys, initialize={k: k for k in keys})
+        m.y = pe.Var(initialize=-1)
+        m.y.fix()
+        return m
+
+    def test_same_structure(self):
+        """A snapshot restores the values of a model with the same structure"""
+        m = self.setup_model([1, 2, 3])
+        snapshot = vs.get_variable_snapshot(m)
+        m2 = self.setup_model([1, 2, 3])
+        for v in m2.b.x.values():
+            v.value = None
+        m2.y.value = 5
+        vs.apply_variable_snapshot(m2, snapshot)
+        assert([m2.b.x[k].value for k in [1, 2, 3]] == [1, 2, 3])
+        assert(m2.y.value == 5)  # fixed variables are skipped
+
+    def test_other_keys(self):
+        """Values are matched by index, not by position"""
+        snapshot = vs.get_variable_snapshot(self.setup_model([1, 2, 3]))
+        m = self.setup_model([2, 3, 4])
+        m.b.x[4].value = None
+        vs.apply_variable_snapshot(m, snapshot)
+        assert([m.b.x[k].value for k in [2, 3, 4]] == [2, 3, None])
+
+    def test_bounded_caches(self):
+        """The layout and gather caches keep at most _max_snapshot_cache entries"""
+        snapshot = vs.get_variable_snapshot(self.setup_model([0]))
+        for n in range(2 * vs._max_snapshot_cache):
+            vs.apply_variable_snapshot(self.setup_model(list(range(n))), snapshot)
+        assert(len(vs._snapshot_layouts) <= vs._max_snapshot_cache)
+        assert(len(vs._snapshot_gathers) <= vs._max_snapshot_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()